@@ -4,13 +4,14 @@ import os
 from flask import Flask
 from config import Config
 from app.extensions import db, migrate, bcrypt, login_manager
+from app.database import init_database
 
 def create_app(config_class=Config):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_class)
 
-    # Initialize extensions
-    db.init_app(app)
+    # Initialize extensions (SQLite is tuned for concurrent workers, see app/database.py)
+    init_database(app, db)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     login_manager.init_app(app)
@@ -29,4 +30,8 @@ def create_app(config_class=Config):
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(core_bp, url_prefix='/core')
 
+    # Register CLI commands (e.g. `flask worker`)
+    from app.cli import register_commands
+    register_commands(app)
+
     return app
@@ -0,0 +1,215 @@
+# app/cli.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.services.audio_profiles import AUDIO_PROFILES, DEFAULT_AUDIO_PROFILE
+from app.services.tts_backends import TTS_BACKENDS
+
+AUDIO_PROFILE_NAMES = list(AUDIO_PROFILES)
+TTS_BACKEND_NAMES = list(TTS_BACKENDS)
+
+
+@click.command('worker')
+@click.option('--processes', '-p', type=int, default=None,
+              help='Number of worker processes (defaults to WORKER_PROCESSES).')
+@with_appcontext
+def worker_command(processes):
+    """Run the background workers that turn uploads into podcasts."""
+    from app.worker import run_worker_pool
+    run_worker_pool(processes or current_app.config['WORKER_PROCESSES'])
+
+
+@click.command('synthesize')
+@click.argument('script_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_file', type=click.Path(dir_okay=False))
+@click.option('--workers', '-w', type=int, default=None,
+              help='Synthesis processes (defaults to TTS_POOL_SIZE; 0 or 1 runs in-process).')
+@click.option('--threads', '-t', type=int, default=None,
+              help='Threads per synthesis process (defaults to TTS_THREADS_PER_WORKER).')
+@click.option('--no-cache', is_flag=True, help='Do not read or fill the clip cache.')
+@click.option('--profile', type=click.Choice(AUDIO_PROFILE_NAMES), default=DEFAULT_AUDIO_PROFILE,
+              help='Output format (see app/services/audio_profiles.py).')
+@click.option('--backend', type=click.Choice(TTS_BACKEND_NAMES), default=None,
+              help='TTS inference backend (defaults to TTS_BACKEND).')
+@with_appcontext
+def synthesize_command(script_file, output_file, workers, threads, no_cache, profile, backend):
+    """Turn a Host:/Expert: SCRIPT_FILE into an audio file (MP3 by default) at OUTPUT_FILE."""
+    from app.services.audio_generator import generate_audio_from_script, get_tts_model, TTS_MODEL_NAME
+    from app.services.clip_cache import ClipCache
+    from app.services.pipeline import tts_pool_from_config, audio_encoder_from_config
+    from app.services.tts_backends import tts_model_key, tts_backend_options_from_config
+
+    config = dict(current_app.config)
+    if workers is not None:
+        config['TTS_POOL_SIZE'] = workers
+    if threads is not None:
+        config['TTS_THREADS_PER_WORKER'] = threads
+    if backend is not None:
+        config['TTS_BACKEND'] = backend
+
+    cache = None if no_cache else ClipCache(config['TTS_CACHE_DIR'], tts_model_key(TTS_MODEL_NAME, config['TTS_BACKEND']),
+                                            max_bytes=config['TTS_CACHE_MAX_BYTES'])
+    with open(script_file, 'r', encoding='utf-8') as f:
+        script = f.read()
+
+    pool = tts_pool_from_config(config)
+    ok = generate_audio_from_script(script, output_file, batch_size=config['TTS_BATCH_SIZE'],
+                                    cache=cache, pool=pool,
+                                    encoder=audio_encoder_from_config(config, profile),
+                                    model=None if pool else get_tts_model(**tts_backend_options_from_config(config)))
+    if not ok:
+        raise click.ClickException('Audio generation failed.')
+    click.echo(f'Wrote {output_file}')
+
+
+@click.group('tts-cache')
+def tts_cache_group():
+    """Inspect or clear the synthesized clip cache."""
+
+
+def _clip_cache():
+    from app.services.clip_cache import ClipCache
+    # The model name only affects keys, not the on-disk footprint reported here.
+    return ClipCache(current_app.config['TTS_CACHE_DIR'], model_name=None,
+                     max_bytes=current_app.config['TTS_CACHE_MAX_BYTES'])
+
+
+@tts_cache_group.command('stats')
+@with_appcontext
+def tts_cache_stats():
+    """Show how much disk the clip cache is using."""
+    stats = _clip_cache().stats()
+    click.echo(f"{stats['bytes'] / 1024 / 1024:.1f} MiB used of {stats['max_bytes'] / 1024 / 1024:.1f} MiB")
+
+
+@tts_cache_group.command('clear')
+@with_appcontext
+def tts_cache_clear():
+    """Delete every cached clip."""
+    _clip_cache().clear()
+    click.echo('Clip cache cleared.')
+
+
+@click.command('ingest')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--user', 'user_ref', required=True, help='Username or email of the owner of the podcasts.')
+@click.option('--name', default=None, help='Batch name (defaults to the directory name).')
+@click.option('--recursive/--no-recursive', default=True, help='Descend into subdirectories.')
+@click.option('--profile', type=click.Choice(AUDIO_PROFILE_NAMES), default=DEFAULT_AUDIO_PROFILE,
+              help='Output format of the podcasts.')
+@with_appcontext
+def ingest_command(directory, user_ref, name, recursive, profile):
+    """Queue a podcast for every PDF/TXT (and ZIP of them) in DIRECTORY as one batch."""
+    import os
+    from app.models import User
+    from app.services.batches import BatchBuilder, BatchError, iter_directory_documents
+    from app.services.dedup import pipeline_settings_key
+    from app.services.job_queue import enqueue_podcast_job
+
+    user = User.query.filter((User.username == user_ref) | (User.email == user_ref)).first()
+    if user is None:
+        raise click.ClickException(f'No user named {user_ref!r}.')
+
+    config = current_app.config
+    builder = BatchBuilder(
+        user, name or os.path.basename(os.path.abspath(directory)),
+        upload_folder=config['UPLOAD_FOLDER'],
+        generated_folder=config['GENERATED_FOLDER'],
+        pipeline_key=pipeline_settings_key(config['LLM_BACKEND'], profile, config['TTS_BACKEND']),
+        enqueue=lambda podcast, path: enqueue_podcast_job(podcast, path, max_attempts=config['JOB_MAX_ATTEMPTS']),
+        max_files=config['BATCH_MAX_FILES'],
+        max_bytes=config['BATCH_MAX_UNZIPPED_BYTES'],
+        audio_profile=profile,
+    )
+    try:
+        for path in iter_directory_documents(directory, recursive=recursive):
+            builder.add_path(path)
+        batch = builder.finish()
+    except BatchError as e:
+        if not builder.document_count:
+            builder.discard()
+            raise click.ClickException(str(e))
+        click.echo(f'Stopped early: {e}', err=True)
+        batch = builder.batch
+
+    summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(builder.outcomes.items()))
+    click.echo(f'Batch {batch.id} "{batch.name}": {builder.document_count} documents ({summary}).')
+
+
+@click.command('user-weight')
+@click.argument('user_ref')
+@click.argument('weight', type=click.FloatRange(min=0.01), required=False)
+@with_appcontext
+def user_weight_command(user_ref, weight):
+    """Show or set a user's share of the TTS engine (1.0 is the default; 2.0 gets twice as much)."""
+    from app.extensions import db
+    from app.models import User
+
+    user = User.query.filter((User.username == user_ref) | (User.email == user_ref)).first()
+    if user is None:
+        raise click.ClickException(f'No user named {user_ref!r}.')
+    if weight is not None:
+        user.scheduling_weight = weight
+        db.session.commit()
+    click.echo(f'{user.username}: scheduling weight {user.scheduling_weight:g}')
+
+
+@click.command('tts-check')
+@click.option('--backend', type=click.Choice(TTS_BACKEND_NAMES), default=None,
+              help='Backend to check against the default one (defaults to TTS_BACKEND).')
+@click.option('--max-lsd', type=float, default=None,
+              help='Largest acceptable log-spectral distance in dB (defaults to TTS_CHECK_MAX_LSD_DB).')
+@with_appcontext
+def tts_check_command(backend, max_lsd):
+    """Compare a TTS backend's audio with the default backend's on a few test sentences."""
+    from app.services.synthesis import TTS_MODEL_NAME
+    from app.services.tts_backends import (load_tts_model, compare_tts_backends, tts_backend_options_from_config,
+                                           QUALITY_CHECK_SENTENCES)
+
+    config = dict(current_app.config)
+    if backend is not None:
+        config['TTS_BACKEND'] = backend
+    max_lsd = config['TTS_CHECK_MAX_LSD_DB'] if max_lsd is None else max_lsd
+
+    reference = load_tts_model(TTS_MODEL_NAME)
+    candidate = load_tts_model(TTS_MODEL_NAME, **tts_backend_options_from_config(config))
+    report = compare_tts_backends(reference, candidate, QUALITY_CHECK_SENTENCES, max_lsd_db=max_lsd)
+
+    click.echo(f"{'correlation':>11} {'SNR dB':>7} {'LSD dB':>7} {'length':>7}  sentence")
+    for row in report:
+        click.echo(f"{row['correlation']:>11.3f} {row['snr_db']:>7.1f} {row['lsd_db']:>7.2f} "
+                   f"{row['length_ratio']:>7.3f}  {'ok ' if row['acceptable'] else 'BAD'} {row['text'][:50]}")
+    failed = sum(not row['acceptable'] for row in report)
+    if failed:
+        raise click.ClickException(f"{failed} of {len(report)} sentences differ too much from the default "
+                                   f"backend (log-spectral distance above {max_lsd:g} dB or length off by over 5%).")
+    click.echo(f"The {config['TTS_BACKEND']} backend matches the default backend within {max_lsd:g} dB.")
+
+
+@click.command('llm-stub')
+@click.option('--port', type=int, default=None, help='Port to listen on (defaults to the one in LLM_STUB_URL).')
+@click.option('--latency', type=float, default=0.5, help='Seconds before every answer.')
+@click.option('--error-rate', type=click.FloatRange(0, 1), default=0.0, help='Share of requests answered with 503.')
+@click.option('--requests-per-second', type=float, default=0, help='Quota above which requests get 429 (0: none).')
+@with_appcontext
+def llm_stub_command(port, latency, error_rate, requests_per_second):
+    """Serve canned scripts like an LLM API, for LLM_BACKEND=stub."""
+    from urllib.parse import urlsplit
+    from app.services.llm_stub_server import StubLLMServer
+
+    url = urlsplit(current_app.config['LLM_STUB_URL'])
+    server = StubLLMServer(host=url.hostname or '127.0.0.1', port=port or url.port or 8089, latency=latency,
+                           error_fraction=error_rate, requests_per_second=requests_per_second)
+    click.echo(f"LLM stub server listening on {server.url} (Ctrl+C to stop)")
+    server.serve_forever()
+
+
+def register_commands(app):
+    """Attaches the project's custom `flask` CLI commands to the app."""
+    app.cli.add_command(worker_command)
+    app.cli.add_command(synthesize_command)
+    app.cli.add_command(tts_cache_group)
+    app.cli.add_command(ingest_command)
+    app.cli.add_command(user_weight_command)
+    app.cli.add_command(tts_check_command)
+    app.cli.add_command(llm_stub_command)
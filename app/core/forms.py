@@ -1,6 +1,8 @@
 from flask_wtf import FlaskForm
-from flask_wtf.file import FileField, FileRequired, FileAllowed
-from wtforms import SubmitField
+from flask_wtf.file import FileField, FileRequired, FileAllowed, MultipleFileField
+from wtforms import SubmitField, StringField, SelectField, TextAreaField
+from wtforms.validators import Optional, Length, DataRequired
+from app.services.audio_profiles import audio_profile_choices, DEFAULT_AUDIO_PROFILE
 
 class FileUploadForm(FlaskForm):
     # We limit the allowed extensions to prevent malicious uploads
@@ -11,4 +13,23 @@ class FileUploadForm(FlaskForm):
             FileAllowed(['pdf', 'txt'], 'Only PDF and TXT files are allowed!')
         ]
     )
-    submit = SubmitField('Generate Podcast')
\ No newline at end of file
+    audio_profile = SelectField('Audio format', choices=audio_profile_choices(), default=DEFAULT_AUDIO_PROFILE)
+    submit = SubmitField('Generate Podcast')
+
+class BatchUploadForm(FlaskForm):
+    # Several documents at once, or ZIP archives of them (e.g. a zipped folder of reports)
+    name = StringField('Batch name', validators=[Optional(), Length(max=100)])
+    files = MultipleFileField(
+        'PDF, TXT or ZIP files',
+        validators=[
+            FileRequired(),
+            FileAllowed(['pdf', 'txt', 'zip'], 'Only PDF, TXT and ZIP files are allowed!')
+        ]
+    )
+    audio_profile = SelectField('Audio format', choices=audio_profile_choices(), default=DEFAULT_AUDIO_PROFILE)
+    submit = SubmitField('Generate Podcasts')
+
+class ScriptEditForm(FlaskForm):
+    # One "Host:" or "Expert:" line per turn; only the sentences that change are resynthesized
+    script = TextAreaField('Script', validators=[DataRequired()])
+    submit = SubmitField('Save and Regenerate Audio')
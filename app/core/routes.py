@@ -1,15 +1,24 @@
 import os
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, send_from_directory, abort
+import shutil
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, send_from_directory, abort, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from app.core.forms import FileUploadForm
-from app.models import Podcast
+from app.core.forms import FileUploadForm, BatchUploadForm, ScriptEditForm
+from app.models import Podcast, Batch
 from app.extensions import db
 
 # Import our new service functions
-from app.services.text_extractor import extract_text_from_file
-from app.services.script_generator import generate_podcast_script
-from app.services.audio_generator import generate_audio_from_script
+from app.services.job_queue import enqueue_podcast_job, latest_job_for
+from app.services.dedup import pipeline_settings_key, create_podcast_for_upload, detach_followers
+from app.services.hls import PLAYLIST_NAME, SEGMENT_NAME, segments_dir_for
+from app.services.checkpoint import checkpoint_dir_for
+from app.services.audio_profiles import get_audio_profile
+from app.services.history import podcast_history, CursorError
+from app.services.metrics import REGISTRY, record_timings, span
+from app.services.batches import BatchBuilder, BatchError, batch_progress
+from app.services.uploads import store_upload, UploadError
+from app.services.script_ir import PodcastScript, ScriptEditError
+from datetime import datetime
 from flask import send_file
 
 
@@ -17,6 +26,9 @@ core_bp = Blueprint('core_bp', __name__,
                   template_folder='../templates',
                   static_folder='../static')
 
+def _enqueue_job(podcast, source_path):
+    return enqueue_podcast_job(podcast, source_path, max_attempts=current_app.config['JOB_MAX_ATTEMPTS'])
+
 @core_bp.route('/dashboard', methods=['GET', 'POST'])
 @login_required
 def dashboard():
@@ -24,67 +36,243 @@ def dashboard():
     if form.validate_on_submit():
         file = form.file.data
         filename = secure_filename(file.filename)
-        
-        # Ensure upload folder exists
-        upload_path = current_app.config['UPLOAD_FOLDER']
-        os.makedirs(upload_path, exist_ok=True)
-        filepath = os.path.join(upload_path, filename)
-        file.save(filepath)
-
-        # --- Start the AI Pipeline ---
-        
-        # 1. Create a record in the database
-        new_podcast = Podcast(original_filename=filename, author=current_user)
-        db.session.add(new_podcast)
-        db.session.commit()
-        
-        # 2. Extract Text
-        text = extract_text_from_file(filepath)
-        if not text:
-            flash('Could not extract text from the file.', 'danger')
-            new_podcast.status = 'failed'
-            db.session.commit()
-            return redirect(url_for('core_bp.dashboard'))
 
-        # 3. Generate Script (For now, we run this synchronously)
-        # In a true production app, this would be a background task (e.g., using Celery)
-        script = generate_podcast_script(text)
-        if script.startswith("Error:"):
-            flash(f'AI script generation failed: {script}', 'danger')
-            new_podcast.status = 'failed'
-            db.session.commit()
-            return redirect(url_for('core_bp.dashboard'))
+        # Streamed to a path named after its content (hashed and type-checked on the way),
+        # so uploads that share a file name never overwrite each other
+        with record_timings() as timings:
+            with span('upload') as upload_span:
+                try:
+                    upload = store_upload(file.stream, current_app.config['UPLOAD_FOLDER'])
+                except UploadError as e:
+                    flash(f'Upload failed: {e}', 'danger')
+                    return redirect(url_for('core_bp.dashboard'))
+                upload_span.record(bytes=upload.size)
 
-        # 4. Generate Audio
-        generated_folder = current_app.config['GENERATED_FOLDER']
-        os.makedirs(generated_folder, exist_ok=True)
-        audio_filename = f"{os.path.splitext(filename)[0]}_{new_podcast.id}.mp3"
-        audio_filepath = os.path.join(generated_folder, audio_filename)
-        
-        success = generate_audio_from_script(script, audio_filepath)
-
-        # 5. Update Database Record
-        if success:
-            new_podcast.status = 'completed'
-            new_podcast.generated_audio_path = audio_filepath
-            db.session.commit()
-            flash('Your podcast has been successfully generated!', 'success')
+        # --- Hand the AI Pipeline off to the background workers ---
+        # The request only records the work; `flask worker` processes pick it up.
+        # Identical uploads reuse finished audio or join the job already in flight.
+        _, outcome = create_podcast_for_upload(
+            current_user, filename, upload.path,
+            content_sha256=upload.sha256,
+            pipeline_key=pipeline_settings_key(current_app.config['LLM_BACKEND'], form.audio_profile.data,
+                                               current_app.config['TTS_BACKEND']),
+            generated_folder=current_app.config['GENERATED_FOLDER'],
+            enqueue=_enqueue_job,
+            timings=timings.as_dict(),
+            audio_profile=form.audio_profile.data,
+        )
+        REGISTRY.write_snapshot(current_app.config['METRICS_DIR'])
+        if outcome == 'reused':
+            flash('This document was already turned into a podcast, so it is ready right away!', 'success')
         else:
-            new_podcast.status = 'failed'
-            db.session.commit()
-            flash('Audio generation failed.', 'danger')
+            flash('Your file was uploaded! Your podcast is being generated in the background.', 'success')
+
+        return redirect(url_for('core_bp.dashboard'))
+
+    # Fetch podcast history for the current user, one keyset page at a time
+    before, after = request.args.get('before'), request.args.get('after')
+    try:
+        history = podcast_history(current_user.id, before=before, after=after, limit=5)
+    except CursorError:
+        return redirect(url_for('core_bp.dashboard'))
+    if not history.items and (before or after):
+        # Everything on that page was deleted in the meantime
+        return redirect(url_for('core_bp.dashboard'))
 
+    recent_batches = current_user.batches.order_by(Batch.created_at.desc()).limit(5).all()
+    batches = [batch_progress(batch) for batch in recent_batches]
+
+    return render_template('dashboard.html', title='Dashboard', form=form, podcasts=history.items, history=history,
+                           counts=current_user.status_counts(), batch_form=BatchUploadForm(prefix='batch'),
+                           batches=batches)
+
+@core_bp.route('/batches', methods=['POST'])
+@login_required
+def create_batch():
+    """
+    Accepts several documents and/or ZIP archives at once and queues a podcast
+    for every PDF and TXT file they contain, grouped into one batch.
+    """
+    form = BatchUploadForm(prefix='batch')
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            for error in errors:
+                flash(error, 'danger')
         return redirect(url_for('core_bp.dashboard'))
 
-    # Fetch podcast history for the current user
-    
-    page = request.args.get('page', 1, type=int)
-    pagination = Podcast.query.filter_by(user_id=current_user.id)\
-                              .order_by(Podcast.created_at.desc())\
-                              .paginate(page=page, per_page=5, error_out=False)
-    user_podcasts = pagination.items
+    config = current_app.config
+    builder = BatchBuilder(
+        current_user, form.name.data or f"Upload of {datetime.utcnow():%Y-%m-%d %H:%M}",
+        upload_folder=config['UPLOAD_FOLDER'],
+        generated_folder=config['GENERATED_FOLDER'],
+        pipeline_key=pipeline_settings_key(config['LLM_BACKEND'], form.audio_profile.data, config['TTS_BACKEND']),
+        enqueue=_enqueue_job,
+        max_files=config['BATCH_MAX_FILES'],
+        max_bytes=config['BATCH_MAX_UNZIPPED_BYTES'],
+        audio_profile=form.audio_profile.data,
+    )
+    try:
+        for file in form.files.data:
+            builder.add_file(secure_filename(file.filename), file.stream)
+        batch = builder.finish()
+    except BatchError as e:
+        if not builder.document_count:
+            builder.discard()
+            flash(f'Batch upload failed: {e}', 'danger')
+            return redirect(url_for('core_bp.dashboard'))
+        # Documents added before the problem keep processing
+        flash(f'{e} The first {builder.document_count} documents were queued.', 'warning')
+        return redirect(url_for('core_bp.batch_detail', batch_id=builder.batch.id))
+
+    flash(f'{builder.document_count} documents were uploaded! Their podcasts are being generated in the background.', 'success')
+    return redirect(url_for('core_bp.batch_detail', batch_id=batch.id))
+
+def _owned_batch_or_404(batch_id):
+    batch = Batch.query.get_or_404(batch_id)
+    if batch.user_id != current_user.id:
+        abort(403)
+    return batch
+
+@core_bp.route('/batch/<int:batch_id>')
+@login_required
+def batch_detail(batch_id):
+    """Shows the progress of a batch and the podcasts it contains."""
+    batch = _owned_batch_or_404(batch_id)
+    podcasts = batch.podcasts.order_by(Podcast.id).all()
+    return render_template('batch.html', title=batch.name, batch=batch, progress=batch_progress(batch),
+                           podcasts=podcasts)
+
+@core_bp.route('/batch/<int:batch_id>/status')
+@login_required
+def batch_status(batch_id):
+    """Returns the aggregated progress of a batch as JSON so its page can poll it."""
+    batch = _owned_batch_or_404(batch_id)
+    progress = batch_progress(batch)
+    progress['podcasts'] = [{'id': p.id, 'filename': p.original_filename, 'status': p.status}
+                            for p in batch.podcasts.order_by(Podcast.id)]
+    return jsonify(progress)
+
+def _podcast_summary(podcast):
+    return {
+        'id': podcast.id,
+        'filename': podcast.original_filename,
+        'status': podcast.status,
+        'created_at': podcast.created_at.isoformat(),
+        'script_from_cache': podcast.script_from_cache,
+        'batch_id': podcast.batch_id,
+        'audio_profile': podcast.audio_profile,
+        'status_url': url_for('core_bp.podcast_status', podcast_id=podcast.id),
+        'audio_url': url_for('core_bp.podcast_audio', podcast_id=podcast.id)
+                     if podcast.status == 'completed' else None,
+        'download_url': url_for('core_bp.download_podcast', podcast_id=podcast.id)
+                        if podcast.status == 'completed' else None,
+    }
+
+@core_bp.route('/api/podcasts')
+@login_required
+def api_podcasts():
+    """
+    Lists the current user's podcasts as JSON, newest first.
+
+    Query parameters: `limit` (1-100, default 20), `status` to filter by, and
+    `before`/`after` with a cursor from a previous response's `older_cursor`
+    or `newer_cursor` to page through the history.
+    """
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    try:
+        history = podcast_history(current_user.id, before=request.args.get('before'),
+                                  after=request.args.get('after'), limit=limit,
+                                  status=request.args.get('status'))
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'podcasts': [_podcast_summary(podcast) for podcast in history.items],
+        'newer_cursor': history.newer_cursor,
+        'older_cursor': history.older_cursor,
+        'counts': current_user.status_counts(),
+    })
+
+@core_bp.route('/podcast/<int:podcast_id>/status')
+@login_required
+def podcast_status(podcast_id):
+    """
+    Returns the pipeline status of a podcast as JSON so the dashboard can poll it.
+    """
+    podcast = Podcast.query.get_or_404(podcast_id)
+    if podcast.user_id != current_user.id:
+        abort(403)
+
+    job = latest_job_for(podcast)
+    return jsonify({
+        'id': podcast.id,
+        'status': podcast.status,
+        'stage': job.stage if job else None,
+        'attempts': job.attempts if job else 0,
+        'max_attempts': job.max_attempts if job else 0,
+        'error': job.last_error if job else None,
+        'script_from_cache': podcast.script_from_cache,
+        'timings': podcast.timings,
+        'download_url': url_for('core_bp.download_podcast', podcast_id=podcast.id)
+                        if podcast.status == 'completed' else None,
+        'stream_url': url_for('core_bp.stream_playlist', podcast_id=podcast.id)
+                      if _has_stream(podcast) else None,
+    })
+
+def _owned_podcast_or_404(podcast_id):
+    podcast = Podcast.query.get_or_404(podcast_id)
+    if podcast.user_id != current_user.id:
+        abort(403)
+    return podcast
+
+def _has_stream(podcast):
+    segments_dir = segments_dir_for(podcast.id, current_app.config['GENERATED_FOLDER'])
+    return os.path.exists(os.path.join(segments_dir, PLAYLIST_NAME))
+
+@core_bp.route('/podcast/<int:podcast_id>/stream/' + PLAYLIST_NAME)
+@login_required
+def stream_playlist(podcast_id):
+    """
+    Serves the live HLS playlist of a podcast. While the podcast is still being
+    generated the playlist keeps growing, so it must never be cached.
+    """
+    podcast = _owned_podcast_or_404(podcast_id)
+    segments_dir = segments_dir_for(podcast.id, current_app.config['GENERATED_FOLDER'])
+    if not os.path.exists(os.path.join(segments_dir, PLAYLIST_NAME)):
+        abort(404)
+
+    response = send_from_directory(segments_dir, PLAYLIST_NAME, mimetype='application/vnd.apple.mpegurl',
+                                   conditional=False, etag=False)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@core_bp.route('/podcast/<int:podcast_id>/stream/<segment>')
+@login_required
+def stream_segment(podcast_id, segment):
+    """Serves one finished MP3 segment of the live stream. Segments never change once written."""
+    podcast = _owned_podcast_or_404(podcast_id)
+    if not SEGMENT_NAME.match(segment):
+        abort(404)
+
+    segments_dir = segments_dir_for(podcast.id, current_app.config['GENERATED_FOLDER'])
+    response = send_from_directory(segments_dir, segment, mimetype='audio/mpeg', conditional=True, etag=True)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+@core_bp.route('/podcast/<int:podcast_id>/audio')
+@login_required
+def podcast_audio(podcast_id):
+    """
+    Serves the finished audio inline for the dashboard player. Range requests
+    (for seeking) and ETag / If-None-Match revalidation are handled by `send_file`.
+    """
+    podcast = _owned_podcast_or_404(podcast_id)
+    if not podcast.generated_audio_path or not os.path.exists(podcast.generated_audio_path):
+        abort(404)
 
-    return render_template('dashboard.html', title='Dashboard', form=form, podcasts=user_podcasts, pagination=pagination)
+    response = send_file(podcast.generated_audio_path, mimetype=get_audio_profile(podcast.audio_profile).mimetype,
+                         conditional=True, etag=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @core_bp.route('/download/<int:podcast_id>')
 @login_required
@@ -100,7 +288,98 @@ def download_podcast(podcast_id):
         flash("Generated audio not found.", "danger")
         return redirect(url_for('core_bp.dashboard'))
 
-    return send_file(podcast.generated_audio_path, as_attachment=True)
+    return send_file(podcast.generated_audio_path, as_attachment=True, conditional=True, etag=True)
+
+def _editable_script(podcast):
+    """Returns the podcast's `PodcastScript`, or None while it has no finished script to edit."""
+    if podcast.status != 'completed' or not podcast.script:
+        return None
+    return PodcastScript.from_dict(podcast.script)
+
+def _resynthesize(podcast, revised):
+    """
+    Queues the podcast to be synthesized again from an edited script. The job
+    skips extraction and the LLM and only synthesizes the sentences that
+    changed. The podcast keeps its current script and audio until the job
+    succeeds, and gets them back if it fails.
+    """
+    podcast.status = 'processing'
+    job = latest_job_for(podcast)
+    enqueue_podcast_job(podcast, job.source_path if job else '',
+                        max_attempts=current_app.config['JOB_MAX_ATTEMPTS'], script=revised.to_dict())
+
+@core_bp.route('/podcast/<int:podcast_id>/script', methods=['GET', 'POST'])
+@login_required
+def edit_script(podcast_id):
+    """
+    Shows a completed podcast's script for editing. Saving it resynthesizes
+    only the sentences that changed and assembles the episode again.
+    """
+    podcast = _owned_podcast_or_404(podcast_id)
+    script = _editable_script(podcast)
+    if script is None:
+        flash('Only finished podcasts have a script to edit.', 'danger')
+        return redirect(url_for('core_bp.dashboard'))
+
+    form = ScriptEditForm()
+    if form.validate_on_submit():
+        try:
+            revised, diff = script.revise(form.script.data)
+        except ScriptEditError as e:
+            flash(f'The script could not be saved: {e}', 'danger')
+            return render_template('script.html', title='Edit Script', form=form, podcast=podcast, script=script)
+        if not diff:
+            flash('Nothing changed, so the audio was kept as it is.', 'warning')
+            return redirect(url_for('core_bp.dashboard'))
+
+        _resynthesize(podcast, revised)
+        flash(f'Script saved! Regenerating {len(diff.to_synthesize)} of {len(revised)} sentences in the background.',
+              'success')
+        return redirect(url_for('core_bp.dashboard'))
+
+    if not form.is_submitted():
+        form.script.data = script.to_text()
+    return render_template('script.html', title='Edit Script', form=form, podcast=podcast, script=script)
+
+@core_bp.route('/api/podcasts/<int:podcast_id>/script', methods=['GET', 'PUT'])
+@login_required
+def api_podcast_script(podcast_id):
+    """
+    Returns a completed podcast's script as JSON turns and sentences with
+    stable ids, or edits it.
+
+    A PUT takes either `{"script": "Host: ...\nExpert: ..."}` with the whole
+    edited text, or `{"sentences": {"s12": "New text", "s13": null}}` to
+    rewrite (or, with null, delete) single sentences by id. Only the sentences
+    that changed are resynthesized; the response lists them under `diff`.
+    """
+    podcast = _owned_podcast_or_404(podcast_id)
+    script = _editable_script(podcast)
+    if script is None:
+        return jsonify({'error': 'Only finished podcasts have a script to edit.', 'status': podcast.status}), 409
+    if request.method == 'GET':
+        return jsonify({'id': podcast.id, 'script': script.to_dict(), 'text': script.to_text()})
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        if isinstance(payload.get('script'), str):
+            revised, diff = script.revise(payload['script'])
+        elif isinstance(payload.get('sentences'), dict) and all(
+                text is None or isinstance(text, str) for text in payload['sentences'].values()):
+            revised, diff = script.edit_sentences(payload['sentences'])
+        else:
+            return jsonify({'error': 'Expected a JSON body with "script" text or a "sentences" object '
+                                     'mapping sentence ids to text (or null).'}), 400
+    except ScriptEditError as e:
+        return jsonify({'error': str(e)}), 400
+
+    diff_summary = {'unchanged': diff.unchanged, 'changed': diff.changed, 'added': diff.added,
+                    'removed': diff.removed}
+    if not diff:
+        return jsonify({'id': podcast.id, 'status': podcast.status, 'script': script.to_dict(), 'diff': diff_summary})
+    _resynthesize(podcast, revised)
+    return jsonify({'id': podcast.id, 'status': podcast.status, 'script': revised.to_dict(), 'diff': diff_summary,
+                    'status_url': url_for('core_bp.podcast_status', podcast_id=podcast.id)}), 202
 
 @core_bp.route('/podcast/delete/<int:podcast_id>', methods=['POST'])
 @login_required
@@ -122,6 +401,13 @@ def delete_podcast(podcast_id):
             os.remove(podcast.generated_audio_path)
             print(f"Deleted audio file: {podcast.generated_audio_path}")
 
+        # Remove the live-stream segments and any generation checkpoint as well
+        shutil.rmtree(segments_dir_for(podcast.id, current_app.config['GENERATED_FOLDER']), ignore_errors=True)
+        shutil.rmtree(checkpoint_dir_for(podcast.id, current_app.config['GENERATED_FOLDER']), ignore_errors=True)
+
+        # Uploads coalesced onto this one must not be left waiting on a deleted podcast
+        detach_followers(podcast, _enqueue_job)
+
         # Delete the record from the database
         db.session.delete(podcast)
         db.session.commit()
@@ -0,0 +1,95 @@
+# app/database.py
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def database_url_from_config(config):
+    """
+    Returns the configured database URL, accepting the `postgres://` scheme
+    that hosting providers put in DATABASE_URL (SQLAlchemy only knows `postgresql://`).
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options_from_config(config):
+    """
+    Returns the SQLAlchemy engine options for the configured database.
+
+    Every process keeps a pool of connections: the web server's request
+    threads and a worker's job slots share it instead of opening a connection
+    (and, for SQLite, re-running the pragmas) per request. Database servers
+    additionally get connections checked before use and recycled before the
+    server drops them as idle. Options set in SQLALCHEMY_ENGINE_OPTIONS win.
+    """
+    url = make_url(database_url_from_config(config))
+    options = {}
+    if url.get_backend_name() == 'sqlite':
+        if url.database and url.database != ':memory:':
+            options.update(pool_size=config['DATABASE_POOL_SIZE'], max_overflow=config['DATABASE_MAX_OVERFLOW'],
+                           pool_timeout=config['DATABASE_POOL_TIMEOUT'])
+    else:
+        options.update(pool_size=config['DATABASE_POOL_SIZE'], max_overflow=config['DATABASE_MAX_OVERFLOW'],
+                       pool_timeout=config['DATABASE_POOL_TIMEOUT'], pool_recycle=config['DATABASE_POOL_RECYCLE'],
+                       pool_pre_ping=True)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def sqlite_pragmas_from_config(config):
+    """Returns the (pragma, value) pairs run on every new SQLite connection, in order."""
+    return [
+        # Wait for the write lock instead of failing with "database is locked" right away
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'] * 1000)),
+        # Readers never block the writer and the writer never blocks readers
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        # In WAL mode NORMAL only syncs at checkpoints; a power cut can lose the last
+        # commits but never corrupts the database
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('cache_size', -int(config['SQLITE_CACHE_SIZE_KB'])),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def configure_sqlite_engine(engine, pragmas):
+    """Applies `pragmas` to every connection the engine opens."""
+    journal_mode = dict(pragmas).get('journal_mode', '').lower()
+    warned = []
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+                if name == 'journal_mode':
+                    mode = str(cursor.fetchone()[0]).lower()
+                    if journal_mode and mode not in (journal_mode, 'memory') and not warned:
+                        # e.g. a database file on a network share
+                        print(f"--- SQLite stayed in '{mode}' journal mode instead of '{journal_mode}' ---")
+                        warned.append(mode)
+        finally:
+            cursor.close()
+
+
+def init_database(app, db):
+    """
+    Sets up the app's database for concurrent access and initializes Flask-SQLAlchemy.
+
+    SQLite is the default, shared by the web process and every worker process
+    (and every job slot inside them). Each connection is switched to WAL mode
+    with a busy timeout, so readers and the single writer don't block each
+    other and a writer waits its turn instead of raising "database is locked".
+    Setting DATABASE_URL switches to a database server (e.g. PostgreSQL), in
+    which case only the pooling options apply.
+    """
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url_from_config(app.config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_config(app.config)
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            configure_sqlite_engine(db.engine, sqlite_pragmas_from_config(app.config))
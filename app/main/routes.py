@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, current_app, abort, Response
 from app.extensions import db, bcrypt
 # Create a Blueprint for our main pages
 main_bp = Blueprint(
@@ -15,4 +15,20 @@ def index():
 @main_bp.route('/about')
 def about():
     """Serves the about page."""
-    return render_template('about.html', title='About Us')
\ No newline at end of file
+    return render_template('about.html', title='About Us')
+
+@main_bp.route('/metrics')
+def metrics():
+    """Serves pipeline metrics from every web and worker process in the Prometheus text format."""
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+
+    from app.models import Job
+    from app.services.metrics import read_snapshots, render_prometheus
+
+    job_counts = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+    gauges = {
+        'docucast_jobs': ('Pipeline jobs by status.', [({'status': status}, count) for status, count in job_counts]),
+    }
+    body = render_prometheus(read_snapshots(current_app.config['METRICS_DIR']), gauges)
+    return Response(body, mimetype='text/plain; version=0.0.4')
@@ -1,6 +1,7 @@
 # app/models.py
 
 from flask_login import UserMixin
+from sqlalchemy import event, inspect
 from app.extensions import db, login_manager
 from datetime import datetime
 
@@ -17,8 +18,21 @@ class User(db.Model, UserMixin):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
+    # Relative share of the TTS engine this user's podcasts get when several are being synthesized
+    scheduling_weight = db.Column(db.Float, nullable=False, default=1.0, server_default='1.0')
+    # Number of podcasts per status, kept up to date by the Podcast events at the bottom of this module
+    # so the dashboard never has to COUNT(*) a user's whole history
+    podcasts_processing = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    podcasts_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    podcasts_failed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     podcasts = db.relationship('Podcast', backref='author', lazy=True)
 
+    def status_counts(self):
+        """Returns the user's podcast counts by status, plus the total."""
+        counts = {status: getattr(self, column) or 0 for status, column in PODCAST_STATUS_COUNTERS.items()}
+        counts['total'] = sum(counts.values())
+        return counts
+
     def __repr__(self):
         return f'<User {self.username}>'
 # --- NEW: Podcast Model ---
@@ -28,11 +42,138 @@ class Podcast(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     original_filename = db.Column(db.String(100), nullable=False)
     # Status can be: 'processing', 'completed', 'failed'
-    status = db.Column(db.String(20), nullable=False, default='processing')
+    # (active_history loads the old value before a change, so the per-user counts can move it)
+    status = db.column_property(db.Column(db.String(20), nullable=False, default='processing'), active_history=True)
     generated_audio_path = db.Column(db.String(200), nullable=True)
+    # True when the script was reused from the script cache instead of calling the LLM
+    script_from_cache = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # SHA-256 of the uploaded file and of the settings it was processed with, used to
+    # reuse finished audio for identical uploads
+    content_sha256 = db.Column(db.String(64), nullable=True)
+    pipeline_key = db.Column(db.String(64), nullable=True)
+    # Set when this upload was coalesced onto an identical podcast that was already in flight
+    source_podcast_id = db.Column(db.Integer, db.ForeignKey('podcasts.id'), nullable=True)
+    # Output format of the finished audio (see app/services/audio_profiles.py)
+    audio_profile = db.Column(db.String(20), nullable=False, default='mp3', server_default='mp3')
+    # Per-stage timing breakdown, e.g. {"extract": {"seconds": 1.2, "pages": 30, ...}, ...}
+    timings = db.Column(db.JSON, nullable=True)
+    # The script as turns and sentences with stable ids (app/services/script_ir.py), saved
+    # when the podcast is completed and replaced when the user edits it
+    script = db.Column(db.JSON, nullable=True)
+    # Set when the document was uploaded as part of a batch
+    batch_id = db.Column(db.Integer, db.ForeignKey('batches.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     # Foreign Key to link to a User
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    jobs = db.relationship('Job', backref='podcast', lazy=True, cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_podcasts_content_sha256_pipeline_key', 'content_sha256', 'pipeline_key'),
+        # Serves the dashboard's newest-first history (keyset pagination) for one user
+        db.Index('ix_podcasts_user_id_created_at', 'user_id', 'created_at'),
+        # Ids are never handed out again after a delete: files on disk (checkpoints,
+        # stream segments) are named after them
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<Podcast {self.id} - {self.original_filename}>'
+
+# --- NEW: Job Model (SQLite-backed work queue for the podcast pipeline) ---
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    podcast_id = db.Column(db.Integer, db.ForeignKey('podcasts.id'), nullable=False)
+    # Owner of the podcast, copied here so the scheduler can share workers fairly between users
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    # Path of the uploaded source document the pipeline should process
+    source_path = db.Column(db.String(300), nullable=False)
+    # For a script edit: the revised script (app/services/script_ir.py) to synthesize. It only
+    # replaces the podcast's script once the job succeeds, so a failed edit changes nothing
+    script = db.Column(db.JSON, nullable=True)
+    # Status can be: 'queued', 'running', 'succeeded', 'failed'
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    # Pipeline stage currently being executed, for progress reporting
+    stage = db.Column(db.String(30), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    # A job is only visible to workers once available_at has passed (used for retry backoff)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Lease held by the worker currently running the job; expires if the worker crashes
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_jobs_user_id_status', 'user_id', 'status'),
+        # Checkpoints record the job that wrote them, so its id must never be reused
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} - podcast {self.podcast_id} ({self.status})>'
+
+# --- NEW: Batch Model (a group of documents uploaded together) ---
+class Batch(db.Model):
+    __tablename__ = 'batches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    owner = db.relationship('User', backref=db.backref('batches', lazy='dynamic'))
+    podcasts = db.relationship('Podcast', backref='batch', lazy='dynamic')
 
     def __repr__(self):
-        return f'<Podcast {self.id} - {self.original_filename}>'
\ No newline at end of file
+        return f'<Batch {self.id} - {self.name}>'
+
+# --- NEW: ScriptCacheEntry Model (generated scripts keyed by document content) ---
+class ScriptCacheEntry(db.Model):
+    __tablename__ = 'script_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # SHA-256 of the prompt template version, model name and extracted text
+    cache_key = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    script = db.Column(db.Text, nullable=False)
+    model_name = db.Column(db.String(50), nullable=False)
+    prompt_version = db.Column(db.String(20), nullable=False)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<ScriptCacheEntry {self.cache_key[:12]} ({self.model_name})>'
+
+# --- NEW: Incrementally maintained per-user podcast counts ---
+PODCAST_STATUS_COUNTERS = {
+    'processing': 'podcasts_processing',
+    'completed': 'podcasts_completed',
+    'failed': 'podcasts_failed',
+}
+
+def _adjust_status_count(connection, user_id, status, delta):
+    column = PODCAST_STATUS_COUNTERS.get(status)
+    if column is None or user_id is None:
+        return
+    users = User.__table__
+    # A relative UPDATE inside the flush's transaction, so concurrent workers never lose an increment
+    connection.execute(users.update().where(users.c.id == user_id).values({column: users.c[column] + delta}))
+
+@event.listens_for(Podcast, 'after_insert')
+def _count_new_podcast(mapper, connection, podcast):
+    _adjust_status_count(connection, podcast.user_id, podcast.status, 1)
+
+@event.listens_for(Podcast, 'after_update')
+def _count_status_change(mapper, connection, podcast):
+    history = inspect(podcast).attrs.status.history
+    if not history.deleted or not history.added or history.deleted[0] == history.added[0]:
+        return
+    _adjust_status_count(connection, podcast.user_id, history.deleted[0], -1)
+    _adjust_status_count(connection, podcast.user_id, history.added[0], 1)
+
+@event.listens_for(Podcast, 'after_delete')
+def _count_deleted_podcast(mapper, connection, podcast):
+    _adjust_status_count(connection, podcast.user_id, podcast.status, -1)
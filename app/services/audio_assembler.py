@@ -0,0 +1,74 @@
+import numpy as np
+
+# KittenTTS produces mono float audio at 24 kHz
+SAMPLE_RATE = 24000
+
+
+def float_to_pcm16(audio):
+    """Converts a float waveform in [-1, 1] to 16-bit PCM samples."""
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    return np.rint(np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class PcmAssembler:
+    """
+    Collects synthesized clips as 16-bit PCM chunks in memory and joins them once.
+
+    Appending a clip only stores a reference to its samples (plus a shared zero
+    buffer for the pause after it), so building an episode is linear in its
+    length instead of re-copying the whole podcast on every `+=`. An optional
+    `listener` is called with every PCM chunk as it is appended, which is how
+    live-stream segments are produced while the episode is still being built.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, lead_in_ms=500, gap_ms=400, listener=None):
+        self.sample_rate = sample_rate
+        self.listener = listener
+        self._chunks = []
+        self._num_samples = 0
+        self._gap = self.silence(gap_ms)
+        self._append(self.silence(lead_in_ms))
+
+    def silence(self, duration_ms):
+        """Returns a zero PCM buffer lasting `duration_ms` milliseconds."""
+        return np.zeros(int(self.sample_rate * duration_ms / 1000), dtype=np.int16)
+
+    def _append(self, pcm):
+        if len(pcm):
+            self._chunks.append(pcm)
+            self._num_samples += len(pcm)
+            if self.listener is not None:
+                self.listener(pcm)
+
+    def append_clip(self, audio):
+        """Adds a float clip from the TTS model followed by the inter-sentence pause."""
+        self._append(float_to_pcm16(audio))
+        self._append(self._gap)
+
+    @property
+    def duration_seconds(self):
+        return self._num_samples / self.sample_rate
+
+    def to_pcm(self):
+        """Returns the whole episode as one preallocated int16 array."""
+        pcm = np.empty(self._num_samples, dtype=np.int16)
+        offset = 0
+        for chunk in self._chunks:
+            pcm[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+        return pcm
+
+    def to_segment(self):
+        """Wraps the assembled PCM in a pydub AudioSegment without touching the disk."""
+        # Imported here so the clip cache can use this module's helpers without loading pydub
+        from pydub import AudioSegment
+        return AudioSegment(data=self.to_pcm().tobytes(), sample_width=2,
+                            frame_rate=self.sample_rate, channels=1)
+
+    def export(self, output_path, encoder=None):
+        """
+        Encodes the assembled episode with an `AudioEncoder` (by default MP3 in
+        a single ffmpeg pass). Returns how many pieces were encoded in parallel.
+        """
+        from app.services.encoder import AudioEncoder
+        return (encoder or AudioEncoder()).encode(self.to_pcm(), output_path, sample_rate=self.sample_rate)
@@ -16,7 +16,7 @@
 #         try:
 #             # Initialize the model as per the official documentation
 #             # This will automatically download the small model file on first run.
-#             tts_model = KittenTTS("KittenML/kitten-tts-nano-0.2")
+#             tts_model = KittenTTS(TTS_MODEL_NAME)
 #             print("--- KittenTTS MODEL LOADED SUCCESSFULLY ---")
 #         except Exception as e:
 #             print(f"!!! FAILED TO LOAD KittenTTS MODEL: {e} !!!")
@@ -108,117 +108,187 @@
 
 
 import os
-import torch
-from pydub import AudioSegment
-import soundfile as sf
-from kittentts import KittenTTS
-import nltk # --- NEW: Import the Natural Language Toolkit
-
-# Download the sentence tokenizer data if it doesn't exist
-try:
-    nltk.data.find('tokenizers/punkt')
-except nltk.downloader.DownloadError:
-    print("--- First time setup: Downloading NLTK sentence tokenizer data ('punkt') ---")
-    nltk.download('punkt')
+import time
+from app.services.synthesis import synthesize_sentences, TTS_MODEL_NAME, HOST_VOICE, EXPERT_VOICE
+from app.services.audio_assembler import PcmAssembler, SAMPLE_RATE
+from app.services.metrics import span, record_stage
+from app.services.segmentation import segment_script, DEFAULT_MIN_CHARS, DEFAULT_MAX_CHARS
+from app.services.tts_backends import load_tts_model
+from app.services.script_ir import PodcastScript
+
+# KittenTTS is imported on first use, not here: importing this module must
+# stay cheap for CLI commands and anything else that only needs its helpers.
+VOICES = {'host': HOST_VOICE, 'expert': EXPERT_VOICE}
 
 # --- Model Loading (Singleton Pattern) ---
 tts_model = None
 
-def get_tts_model():
-    """Initializes and returns the KittenTTS model, loading it if not already in memory."""
+def get_tts_model(**backend_options):
+    """
+    Initializes and returns the KittenTTS model, loading it if not already in memory.
+
+    `backend_options` (see `load_tts_model` in app/services/tts_backends.py)
+    pick the inference backend, threads and memory arena; they only apply to
+    the call that loads the model.
+    """
     global tts_model
     if tts_model is None:
         print("--- LOADING KittenTTS MODEL INTO MEMORY (this will be quick) ---")
         try:
-            tts_model = KittenTTS("KittenML/kitten-tts-nano-0.2")
-            print("--- KittenTTS MODEL LOADED SUCCESSFULLY ---")
+            tts_model = load_tts_model(TTS_MODEL_NAME, **backend_options)
+            print(f"--- KittenTTS MODEL LOADED SUCCESSFULLY "
+                  f"({backend_options.get('backend_name', 'default')} backend) ---")
         except Exception as e:
             print(f"!!! FAILED TO LOAD KittenTTS MODEL: {e} !!!")
             raise e
     return tts_model
 
-def generate_audio_from_script(script_text, output_path):
+def split_script_into_sentences(script_text, min_chars=DEFAULT_MIN_CHARS, max_chars=DEFAULT_MAX_CHARS):
+    """
+    Parses a "Host:"/"Expert:" script into a flat list of (voice, sentence)
+    pairs in script order, ready to be sent to the TTS model. Very short
+    sentences are merged and overlong ones split (see app/services/segmentation.py).
+    """
+    with span('split', chars=len(script_text)) as s:
+        sentences = segment_script(script_text, VOICES, min_chars=min_chars, max_chars=max_chars)
+        s.record(sentences=len(sentences))
+    return sentences
+
+WARM_UP_SENTENCES = [(HOST_VOICE, "Welcome to the show."), (EXPERT_VOICE, "Thanks for having me.")]
+
+def preload_tts(warm_up=True, backend_options=None):
+    """
+    Loads everything synthesis needs before the first job arrives: the
+    KittenTTS model (on the backend `backend_options` pick) and, if `warm_up`
+    is set, one throwaway synthesis per voice so the first real sentence
+    doesn't pay for ONNX session initialization.
+
+    Returns:
+        dict: Seconds spent loading ('load_seconds') and warming up ('warm_up_seconds').
+    """
+    start = time.perf_counter()
+    model = get_tts_model(**(backend_options or {}))
+    loaded = time.perf_counter()
+    record_stage('model_load', loaded - start)
+
+    warm_up_seconds = 0.0
+    if warm_up:
+        synthesize_sentences(model, WARM_UP_SENTENCES)
+        warm_up_seconds = time.perf_counter() - loaded
+        record_stage('model_warm_up', warm_up_seconds, sentences=len(WARM_UP_SENTENCES))
+
+    print(f"--- TTS ready: model loaded in {loaded - start:.2f}s, warm-up took {warm_up_seconds:.2f}s ---")
+    return {'load_seconds': round(loaded - start, 4), 'warm_up_seconds': round(warm_up_seconds, 4)}
+
+def clips_duration(audio_clips):
+    """Returns the total length in seconds of a list of synthesized clips."""
+    return sum(len(clip) for clip in audio_clips) / SAMPLE_RATE
+
+def synthesize_timed(synthesize, sentences):
+    """Runs `synthesize(sentences)` as a 'synthesis' span, recording sentences and audio seconds."""
+    with span('synthesis', per='sentences', sentences=len(sentences)) as s:
+        audio_clips = synthesize(sentences)
+        s.record(audio_seconds=clips_duration(audio_clips))
+    return audio_clips
+
+def create_podcast_assembler(segment_writer=None):
+    """Returns an assembler with the standard lead-in and pauses, optionally feeding live segments."""
+    listener = segment_writer.append_pcm if segment_writer is not None else None
+    return PcmAssembler(sample_rate=24000, lead_in_ms=500, gap_ms=400, listener=listener)
+
+def export_podcast(assembler, output_path, segment_writer=None, encoder=None):
+    """Closes the live stream (if any) and encodes the assembled episode (MP3 unless `encoder` says otherwise)."""
+    if segment_writer is not None:
+        segment_writer.finish()
+    profile = encoder.profile.name if encoder is not None else 'mp3'
+    print(f"--- Exporting final {profile} audio to {output_path} ({assembler.duration_seconds:.1f}s of audio) ---")
+    with span('export', audio_seconds=assembler.duration_seconds) as s:
+        pieces = assembler.export(output_path, encoder=encoder)
+        s.record(pieces=pieces, bytes=os.path.getsize(output_path) if os.path.exists(output_path) else 0)
+    return output_path
+
+class InOrderClipFeed:
+    """
+    Stitches clips onto an assembler in script order while they arrive in any
+    order: a clip waits until every sentence before it has been appended, so
+    live segments are written as soon as the start of the episode is ready
+    instead of after the whole synthesis stage. Used as the `on_clip` callback
+    of the synthesis functions.
+    """
+
+    def __init__(self, assembler):
+        self.assembler = assembler
+        self.appended = 0
+        self.seconds = 0.0
+        self._waiting = {}
+
+    def __call__(self, index, audio):
+        if index < self.appended:
+            return
+        self._waiting[index] = audio
+        start = time.perf_counter()
+        while self.appended in self._waiting:
+            # Clips stay in memory as PCM; pauses are zero buffers, nothing touches the disk.
+            self.assembler.append_clip(self._waiting.pop(self.appended))
+            self.appended += 1
+        self.seconds += time.perf_counter() - start
+
+def generate_audio_from_script(script_text, output_path, batch_size=16, cache=None, pool=None,
+                               segment_writer=None, synthesis_flow=None, checkpoint=None, encoder=None, model=None):
     """
     Converts a formatted script into a multi-speaker MP3 audio file using
     the lightweight KittenTTS model with sentence splitting for robustness.
+    `script_text` may also be a `PodcastScript`, whose sentences are
+    synthesized as they are instead of splitting the text again.
+    Sentences are synthesized in voice-grouped batches of `batch_size`; if a
+    `ClipCache` is given, previously synthesized sentences are reused. If a
+    `TtsProcessPool` is given, synthesis is spread across its processes
+    instead of running on the in-process model. If a `SynthesisFlow` is given,
+    sentences are queued on the worker's shared synthesis scheduler instead.
+    If an `HlsSegmentWriter` is given, the episode is also written out as
+    live-stream segments, from the first sentences on while the rest are
+    still being synthesized. If a `PodcastCheckpoint` is given, it records the
+    sentences, serves those synthesized by an earlier attempt and stores new
+    ones as they finish (in front of `cache`). If an `AudioEncoder` is given,
+    the episode is encoded with its profile (and in parallel chunks) instead
+    of as a single-pass MP3. `model` replaces the process-wide model when
+    synthesizing in-process.
     """
     print(f"--- INITIATING KittenTTS AUDIO GENERATION for {os.path.basename(output_path)} ---")
     
     try:
-        model = get_tts_model()
-        
-        HOST_VOICE = "expr-voice-2-f"
-        EXPERT_VOICE = "expr-voice-2-m"
-
-        temp_dir = "temp_audio_clips"
-        os.makedirs(temp_dir, exist_ok=True)
-
-        lines = script_text.strip().split('\n')
-        generated_clips = []
-        clip_counter = 0
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            voice = None
-            text_to_process = ""
-
-            if line.lower().startswith("host:"):
-                voice = HOST_VOICE
-                text_to_process = line[5:].strip()
-            elif line.lower().startswith("expert:"):
-                voice = EXPERT_VOICE
-                text_to_process = line[7:].strip()
-            else:
-                continue
-
-            if not text_to_process:
-                continue
-            
-            # --- NEW: Split the paragraph into individual sentences ---
-            sentences = nltk.sent_tokenize(text_to_process)
-            
-            # --- NEW: Loop through each sentence and generate a clip ---
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-
-                clip_path = os.path.join(temp_dir, f"clip_{clip_counter}.wav")
-                print(f"Generating clip {clip_counter} for voice '{voice}'...")
-                
-                audio_data = model.generate(sentence, voice=voice)
-                sf.write(clip_path, audio_data, 24000)
-                
-                generated_clips.append(clip_path)
-                clip_counter += 1
-
-        print("--- Stitching audio clips together... ---")
-        final_podcast = AudioSegment.silent(duration=500)
-
-        for clip_path in generated_clips:
-            segment = AudioSegment.from_wav(clip_path)
-            final_podcast += segment
-            # Use a slightly shorter pause after each sentence
-            final_podcast += AudioSegment.silent(duration=400) 
-        
-        print(f"--- Exporting final MP3 to {output_path} ---")
-        final_podcast.export(output_path, format="mp3")
+        if isinstance(script_text, PodcastScript):
+            sentences = script_text.voiced_sentences(VOICES)
+        else:
+            sentences = split_script_into_sentences(script_text)
+        if checkpoint is not None:
+            checkpoint.record_sentences(sentences)
+            cache = checkpoint
+        # Clips are stitched (and streamed) as they finish rather than after the whole stage.
+        assembler = create_podcast_assembler(segment_writer)
+        feed = InOrderClipFeed(assembler)
+        if synthesis_flow is not None:
+            audio_clips = synthesize_timed(
+                lambda batch: synthesis_flow.synthesize(batch, cache=cache, on_clip=feed), sentences)
+        elif pool is not None:
+            audio_clips = synthesize_timed(lambda batch: pool.synthesize(batch, cache=cache, on_clip=feed), sentences)
+        else:
+            model = model or get_tts_model()
+            print(f"--- Synthesizing {len(sentences)} sentences in batches of {batch_size} ---")
+            audio_clips = synthesize_timed(
+                lambda batch: synthesize_sentences(model, batch, batch_size=batch_size, cache=cache, on_clip=feed),
+                sentences)
+        if cache is not None:
+            print(f"--- Clip cache stats: {cache.stats()} ---")
+        if feed.appended != len(audio_clips):
+            raise RuntimeError(f"Only {feed.appended} of {len(audio_clips)} clips were stitched")
+        record_stage('stitch', feed.seconds, audio_seconds=clips_duration(audio_clips))
+
+        export_podcast(assembler, output_path, segment_writer, encoder)
 
-        print("--- Cleaning up temporary files... ---")
-        for clip_path in generated_clips:
-            os.remove(clip_path)
-        os.rmdir(temp_dir)
-        
         print(f"--- AUDIO GENERATION SUCCESSFUL for {os.path.basename(output_path)} ---")
         return True
 
     except Exception as e:
         print(f"!!! AUDIO GENERATION FAILED: {e} !!!")
-        if 'temp_dir' in locals() and os.path.exists(temp_dir):
-            for f in os.listdir(temp_dir):
-                os.remove(os.path.join(temp_dir, f))
-            os.rmdir(temp_dir)
-        return False
\ No newline at end of file
+        return False
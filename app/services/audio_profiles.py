@@ -0,0 +1,46 @@
+class AudioProfile:
+    """
+    An output format a podcast can be encoded to.
+
+    Args:
+        name (str): Key stored on `Podcast.audio_profile`.
+        label (str): Shown in the upload form.
+        extension (str): File extension of the finished audio.
+        mimetype (str): Content type it is served with.
+        container (str): ffmpeg muxer of the output ('mp3' or 'ogg').
+        codec_args (list): ffmpeg encoder options.
+        frame_samples (int): Samples per coded frame at 24 kHz; chunked encoding
+            splits the episode on multiples of it.
+    """
+
+    def __init__(self, name, label, extension, mimetype, container, codec_args, frame_samples):
+        self.name = name
+        self.label = label
+        self.extension = extension
+        self.mimetype = mimetype
+        self.container = container
+        self.codec_args = codec_args
+        self.frame_samples = frame_samples
+
+
+# KittenTTS produces mono 24 kHz audio, so every profile keeps that rate: MP3 at
+# 24 kHz is MPEG-2 Layer III (576 samples per frame), Opus uses 20 ms packets.
+AUDIO_PROFILES = {
+    'mp3': AudioProfile('mp3', 'MP3, 128 kbps (plays everywhere)', 'mp3', 'audio/mpeg', 'mp3',
+                        ['-c:a', 'libmp3lame', '-b:a', '128k'], 576),
+    'mp3-speech': AudioProfile('mp3-speech', 'MP3, mono 24 kHz at 48 kbps (smaller)', 'mp3', 'audio/mpeg', 'mp3',
+                               ['-c:a', 'libmp3lame', '-b:a', '48k'], 576),
+    'opus': AudioProfile('opus', 'Opus, 32 kbps speech (smallest)', 'ogg', 'audio/ogg', 'ogg',
+                         ['-c:a', 'libopus', '-b:a', '32k', '-application', 'voip', '-frame_duration', '20'], 480),
+}
+DEFAULT_AUDIO_PROFILE = 'mp3'
+
+
+def get_audio_profile(name):
+    """Returns the named profile, or the default one for unknown or missing names."""
+    return AUDIO_PROFILES.get(name or DEFAULT_AUDIO_PROFILE, AUDIO_PROFILES[DEFAULT_AUDIO_PROFILE])
+
+
+def audio_profile_choices():
+    """Returns (name, label) pairs for a select field."""
+    return [(profile.name, profile.label) for profile in AUDIO_PROFILES.values()]
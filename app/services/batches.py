@@ -0,0 +1,176 @@
+import os
+import zipfile
+from collections import Counter
+from sqlalchemy import func
+from werkzeug.utils import secure_filename
+from app.extensions import db
+from app.models import Batch, Podcast
+from app.services.dedup import create_podcast_for_upload
+from app.services.audio_profiles import DEFAULT_AUDIO_PROFILE
+from app.services.uploads import store_upload, UploadError, UploadTooLargeError
+
+DOCUMENT_EXTENSIONS = {'.pdf', '.txt'}
+
+
+class BatchError(Exception):
+    """Raised when uploaded files can't be turned into a batch (bad ZIP, limits exceeded, no documents)."""
+
+
+def is_document(filename):
+    return os.path.splitext(filename)[1].lower() in DOCUMENT_EXTENSIONS
+
+
+def is_zip(filename):
+    return filename.lower().endswith('.zip')
+
+
+def iter_zip_documents(fileobj):
+    """
+    Yields (filename, file object) for every PDF/TXT inside a ZIP archive.
+
+    Folders, hidden files and macOS resource forks are skipped; paths inside the
+    archive are ignored, only the file name is kept.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise BatchError(f"Not a valid ZIP archive: {e}") from e
+
+    with archive:
+        for member in archive.infolist():
+            name = os.path.basename(member.filename)
+            if member.is_dir() or not name or name.startswith('.') or '__MACOSX' in member.filename:
+                continue
+            if not is_document(name):
+                continue
+            with archive.open(member) as f:
+                yield name, f
+
+
+class BatchBuilder:
+    """
+    Collects the documents of one batch upload and fans them out into podcasts.
+
+    Every document is streamed to its content-addressed path (see
+    app/services/uploads.py, so identically named files from different folders
+    never overwrite each other) and handed to `create_podcast_for_upload`,
+    which reuses finished audio, coalesces onto work in flight or queues a job
+    through `enqueue`. Files that turn out not to be PDF or text are skipped.
+    Limits on the number of documents and total bytes protect against
+    oversized or malicious ZIPs.
+    """
+
+    def __init__(self, user, name, upload_folder, generated_folder, pipeline_key, enqueue,
+                 max_files=200, max_bytes=512 * 1024 * 1024, audio_profile=DEFAULT_AUDIO_PROFILE):
+        self.user = user
+        self.upload_folder = upload_folder
+        self.audio_profile = audio_profile
+        self.generated_folder = generated_folder
+        self.pipeline_key = pipeline_key
+        self.enqueue = enqueue
+        self.max_files = max_files
+        self.remaining_bytes = max_bytes
+        self.outcomes = Counter()
+        self.skipped = []
+
+        self.batch = Batch(name=name[:100], owner=user)
+        db.session.add(self.batch)
+        db.session.commit()
+
+    @property
+    def document_count(self):
+        return sum(self.outcomes.values())
+
+    def add_document(self, filename, stream):
+        """Saves one PDF/TXT document and creates its podcast."""
+        filename = secure_filename(os.path.basename(filename))
+        if not filename or not is_document(filename):
+            self.skipped.append(filename)
+            return None
+        if self.document_count >= self.max_files:
+            raise BatchError(f"A batch may contain at most {self.max_files} documents.")
+
+        try:
+            upload = store_upload(stream, self.upload_folder, max_bytes=self.remaining_bytes)
+        except UploadTooLargeError as e:
+            raise BatchError("The batch is larger than the allowed total size.") from e
+        except UploadError as e:
+            print(f"--- Skipping {filename}: {e} ---")
+            self.skipped.append(filename)
+            return None
+        self.remaining_bytes -= upload.size
+
+        podcast, outcome = create_podcast_for_upload(
+            self.user, filename, upload.path,
+            content_sha256=upload.sha256,
+            pipeline_key=self.pipeline_key,
+            generated_folder=self.generated_folder,
+            enqueue=self.enqueue,
+            batch=self.batch,
+            audio_profile=self.audio_profile,
+        )
+        self.outcomes[outcome] += 1
+        return podcast
+
+    def add_file(self, filename, stream):
+        """Adds a document, or every document inside a ZIP archive."""
+        if is_zip(filename):
+            for name, member in iter_zip_documents(stream):
+                self.add_document(name, member)
+        else:
+            self.add_document(filename, stream)
+
+    def add_path(self, path):
+        with open(path, 'rb') as f:
+            self.add_file(os.path.basename(path), f)
+
+    def discard(self):
+        """Removes the batch; only valid while it holds no documents."""
+        db.session.delete(self.batch)
+        db.session.commit()
+
+    def finish(self):
+        """Returns the batch, or removes it and raises BatchError if it ended up empty."""
+        if not self.document_count:
+            self.discard()
+            raise BatchError("No PDF or TXT documents were found in the upload.")
+        print(f"--- Batch {self.batch.id}: {self.document_count} documents ({dict(self.outcomes)}) ---")
+        return self.batch
+
+
+def iter_directory_documents(directory, recursive=True):
+    """Yields the paths of every PDF, TXT and ZIP file in a directory, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        if not recursive:
+            dirs.clear()
+        dirs.sort()
+        for name in sorted(files):
+            if not name.startswith('.') and (is_document(name) or is_zip(name)):
+                yield os.path.join(root, name)
+
+
+def batch_progress(batch):
+    """
+    Aggregates the status of every podcast in a batch.
+
+    Returns:
+        dict: Counts per status, the percentage finished and whether the batch is done.
+    """
+    counts = dict(db.session.query(Podcast.status, func.count(Podcast.id))
+                            .filter(Podcast.batch_id == batch.id)
+                            .group_by(Podcast.status)
+                            .all())
+    total = sum(counts.values())
+    completed = counts.get('completed', 0)
+    failed = counts.get('failed', 0)
+    processing = total - completed - failed
+    return {
+        'id': batch.id,
+        'name': batch.name,
+        'total': total,
+        'completed': completed,
+        'failed': failed,
+        'processing': processing,
+        'percent': round(100 * (completed + failed) / total) if total else 100,
+        'done': processing == 0,
+    }
@@ -0,0 +1,220 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+import numpy as np
+from app.services.clip_cache import normalize_sentence, decode_clip, save_clip
+
+MANIFEST_NAME = 'manifest.json'
+CHECKPOINT_VERSION = 2
+
+
+def checkpoint_dir_for(podcast_id, generated_folder):
+    """Returns the directory holding a podcast's generation checkpoint."""
+    return os.path.join(generated_folder, 'checkpoints', str(podcast_id))
+
+
+class PodcastCheckpoint:
+    """
+    Durable progress of one podcast's generation, so a retried job resumes
+    where the previous attempt stopped instead of starting over.
+
+    The directory holds `manifest.json` (the script, whether it was complete,
+    and the (voice, sentence) pairs it was split into) and one 16-bit PCM
+    chunk per synthesized sentence under `chunks/`. The checkpoint is used as
+    the synthesis cache (`get`/`put`), layered over the shared `ClipCache`:
+    sentences already in the checkpoint are never synthesized again, and every
+    new sentence is written the moment its batch finishes, so a crash or OOM
+    halfway through only loses the batch that was running.
+
+    The manifest records the job that wrote it and the SHA-256 of the source
+    document. A checkpoint made with a different TTS model, for another
+    document or by a job that isn't `job_id` (or one of `adopt_job_ids`) is
+    discarded on load, so a directory left behind by a deleted podcast is
+    never read as someone else's progress. Once the podcast is completed,
+    `retain` keeps the chunks of its final sentences so an edited script
+    only needs its new sentences synthesized.
+
+    Only the constructor creates the directory: if it is deleted while the
+    job runs (the podcast was deleted), later writes are dropped instead of
+    bringing it back.
+
+    Args:
+        directory (str): Where the checkpoint lives (see `checkpoint_dir_for`).
+        model_name (str): Key of the TTS model the chunks were synthesized with.
+        fallback (ClipCache, optional): Cache consulted for sentences not in the checkpoint.
+        job_id (int, optional): The job writing the checkpoint.
+        content_sha256 (str, optional): SHA-256 of the document being turned into a podcast.
+        adopt_job_ids (iterable, optional): Earlier jobs of the same podcast whose
+            checkpoint this job may take over (an edited script reuses the audio
+            kept by the job that completed the podcast).
+    """
+
+    def __init__(self, directory, model_name, fallback=None, job_id=None, content_sha256=None, adopt_job_ids=()):
+        self.directory = directory
+        self.model_name = model_name
+        self.fallback = fallback
+        self.job_id = job_id
+        self.content_sha256 = content_sha256
+        self.resumed = 0  # sentences served from this checkpoint
+        self._lock = threading.Lock()
+        os.makedirs(self.chunks_dir, exist_ok=True)
+
+        self.manifest = self._load_manifest({job_id, *adopt_job_ids})
+        if self.manifest is None:
+            shutil.rmtree(self.chunks_dir, ignore_errors=True)
+            os.makedirs(self.chunks_dir, exist_ok=True)
+            now = datetime.utcnow().isoformat()
+            self.manifest = {'version': CHECKPOINT_VERSION, 'model': model_name, 'job_id': job_id,
+                             'content_sha256': content_sha256, 'created_at': now, 'updated_at': now,
+                             'script_complete': False, 'turns': [], 'sentences': []}
+            self._save_manifest()
+        elif self.manifest['job_id'] != job_id:
+            print(f"--- Job {job_id} takes over the checkpoint of job {self.manifest['job_id']} ---")
+            self.manifest['job_id'] = job_id
+            self._save_manifest()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    @property
+    def chunks_dir(self):
+        return os.path.join(self.directory, 'chunks')
+
+    def _load_manifest(self, job_ids):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != CHECKPOINT_VERSION or manifest.get('model') != self.model_name:
+            print(f"--- Discarding checkpoint in {self.directory}: made with different settings ---")
+            return None
+        if manifest.get('job_id') not in job_ids or manifest.get('content_sha256') != self.content_sha256:
+            print(f"--- Discarding checkpoint in {self.directory}: written for another job or document ---")
+            return None
+        return manifest
+
+    @property
+    def abandoned(self):
+        """True once the checkpoint's directory was deleted from under it."""
+        return not os.path.isdir(self.chunks_dir)
+
+    def _save_manifest(self):
+        self.manifest['updated_at'] = datetime.utcnow().isoformat()
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+        except FileNotFoundError:
+            # Abandoned: the directory is gone and must not be brought back
+            pass
+
+    def _save_chunk(self, text, voice, audio):
+        try:
+            save_clip(self._path(text, voice), audio)
+        except FileNotFoundError:
+            pass
+
+    # --- Script ---
+
+    @property
+    def script(self):
+        """The script saved by an earlier attempt, or None if it never finished."""
+        if not self.manifest['script_complete']:
+            return None
+        return "\n".join(self.manifest['turns'])
+
+    def start_script(self):
+        """Forgets a partially streamed script before it is generated again."""
+        with self._lock:
+            self.manifest.update(script_complete=False, turns=[], sentences=[])
+            self._save_manifest()
+
+    def append_turn(self, turn, sentences):
+        """Records one streamed "Host:"/"Expert:" turn and the sentences it was split into."""
+        with self._lock:
+            self.manifest['turns'].append(turn)
+            self.manifest['sentences'].extend([voice, text] for voice, text in sentences)
+            self._save_manifest()
+
+    def save_script(self, script):
+        """Records the finished script, so a retry can skip the LLM."""
+        with self._lock:
+            self.manifest['turns'] = [line for line in script.split('\n') if line.strip()]
+            self.manifest['script_complete'] = True
+            self._save_manifest()
+
+    def record_sentences(self, sentences):
+        """Records the (voice, sentence) pairs of the whole script and logs how far synthesis already got."""
+        with self._lock:
+            self.manifest['sentences'] = [[voice, text] for voice, text in sentences]
+            self._save_manifest()
+        progress = self.progress()
+        if progress['synthesized']:
+            print(f"--- Resuming from checkpoint: {progress['synthesized']}/{progress['sentences']} sentences "
+                  f"already synthesized, first missing is #{progress['first_missing']} ---")
+        return progress
+
+    def progress(self):
+        """
+        Returns:
+            dict: Total sentences, how many have a chunk, and the index of the first
+            one without (None when all are done).
+        """
+        done = [os.path.exists(self._path(text, voice)) for voice, text in self.manifest['sentences']]
+        first_missing = done.index(False) if False in done else None
+        return {'sentences': len(done), 'synthesized': sum(done), 'first_missing': first_missing}
+
+    # --- Synthesized chunks (the ClipCache interface) ---
+
+    def _path(self, text, voice):
+        key = hashlib.sha256(f"{voice}\0{normalize_sentence(text)}".encode('utf-8')).hexdigest()
+        return os.path.join(self.chunks_dir, f"{key}.npy")
+
+    def get(self, text, voice):
+        """Returns the checkpointed waveform for a sentence, falling back to the shared clip cache."""
+        try:
+            audio = decode_clip(np.load(self._path(text, voice)))
+        except (FileNotFoundError, ValueError, OSError):
+            audio = None
+        if audio is not None:
+            self.resumed += 1
+            return audio
+        if self.fallback is None:
+            return None
+        audio = self.fallback.get(text, voice)
+        if audio is not None:
+            # The shared cache may evict it before a retry needs it
+            self._save_chunk(text, voice, audio)
+        return audio
+
+    def put(self, text, voice, audio):
+        self._save_chunk(text, voice, audio)
+        if self.fallback is not None:
+            self.fallback.put(text, voice, audio)
+
+    def stats(self):
+        stats = dict(self.fallback.stats()) if self.fallback is not None else {}
+        stats['resumed'] = self.resumed
+        return stats
+
+    def retain(self):
+        """Deletes the chunks of sentences that are no longer in the script; returns how many."""
+        if self.abandoned:
+            return 0
+        keep = {os.path.basename(self._path(text, voice)) for voice, text in self.manifest['sentences']}
+        removed = 0
+        for name in os.listdir(self.chunks_dir):
+            if name not in keep:
+                os.remove(os.path.join(self.chunks_dir, name))
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Deletes the checkpoint once the podcast no longer needs it."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,166 @@
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from app.services.metrics import REGISTRY
+from app.services.audio_assembler import float_to_pcm16
+
+# Bytes on disk per cache directory, shared by every ClipCache of the process, so
+# only the first one (not every job's) has to walk the directory to find out
+_disk_usage = {}
+_disk_usage_lock = threading.Lock()
+
+
+def normalize_sentence(text):
+    """Normalizes a sentence so trivially different spellings share a cache entry."""
+    text = unicodedata.normalize('NFKC', text)
+    text = text.replace('’', "'").replace('‘', "'").replace('“', '"').replace('”', '"')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def decode_clip(pcm):
+    """Converts stored 16-bit PCM back to a float waveform."""
+    return pcm.astype(np.float32) / 32767
+
+
+def save_clip(path, audio):
+    """Atomically writes a waveform to `path` as a 16-bit PCM `.npy` file."""
+    # Write to a private temp file first so readers never see a partial entry
+    # (private per thread too: a worker's job slots may store the same sentence at once).
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, float_to_pcm16(audio))
+    os.replace(tmp_path, path)
+
+
+class ClipCache:
+    """
+    A persistent, size-bounded cache of synthesized sentences.
+
+    Entries are addressed by a SHA-256 of (model name, voice, normalized text) and
+    stored on disk as 16-bit PCM `.npy` files. Reading an entry refreshes its
+    modification time, and when the cache grows past `max_bytes` the least
+    recently used files are removed until it is back under the low-water mark.
+
+    Instances are cheap (one per job): the directory's size is only measured
+    the first time a process needs it and then kept up to date in memory.
+    `hits`, `misses` and `evictions` count this instance's lookups; they are
+    also added to the process's metrics (`/metrics`).
+    """
+
+    def __init__(self, cache_dir, model_name, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._usage_key = os.path.realpath(cache_dir)
+
+    def _measured_size(self):
+        # Called with _disk_usage_lock held
+        if self._usage_key not in _disk_usage:
+            _disk_usage[self._usage_key] = sum(stat.st_size for _, stat in self._entries())
+        return _disk_usage[self._usage_key]
+
+    @property
+    def _size(self):
+        with _disk_usage_lock:
+            return self._measured_size()
+
+    def _grow(self, delta):
+        """Adjusts the known size by `delta` bytes and returns the new size."""
+        with _disk_usage_lock:
+            _disk_usage[self._usage_key] = self._measured_size() + delta
+            return _disk_usage[self._usage_key]
+
+    def _set_size(self, size):
+        with _disk_usage_lock:
+            _disk_usage[self._usage_key] = size
+
+    def key(self, text, voice):
+        payload = f"{self.model_name}\0{voice}\0{normalize_sentence(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npy'):
+                    path = os.path.join(root, name)
+                    try:
+                        yield path, os.stat(path)
+                    except FileNotFoundError:
+                        continue  # evicted by another process while walking
+
+    def get(self, text, voice):
+        """Returns the cached float waveform for a sentence, or None on a miss."""
+        path = self._path(self.key(text, voice))
+        try:
+            pcm = np.load(path)
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            REGISTRY.inc('docucast_tts_cache_lookups_total', result='miss')
+            return None
+        self.hits += 1
+        REGISTRY.inc('docucast_tts_cache_lookups_total', result='hit')
+        return decode_clip(pcm)
+
+    def put(self, text, voice, audio):
+        """Stores a synthesized float waveform as compact 16-bit PCM."""
+        path = self._path(self.key(text, voice))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._grow(0)  # measures the directory before the write, so the new file is not counted twice
+        try:
+            replaced = os.path.getsize(path)  # the same sentence stored again
+        except FileNotFoundError:
+            replaced = 0
+        save_clip(path, audio)
+
+        if self._grow(os.path.getsize(path) - replaced) > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for path, stat in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+        self.evictions += evicted
+        REGISTRY.inc('docucast_tts_cache_evictions_total', evicted)
+        self._set_size(total)
+
+    def clear(self):
+        """Removes every cached clip."""
+        for path, _ in list(self._entries()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._set_size(0)
+
+    def stats(self):
+        """Returns hit/miss counters for this instance plus the on-disk footprint."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,159 @@
+import os
+import shutil
+import hashlib
+from app.extensions import db
+from app.models import Podcast, Job
+from app.services.audio_profiles import get_audio_profile, DEFAULT_AUDIO_PROFILE
+from app.services.tts_backends import tts_model_key, DEFAULT_TTS_BACKEND
+
+
+def pipeline_settings_key(llm_backend, audio_profile=DEFAULT_AUDIO_PROFILE, tts_backend=DEFAULT_TTS_BACKEND):
+    """
+    Hashes every setting that changes the audio produced for a given document,
+    so a finished podcast is only reused when it would come out the same.
+    """
+    from app.services.script_generator import PROMPT_TEMPLATE_VERSION
+    from app.services.llm_client import llm_model_name
+    from app.services.synthesis import TTS_MODEL_NAME, HOST_VOICE, EXPERT_VOICE
+
+    # The fp32 backends share the plain model name; int8 gets its own
+    settings = (PROMPT_TEMPLATE_VERSION, llm_model_name(llm_backend), tts_model_key(TTS_MODEL_NAME, tts_backend),
+                HOST_VOICE, EXPERT_VOICE)
+    if audio_profile != DEFAULT_AUDIO_PROFILE:
+        # Left out for the default so podcasts made before profiles existed are still reused
+        settings += (audio_profile,)
+    return hashlib.sha256('\0'.join(settings).encode('utf-8')).hexdigest()
+
+
+def audio_path_for(podcast, generated_folder):
+    """Returns where the finished audio for a podcast lives (the extension depends on its profile)."""
+    extension = get_audio_profile(podcast.audio_profile).extension
+    audio_filename = f"{os.path.splitext(podcast.original_filename)[0]}_{podcast.id}.{extension}"
+    return os.path.join(generated_folder, audio_filename)
+
+
+def link_audio(source_path, target_path):
+    """Hard-links existing audio to a new path, copying if the filesystem can't link."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copy2(source_path, target_path)
+    return target_path
+
+
+def find_completed_duplicate(content_sha256, pipeline_key):
+    """Returns a completed podcast made from identical bytes and settings whose audio still exists."""
+    candidates = Podcast.query.filter_by(content_sha256=content_sha256, pipeline_key=pipeline_key,
+                                         status='completed')\
+                              .order_by(Podcast.id.desc())
+    for podcast in candidates:
+        if podcast.generated_audio_path and os.path.exists(podcast.generated_audio_path):
+            return podcast
+    return None
+
+
+def find_inflight_leader(content_sha256, pipeline_key):
+    """Returns the oldest podcast with these bytes and settings that is still being generated."""
+    return Podcast.query.filter_by(content_sha256=content_sha256, pipeline_key=pipeline_key,
+                                   status='processing', source_podcast_id=None)\
+                        .order_by(Podcast.id)\
+                        .first()
+
+
+def reuse_audio(podcast, source, generated_folder):
+    """Completes `podcast` by linking to the audio of an identical finished podcast."""
+    podcast.generated_audio_path = link_audio(source.generated_audio_path,
+                                              audio_path_for(podcast, generated_folder))
+    podcast.script_from_cache = source.script_from_cache
+    podcast.script = source.script
+    podcast.status = 'completed'
+
+
+def create_podcast_for_upload(user, filename, filepath, content_sha256, pipeline_key, generated_folder,
+                              enqueue, timings=None, batch=None, audio_profile=DEFAULT_AUDIO_PROFILE):
+    """
+    Creates the Podcast row for an upload, avoiding duplicate work where possible.
+
+    - If an identical upload already has finished audio, that audio is linked
+      and the podcast is completed immediately ('reused').
+    - If an identical upload is still being generated, the new podcast follows
+      it and is completed when it finishes ('coalesced').
+    - Otherwise a pipeline job is queued through `enqueue(podcast, filepath)` ('queued').
+
+    `timings` (the upload's stage breakdown) is stored on the new podcast before
+    any job exists, so the worker extends it rather than racing to overwrite it.
+    `batch` groups the podcast with the other documents of a batch upload.
+    `audio_profile` picks the output format; it must be part of `pipeline_key`.
+
+    Returns:
+        tuple[Podcast, str]: The new podcast and which of the outcomes above applied.
+    """
+    podcast = Podcast(original_filename=filename, author=user, status='processing',
+                      content_sha256=content_sha256, pipeline_key=pipeline_key, timings=timings,
+                      batch=batch, audio_profile=audio_profile)
+    db.session.add(podcast)
+
+    duplicate = find_completed_duplicate(content_sha256, pipeline_key)
+    if duplicate is not None:
+        db.session.flush()  # assigns the id used in the audio filename
+        reuse_audio(podcast, duplicate, generated_folder)
+        db.session.commit()
+        return podcast, 'reused'
+
+    db.session.commit()
+
+    # Re-check after our row is visible: of several identical uploads racing
+    # each other, only the oldest one becomes the leader and runs the pipeline.
+    leader = find_inflight_leader(content_sha256, pipeline_key)
+    if leader is not None and leader.id != podcast.id:
+        podcast.source_podcast_id = leader.id
+        db.session.commit()
+        db.session.refresh(leader)
+        if leader.status == 'completed':
+            # The leader finished while we were attaching; don't wait for it.
+            finalize_followers(leader, generated_folder)
+        return podcast, 'coalesced'
+
+    enqueue(podcast, filepath)
+    return podcast, 'queued'
+
+
+def finalize_followers(leader, generated_folder):
+    """Completes every podcast that was coalesced onto `leader` using its audio."""
+    for follower in Podcast.query.filter_by(source_podcast_id=leader.id, status='processing'):
+        reuse_audio(follower, leader, generated_folder)
+    db.session.commit()
+
+
+def mark_podcast_failed(podcast):
+    """Fails a podcast together with any uploads that were waiting on it."""
+    podcast.status = 'failed'
+    for follower in Podcast.query.filter_by(source_podcast_id=podcast.id, status='processing'):
+        follower.status = 'failed'
+
+
+def detach_followers(podcast, enqueue):
+    """
+    Prepares a leader for deletion. If it is still in flight, its first follower
+    takes over the work (with a fresh job); every follower stops pointing at it.
+    """
+    followers = Podcast.query.filter_by(source_podcast_id=podcast.id).order_by(Podcast.id).all()
+    if not followers:
+        return
+
+    for follower in followers:
+        follower.source_podcast_id = None
+
+    waiting = [f for f in followers if f.status == 'processing']
+    if podcast.status == 'processing' and waiting:
+        new_leader = waiting[0]
+        for follower in waiting[1:]:
+            follower.source_podcast_id = new_leader.id
+        job = Job.query.filter_by(podcast_id=podcast.id).order_by(Job.id.desc()).first()
+        db.session.commit()
+        if job is not None:
+            enqueue(new_leader, job.source_path)
+        else:
+            mark_podcast_failed(new_leader)
+    db.session.commit()
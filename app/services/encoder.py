@@ -0,0 +1,234 @@
+import os
+import math
+import struct
+import zlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from app.services.audio_profiles import get_audio_profile, DEFAULT_AUDIO_PROFILE
+
+DEFAULT_CHUNK_SECONDS = 60
+# Audio encoded on both sides of every chunk (and then thrown away), so the
+# encoder's look-ahead and the decoder's overlap see the real neighbours
+ROLL_SECONDS = 0.25
+
+
+class EncodingError(Exception):
+    """Raised when ffmpeg fails or produces a stream that can't be spliced."""
+
+
+def ffmpeg_binary():
+    # The same binary pydub uses (AudioSegment.converter can be pointed elsewhere)
+    from pydub import AudioSegment
+    return AudioSegment.converter
+
+
+def run_ffmpeg(pcm, sample_rate, profile, output='pipe:1', extra_args=()):
+    """Encodes mono 16-bit PCM with a profile's codec; returns the encoded bytes when writing to a pipe."""
+    command = [ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+               '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+               *profile.codec_args, *extra_args, '-f', profile.container, output]
+    try:
+        result = subprocess.run(command, input=pcm.tobytes(), capture_output=True, check=False)
+    except OSError as e:
+        raise EncodingError(f"Could not run ffmpeg: {e}") from e
+    if result.returncode != 0:
+        raise EncodingError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+
+# --- MP3 frames ---
+
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def split_mp3_frames(data):
+    """Splits a bare Layer III stream (no ID3 tag or Xing frame) into its frames."""
+    frames = []
+    pos = 0
+    while pos + 4 <= len(data):
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version = (header >> 19) & 3
+        if header >> 21 != 0x7FF or version == 1 or (header >> 17) & 3 != 1:
+            raise EncodingError(f"Lost MP3 frame sync at byte {pos}")
+        bitrate = _MP3_BITRATES[1 if version == 3 else 2][(header >> 12) & 0xF] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][(header >> 10) & 3]
+        length = (144 if version == 3 else 72) * bitrate // sample_rate + ((header >> 9) & 1)
+        frames.append(data[pos:pos + length])
+        pos += length
+    return frames
+
+
+# --- Ogg Opus packets ---
+
+_BIT_REVERSED = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def ogg_crc(data):
+    """Ogg's CRC-32 (polynomial 0x04C11DB7, not reflected), computed with zlib on bit-reversed bytes."""
+    reflected = zlib.crc32(data.translate(_BIT_REVERSED), 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return int(f"{reflected:032b}"[::-1], 2)
+
+
+def read_ogg_packets(data):
+    """Returns the packets of a single logical Ogg stream, in order."""
+    packets = []
+    partial = b''
+    pos = 0
+    while pos < len(data):
+        if data[pos:pos + 4] != b'OggS':
+            raise EncodingError(f"Lost Ogg page sync at byte {pos}")
+        segments = data[pos + 26]
+        body = pos + 27 + segments
+        for lacing in data[pos + 27:pos + 27 + segments]:
+            partial += data[body:body + lacing]
+            body += lacing
+            if lacing < 255:
+                packets.append(partial)
+                partial = b''
+        pos = body
+    return packets
+
+
+def opus_packet_samples(packet):
+    """Returns the duration of an Opus packet in 48 kHz samples (RFC 6716, section 3.1)."""
+    config, code = packet[0] >> 3, packet[0] & 3
+    if config < 12:
+        frame = (480, 960, 1920, 2880)[config & 3]   # SILK: 10/20/40/60 ms
+    elif config < 16:
+        frame = (480, 960)[config & 1]               # Hybrid: 10/20 ms
+    else:
+        frame = (120, 240, 480, 960)[config & 3]     # CELT: 2.5/5/10/20 ms
+    frames = 1 if code == 0 else 2 if code in (1, 2) else packet[1] & 0x3F
+    return frame * frames
+
+
+def _ogg_page(serial, sequence, granule, packets, header_type=0):
+    lacing = bytearray()
+    for packet in packets:
+        lacing.extend([255] * (len(packet) // 255))
+        lacing.append(len(packet) % 255)
+    header = struct.pack('<4sBBqIIIB', b'OggS', 0, header_type, granule, serial, sequence, 0, len(lacing))
+    page = bytearray(header + bytes(lacing) + b''.join(packets))
+    page[22:26] = struct.pack('<I', ogg_crc(bytes(page)))
+    return bytes(page)
+
+
+def write_ogg_opus(head, tags, packets, total_samples_48k, serial=0x444F4355, packets_per_page=50):
+    """
+    Muxes Opus packets into one Ogg stream (RFC 7845): OpusHead and OpusTags
+    pages, then pages of about a second of audio each. The last page's granule
+    position trims the stream to `total_samples_48k` after the pre-skip.
+    """
+    pre_skip = struct.unpack_from('<H', head, 10)[0]
+    final_granule = pre_skip + total_samples_48k
+    pages = [_ogg_page(serial, 0, 0, [head], header_type=0x02), _ogg_page(serial, 1, 0, [tags])]
+    granule = 0
+    for start in range(0, len(packets), packets_per_page):
+        page_packets = packets[start:start + packets_per_page]
+        granule += sum(opus_packet_samples(packet) for packet in page_packets)
+        last = start + packets_per_page >= len(packets)
+        pages.append(_ogg_page(serial, len(pages), min(granule, final_granule) if last else granule,
+                               page_packets, header_type=0x04 if last else 0))
+    return b''.join(pages)
+
+
+# --- Encoding ---
+
+class AudioEncoder:
+    """
+    Encodes a finished episode (mono 16-bit PCM) to a podcast's output profile.
+
+    Long episodes are cut into `chunk_seconds` pieces on codec frame
+    boundaries and the pieces are encoded by `workers` ffmpeg processes at
+    once. Every piece is encoded with `ROLL_SECONDS` of its neighbours' audio
+    on either side, and only the frames covering the piece itself are kept,
+    so the pieces join without gaps or clicks:
+
+    - MP3 is encoded without the bit reservoir, which makes every frame
+      self-contained, and the kept frames are concatenated.
+    - Opus packets are re-muxed into a single Ogg stream with the first
+      piece's header and pre-skip, and the last page trims the padding.
+
+    Episodes shorter than two chunks, or `workers` <= 1, are encoded in one
+    pass as before. If the chunked encode fails, it falls back to one pass.
+
+    Args:
+        profile (str): Name of an output profile (see app/services/audio_profiles.py).
+        workers (int): ffmpeg processes to run at once.
+        chunk_seconds (float): Length of the pieces encoded in parallel.
+    """
+
+    def __init__(self, profile=DEFAULT_AUDIO_PROFILE, workers=1, chunk_seconds=DEFAULT_CHUNK_SECONDS):
+        self.profile = get_audio_profile(profile)
+        self.workers = max(1, int(workers))
+        self.chunk_seconds = chunk_seconds
+
+    def chunk_bounds(self, total_samples, sample_rate):
+        """Returns (start, end) sample ranges of the pieces, each a whole number of frames but the last."""
+        frame = self.profile.frame_samples
+        chunk = max(frame, int(self.chunk_seconds * sample_rate) // frame * frame)
+        return [(start, min(start + chunk, total_samples)) for start in range(0, total_samples, chunk)]
+
+    def encode(self, pcm, output_path, sample_rate=24000):
+        """
+        Writes `pcm` to `output_path` in the encoder's profile.
+
+        Returns:
+            int: How many pieces were encoded (1 for a single pass).
+        """
+        bounds = self.chunk_bounds(len(pcm), sample_rate)
+        if self.workers > 1 and len(bounds) > 1:
+            try:
+                data = self._encode_chunked(pcm, sample_rate, bounds)
+                tmp_path = f"{output_path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, output_path)
+                return len(bounds)
+            except EncodingError as e:
+                print(f"!!! Chunked encoding failed ({e}), encoding in one pass !!!")
+        self.encode_single_pass(pcm, output_path, sample_rate)
+        return 1
+
+    def encode_single_pass(self, pcm, output_path, sample_rate=24000):
+        run_ffmpeg(pcm, sample_rate, self.profile, output=output_path)
+        return output_path
+
+    def _encode_piece(self, pcm, sample_rate, start, end, last):
+        frame = self.profile.frame_samples
+        roll = math.ceil(ROLL_SECONDS * sample_rate / frame) * frame
+        low, high = max(0, start - roll), min(len(pcm), end + roll)
+        if self.profile.container == 'mp3':
+            units = split_mp3_frames(run_ffmpeg(pcm[low:high], sample_rate, self.profile,
+                                                extra_args=['-reservoir', '0', '-write_xing', '0',
+                                                            '-id3v2_version', '0']))
+            header = None
+        else:
+            packets = read_ogg_packets(run_ffmpeg(pcm[low:high], sample_rate, self.profile))
+            header, units = packets[:2], packets[2:]
+            if any(opus_packet_samples(packet) * sample_rate != frame * 48000 for packet in units):
+                raise EncodingError("Opus packets don't match the profile's frame duration")
+
+        # Unit k decodes (after the codec's constant delay) to samples [k*frame, (k+1)*frame) of the piece's input
+        skip = (start - low) // frame
+        keep = len(units) - skip if last else (end - start) // frame
+        if skip + keep > len(units):
+            raise EncodingError(f"Piece {start}-{end} came back {len(units)} frames long, expected {skip + keep}")
+        return header, units[skip:skip + keep]
+
+    def _encode_chunked(self, pcm, sample_rate, bounds):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='encode') as executor:
+            # ffmpeg runs in its own process, so threads are enough to keep every worker busy
+            futures = [executor.submit(self._encode_piece, pcm, sample_rate, start, end, index == len(bounds) - 1)
+                       for index, (start, end) in enumerate(bounds)]
+            pieces = [future.result() for future in futures]
+
+        units = [unit for _, piece_units in pieces for unit in piece_units]
+        if self.profile.container == 'mp3':
+            return b''.join(units)
+        head, tags = pieces[0][0]
+        return write_ogg_opus(head, tags, units, len(pcm) * 48000 // sample_rate)
@@ -0,0 +1,82 @@
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import or_
+from app.models import Podcast
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+
+
+def encode_cursor(podcast):
+    """Returns an opaque, URL-safe cursor pointing at a podcast's position in the history."""
+    raw = f"{podcast.created_at.isoformat()}|{podcast.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns the (created_at, id) a cursor points at."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, podcast_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(podcast_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise CursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+class HistoryPage:
+    """One page of a user's podcast history, with cursors to the neighbouring pages."""
+
+    def __init__(self, items, newer_cursor=None, older_cursor=None):
+        self.items = items
+        self.newer_cursor = newer_cursor
+        self.older_cursor = older_cursor
+
+
+def podcast_history(user_id, before=None, after=None, limit=5, status=None):
+    """
+    Returns a page of a user's podcasts, newest first, using keyset pagination.
+
+    Pages are addressed by cursors rather than page numbers: `before` returns
+    the podcasts older than a cursor and `after` those newer than it. Each
+    page is a single range scan of the (user_id, created_at) index, with no
+    OFFSET and no COUNT(*), so it costs the same on page 1 as on page 500.
+    Ties on `created_at` are broken by id. The redundant `created_at <=` bound
+    lets SQLite turn the condition into an index range even with bound parameters.
+
+    Args:
+        user_id (int): Whose history to read.
+        before (str, optional): Cursor from `HistoryPage.older_cursor`.
+        after (str, optional): Cursor from `HistoryPage.newer_cursor`.
+        limit (int): Podcasts per page.
+        status (str, optional): Only include podcasts with this status.
+
+    Returns:
+        HistoryPage: The podcasts plus cursors for the newer and older pages (None at either end).
+    """
+    query = Podcast.query.filter(Podcast.user_id == user_id)
+    if status:
+        query = query.filter(Podcast.status == status)
+
+    if after:
+        created_at, podcast_id = decode_cursor(after)
+        query = query.filter(Podcast.created_at >= created_at,
+                             or_(Podcast.created_at > created_at, Podcast.id > podcast_id))
+        rows = query.order_by(Podcast.created_at.asc(), Podcast.id.asc()).limit(limit + 1).all()
+        items = list(reversed(rows[:limit]))
+        has_newer, has_older = len(rows) > limit, True
+    else:
+        if before:
+            created_at, podcast_id = decode_cursor(before)
+            query = query.filter(Podcast.created_at <= created_at,
+                                 or_(Podcast.created_at < created_at, Podcast.id < podcast_id))
+        rows = query.order_by(Podcast.created_at.desc(), Podcast.id.desc()).limit(limit + 1).all()
+        items = rows[:limit]
+        has_newer, has_older = before is not None, len(rows) > limit
+
+    if not items:
+        return HistoryPage([])
+    return HistoryPage(items,
+                       newer_cursor=encode_cursor(items[0]) if has_newer else None,
+                       older_cursor=encode_cursor(items[-1]) if has_older else None)
@@ -0,0 +1,88 @@
+import os
+import re
+import math
+
+PLAYLIST_NAME = 'index.m3u8'
+SEGMENT_NAME = re.compile(r'^seg_\d{5}\.mp3$')
+
+
+class HlsSegmentWriter:
+    """
+    Writes a growing podcast as an HLS event playlist of MP3 segments.
+
+    PCM is buffered as it is produced; every `target_seconds` of audio is
+    encoded into its own segment and the playlist is rewritten to include it,
+    so players can start listening while synthesis is still running. `finish`
+    flushes the remainder and closes the playlist with #EXT-X-ENDLIST.
+    """
+
+    def __init__(self, directory, sample_rate=24000, target_seconds=6):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.target_samples = int(sample_rate * target_seconds)
+        self._buffer = []
+        self._buffered = 0
+        self._segments = []  # (filename, duration in seconds)
+        os.makedirs(directory, exist_ok=True)
+        self._write_playlist(ended=False)
+
+    @property
+    def playlist_path(self):
+        return os.path.join(self.directory, PLAYLIST_NAME)
+
+    def append_pcm(self, pcm):
+        """Adds 16-bit mono PCM samples, writing out any full segments."""
+        self._buffer.append(pcm)
+        self._buffered += len(pcm)
+        if self._buffered >= self.target_samples:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        # Imported here so the web process can serve playlists without loading numpy/pydub
+        import numpy as np
+        from pydub import AudioSegment
+
+        pcm = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+
+        filename = f"seg_{len(self._segments):05d}.mp3"
+        segment = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=self.sample_rate, channels=1)
+        tmp_path = os.path.join(self.directory, f".{filename}.tmp")
+        segment.export(tmp_path, format="mp3")
+        os.replace(tmp_path, os.path.join(self.directory, filename))
+
+        self._segments.append((filename, len(pcm) / self.sample_rate))
+        self._write_playlist(ended=False)
+
+    def _write_playlist(self, ended):
+        target = max([math.ceil(duration) for _, duration in self._segments] or [1])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{target}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for filename, duration in self._segments:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(filename)
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+
+        # Replace atomically so a player never reads a half-written playlist.
+        tmp_path = f"{self.playlist_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.playlist_path)
+
+    def finish(self):
+        """Writes the last partial segment and marks the playlist as complete."""
+        self._flush()
+        self._write_playlist(ended=True)
+
+
+def segments_dir_for(podcast_id, generated_folder):
+    """Returns the directory holding a podcast's live-stream segments."""
+    return os.path.join(generated_folder, 'segments', str(podcast_id))
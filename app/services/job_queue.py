@@ -0,0 +1,247 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import and_, bindparam, func
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models import Job
+from app.services.dedup import mark_podcast_failed
+
+
+def enqueue_podcast_job(podcast, source_path, max_attempts=3, script=None):
+    """
+    Creates a persisted job record asking a worker to run the pipeline for a podcast.
+
+    Args:
+        podcast (Podcast): The podcast row (already in 'processing' state).
+        source_path (str): Path of the uploaded document to process.
+        max_attempts (int): How many times the job may be tried before it is failed.
+        script (dict, optional): An edited `PodcastScript` (`to_dict`) to synthesize
+            instead of processing the document.
+
+    Returns:
+        Job: The newly queued job.
+    """
+    job = Job(podcast=podcast, user_id=podcast.user_id, source_path=source_path, status='queued',
+              max_attempts=max_attempts, script=script)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _give_up(job):
+    job.status = 'failed'
+    if job.script is not None:
+        # A failed script edit leaves the podcast as it was: its script and audio still match
+        job.podcast.status = 'completed'
+    else:
+        mark_podcast_failed(job.podcast)
+
+
+def requeue_expired_jobs():
+    """
+    Returns jobs whose worker lease has expired (the worker crashed or was killed)
+    to the queue, or fails them if they have used up all of their attempts.
+
+    Returns:
+        int: The number of expired jobs that were recovered.
+    """
+    now = datetime.utcnow()
+    expired = Job.query.filter(Job.status == 'running', Job.locked_until < now).all()
+    for job in expired:
+        print(f"--- Job {job.id} lease held by {job.locked_by} expired, recovering ---")
+        job.locked_by = None
+        job.locked_until = None
+        job.last_error = 'Worker lease expired before the job finished.'
+        if job.attempts >= job.max_attempts:
+            _give_up(job)
+        else:
+            job.status = 'queued'
+            job.available_at = now
+    if expired:
+        db.session.commit()
+    return len(expired)
+
+
+def claim_next_job(worker_id, visibility_timeout, user_max_running=0):
+    """
+    Atomically leases the next runnable job to a worker, sharing workers fairly between users.
+
+    Among runnable jobs, those belonging to the user with the fewest jobs
+    currently running are preferred (oldest first), so one user's large batch
+    cannot starve everyone else, while a lone user still gets every idle
+    worker. If `user_max_running` is set, users already running that many jobs
+    are skipped entirely.
+
+    The claim is a conditional UPDATE guarded by the job's current state (and
+    the user's running count), so when several worker processes race for the
+    same row only one of them wins. The lease expires after `visibility_timeout`
+    seconds unless it is extended with `extend_lease`, after which the job
+    becomes visible to other workers again.
+
+    Args:
+        worker_id (str): Identifier of the claiming worker.
+        visibility_timeout (int): Lease length in seconds.
+        user_max_running (int): Per-user limit on running jobs; 0 means no limit.
+
+    Returns:
+        Job or None: The claimed job, or None if the queue is empty.
+    """
+    now = datetime.utcnow()
+    runnable = and_(Job.status == 'queued', Job.available_at <= now)
+
+    running = db.session.query(Job.user_id.label('user_id'), func.count(Job.id).label('running'))\
+                        .filter(Job.status == 'running')\
+                        .group_by(Job.user_id)\
+                        .subquery()
+    running_count = func.coalesce(running.c.running, 0)
+
+    while True:
+        query = db.session.query(Job.id, Job.user_id)\
+                          .outerjoin(running, running.c.user_id == Job.user_id)\
+                          .filter(runnable)
+        if user_max_running:
+            query = query.filter(running_count < user_max_running)
+        candidate = query.order_by(running_count, Job.id).first()
+        if candidate is None:
+            return None
+
+        guard = [Job.id == candidate.id, runnable]
+        if user_max_running and candidate.user_id is not None:
+            # Re-checked inside the UPDATE so two workers can't both take a user's last slot
+            other = aliased(Job)
+            guard.append(db.session.query(func.count(other.id))
+                                   .filter(other.user_id == candidate.user_id, other.status == 'running')
+                                   .scalar_subquery() < user_max_running)
+
+        claimed = Job.query.filter(*guard).update({
+            Job.status: 'running',
+            Job.locked_by: worker_id,
+            Job.locked_until: now + timedelta(seconds=visibility_timeout),
+            Job.attempts: Job.attempts + 1,
+            Job.updated_at: now,
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if claimed == 1:
+            return db.session.get(Job, candidate.id)
+        # Another worker won the race for this row (or the user's last slot); try again.
+
+
+def extend_lease(job, visibility_timeout, stage=None):
+    """Pushes the job's lease forward and optionally records the stage being run."""
+    job.locked_until = datetime.utcnow() + timedelta(seconds=visibility_timeout)
+    if stage:
+        job.stage = stage
+    db.session.commit()
+
+
+class JobHeartbeat:
+    """
+    Batches the status writes of the jobs one worker process is running.
+
+    Job-slot threads only record the stage they enter (`report`). The worker's
+    main loop then writes every change, and renews the lease of every job it
+    is running, in a single short transaction (`flush`): concurrent jobs cost
+    one UPDATE per heartbeat instead of a commit per stage per job, and a stage
+    that runs longer than the visibility timeout keeps its lease.
+
+    A job must be `forget`-ten before its final status is written, so that a
+    late heartbeat can't overwrite it.
+
+    Args:
+        worker_id (str): The worker holding the leases.
+        visibility_timeout (int): Lease length in seconds.
+        interval (int): Seconds between lease renewals when no stage changed.
+    """
+
+    def __init__(self, worker_id, visibility_timeout, interval=30):
+        self.worker_id = worker_id
+        self.visibility_timeout = visibility_timeout
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stages = {}  # job id -> stage entered since the last flush (None if unchanged)
+        self._changed = False
+        self._last_flush = time.monotonic()
+
+    def track(self, job_id):
+        with self._lock:
+            self._stages[job_id] = None
+
+    def report(self, job_id, stage):
+        with self._lock:
+            if job_id in self._stages:
+                self._stages[job_id] = stage
+                self._changed = True
+
+    def forget(self, job_id):
+        # Waits for a flush in progress, so no heartbeat for the job is written afterwards
+        with self._lock:
+            self._stages.pop(job_id, None)
+
+    def due(self):
+        with self._lock:
+            return self._changed or (bool(self._stages) and time.monotonic() - self._last_flush >= self.interval)
+
+    def flush(self):
+        """Writes the reported stages and renews every tracked lease; returns how many jobs were updated."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._stages:
+                return 0
+            now = datetime.utcnow()
+            table = Job.__table__
+            stmt = table.update()\
+                        .where(table.c.id == bindparam('job_id'),
+                               table.c.locked_by == self.worker_id,
+                               table.c.status == 'running')\
+                        .values(stage=func.coalesce(bindparam('new_stage'), table.c.stage),
+                                locked_until=now + timedelta(seconds=self.visibility_timeout),
+                                updated_at=now)
+            db.session.execute(stmt, [{'job_id': job_id, 'new_stage': stage} for job_id, stage in self._stages.items()])
+            db.session.commit()
+            for job_id in self._stages:
+                self._stages[job_id] = None
+            self._changed = False
+            return len(self._stages)
+
+
+def complete_job(job):
+    """Marks a job as successfully finished and releases its lease."""
+    job.status = 'succeeded'
+    job.locked_by = None
+    job.locked_until = None
+    job.last_error = None
+    db.session.commit()
+
+
+def fail_job(job, error, retry_backoff=30):
+    """
+    Records a failed attempt. The job is re-queued with exponential backoff
+    until it runs out of attempts, at which point it and its podcast are failed.
+
+    Args:
+        job (Job): The job that failed.
+        error (str): A human readable description of the failure.
+        retry_backoff (int): Base delay in seconds before the next attempt.
+
+    Returns:
+        bool: True if the job will be retried, False if it failed permanently.
+    """
+    job.locked_by = None
+    job.locked_until = None
+    job.last_error = str(error)
+    if job.attempts < job.max_attempts:
+        job.status = 'queued'
+        job.available_at = datetime.utcnow() + timedelta(seconds=retry_backoff * 2 ** (job.attempts - 1))
+        db.session.commit()
+        return True
+
+    _give_up(job)
+    db.session.commit()
+    return False
+
+
+def latest_job_for(podcast):
+    """Returns the most recent job created for a podcast, if any."""
+    return Job.query.filter_by(podcast_id=podcast.id).order_by(Job.id.desc()).first()
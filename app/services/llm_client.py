@@ -0,0 +1,577 @@
+import os
+import json
+import time
+import queue
+import codecs
+import random
+import asyncio
+import threading
+from urllib.parse import urlsplit
+from app.services.metrics import REGISTRY
+
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+STUB_MODEL_NAME = 'stub-llm'
+DEFAULT_STUB_URL = 'http://127.0.0.1:8089'
+
+CHARS_PER_TOKEN = 4  # rough average for English prose
+
+DEFAULT_TIMEOUT = 180       # seconds for a whole completion, or between two streamed chunks
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BACKOFF = 2.0       # seconds before the first retry, doubled for every further one
+DEFAULT_MAX_BACKOFF = 60.0
+
+# A short script used by the fake backend so the pipeline can run without an API key.
+CANNED_SCRIPT = """Host: Welcome to DocuCast, where we turn documents into conversations.
+Expert: Thanks for having me. Today's document is a great one to unpack.
+Host: Let's start with the basics. What is it about?
+Expert: At its core, it describes a problem, a method to address it, and the results. The results are surprisingly strong.
+Host: That's fascinating. What should listeners remember?
+Expert: Mainly that careful measurement beats intuition. And that the details really matter.
+Host: Great note to end on. Thanks for listening!"""
+
+
+class LLMError(Exception):
+    """Raised when the LLM could not produce a completion."""
+    retryable = False
+    outcome = 'failed'
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a completion (or the next streamed chunk) takes longer than the client's timeout."""
+    retryable = True
+    outcome = 'timeout'
+
+
+class LLMRateLimitError(LLMError):
+    """Raised when the API refuses a request because a rate limit or quota was exceeded."""
+    retryable = True
+    outcome = 'rate_limited'
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMUnavailableError(LLMError):
+    """Raised when the API can't be reached or fails on its side (connection errors, 5xx)."""
+    retryable = True
+    outcome = 'unavailable'
+
+
+class LLMRequestError(LLMError):
+    """Raised when the API rejects the request itself (bad prompt or key, blocked content); retrying won't help."""
+    outcome = 'rejected'
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket: `rate` tokens per second, with bursts of up to
+    `capacity` tokens. Waiters are served in arrival order, so a large request
+    can't be starved by a stream of small ones. Not thread-safe: use it from
+    one event loop.
+
+    A request is always charged in full. One larger than `capacity` waits for
+    a full bucket and then leaves it in debt (negative), which the requests
+    after it wait out, so the long-run rate never exceeds `rate` however big
+    the requests are.
+
+    Args:
+        rate (float): Tokens added per second; 0 or less means unlimited.
+        capacity (float, optional): Bucket size; defaults to one second's worth (at least 1).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = None  # created on first use, inside the event loop
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+    def ready(self, tokens=1):
+        """True if `tokens` could be taken right now without waiting."""
+        if self._refill() < self._paused_until:
+            return False
+        return self.rate <= 0 or self.tokens >= min(tokens, self.capacity)
+
+    def try_acquire(self, tokens=1):
+        """Takes `tokens` if they are available right now; returns whether it did."""
+        if not self.ready(tokens):
+            return False
+        if self.rate > 0:
+            self.tokens -= tokens
+        return True
+
+    async def acquire(self, tokens=1):
+        """Waits until `tokens` are available and takes them. Requests above `capacity` wait for a full bucket."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                wait = self._paused_until - time.monotonic()
+                if self.rate > 0:
+                    wait = max(wait, (min(tokens, self.capacity) - self.tokens) / self.rate)
+                await asyncio.sleep(max(wait, 0.001))
+
+    def pause(self, seconds):
+        """Holds every waiter back for `seconds`, e.g. when the server answered 429 with a Retry-After."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class GeminiBackend:
+    """
+    Async access to Gemini. The SDK is configured and the model built once, so
+    every request reuses the same client and its connection.
+    """
+
+    def __init__(self, api_key=None, model_name=GEMINI_MODEL_NAME):
+        import google.generativeai as genai
+
+        api_key = api_key or os.environ.get('GOOGLE_API_KEY') or os.environ.get('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables.")
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt):
+        try:
+            response = await self._model.generate_content_async(prompt)
+            return response.text
+        except Exception as e:
+            raise _gemini_error(e) from e
+
+    async def stream(self, prompt):
+        try:
+            response = await self._model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise _gemini_error(e) from e
+
+    async def aclose(self):
+        pass
+
+
+def _gemini_error(error):
+    """Maps an exception raised by the Gemini SDK to the matching LLMError."""
+    from google.api_core import exceptions as api
+
+    if isinstance(error, (api.ResourceExhausted, api.TooManyRequests)):
+        return LLMRateLimitError(f"Gemini rate limit or quota exceeded: {error}")
+    if isinstance(error, (api.DeadlineExceeded, api.GatewayTimeout)):
+        return LLMTimeoutError(f"Gemini timed out: {error}")
+    if isinstance(error, (api.ServiceUnavailable, api.InternalServerError, api.BadGateway, api.Aborted,
+                          api.Unknown, ConnectionError)):
+        return LLMUnavailableError(f"Gemini is unavailable: {error}")
+    if isinstance(error, ValueError):
+        # `response.text` raises ValueError when the answer has no text, e.g. because it was blocked
+        return LLMRequestError(f"Gemini returned no text: {error}")
+    return LLMRequestError(f"Gemini rejected the request: {error}")
+
+
+class StubServerBackend:
+    """
+    Async access to the local stub server (app/services/llm_stub_server.py),
+    over HTTP/1.1 connections that are kept open and reused between requests.
+    """
+
+    model_name = STUB_MODEL_NAME
+
+    def __init__(self, url=DEFAULT_STUB_URL):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip('/')
+        self._idle = []  # (reader, writer) of open connections not in use
+
+    def _request_bytes(self, path, payload):
+        body = json.dumps({'prompt': payload}).encode()
+        head = (f"POST {self.base_path}{path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        return head.encode() + body
+
+    async def _send(self, path, prompt):
+        """Sends a request, on an idle connection if there is one; returns the connection and response head."""
+        request = self._request_bytes(path, prompt)
+        while True:
+            reused = bool(self._idle)
+            if reused:
+                reader, writer = self._idle.pop()
+            else:
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                except OSError as e:
+                    raise LLMUnavailableError(f"Cannot reach the LLM stub server at {self.url}: {e}") from e
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers = await _read_response_head(reader)
+                return reader, writer, status, headers
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                writer.close()
+                # The server may have closed an idle connection; only a fresh one failing is an error
+                if not reused:
+                    raise LLMUnavailableError(f"The LLM stub server dropped the connection: {e}") from e
+            except BaseException:
+                writer.close()
+                raise
+
+    def _release(self, reader, writer, headers, reusable):
+        if reusable and headers.get('connection', '').lower() != 'close' and not reader.at_eof():
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def generate(self, prompt):
+        reader, writer, status, headers = await self._send('/v1/generate', prompt)
+        reusable = False
+        try:
+            body = await _read_response_body(reader, headers)
+            reusable = True
+            _raise_for_status(status, headers, body)
+            return json.loads(body)['text']
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            raise LLMUnavailableError(f"The LLM stub server dropped the connection: {e}") from e
+        finally:
+            # A cancelled request (timeout, losing hedge) leaves a half-read response: close it
+            self._release(reader, writer, headers, reusable)
+
+    async def stream(self, prompt):
+        reader, writer, status, headers = await self._send('/v1/stream', prompt)
+        reusable = False
+        try:
+            if status != 200:
+                body = await _read_response_body(reader, headers)
+                reusable = True
+                _raise_for_status(status, headers, body)
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            async for piece in _iter_chunked_body(reader):
+                text = decoder.decode(piece)
+                if text:
+                    yield text
+            reusable = True
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            raise LLMUnavailableError(f"The LLM stub server dropped the connection: {e}") from e
+        finally:
+            self._release(reader, writer, headers, reusable)
+
+    async def aclose(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+async def _read_response_head(reader):
+    status_line = await reader.readuntil(b'\r\n')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            return status, headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _iter_chunked_body(reader):
+    """Yields the chunks of a `Transfer-Encoding: chunked` body."""
+    while True:
+        size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+        if size == 0:
+            await reader.readuntil(b'\r\n')  # the stub server sends no trailers
+            return
+        data = await reader.readexactly(size)
+        await reader.readexactly(2)
+        yield data
+
+
+async def _read_response_body(reader, headers):
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        return b''.join([chunk async for chunk in _iter_chunked_body(reader)])
+    return await reader.readexactly(int(headers.get('content-length', 0)))
+
+
+def _raise_for_status(status, headers, body):
+    if status < 400:
+        return
+    try:
+        detail = json.loads(body).get('error', '')
+    except (ValueError, AttributeError):
+        detail = body.decode('utf-8', 'replace')
+    message = f"The LLM stub server answered {status}: {detail}"
+    if status == 429:
+        retry_after = headers.get('retry-after')
+        raise LLMRateLimitError(message, retry_after=float(retry_after) if retry_after else None)
+    if status in (408, 504):
+        raise LLMTimeoutError(message)
+    if status >= 500:
+        raise LLMUnavailableError(message)
+    raise LLMRequestError(message)
+
+
+class LLMClient:
+    """
+    A long-lived LLM client shared by every podcast a process generates.
+
+    Requests run on the client's own event loop thread against one backend
+    (and so one set of connections). Before it is sent, every request waits
+    for the rate limiters: `requests_per_minute` and `tokens_per_minute`
+    (estimated prompt tokens) are token buckets shared by all callers, so
+    concurrent podcasts split the API quota between them instead of tripping
+    it. Every prompt is charged its full estimate, even one larger than a
+    second's worth of quota. Each attempt has a `timeout`; timeouts, rate-limit answers and server
+    errors are retried up to `max_attempts` times with exponentially growing,
+    jittered delays (a Retry-After from the server holds back every request).
+    With `hedge_after`, a completion that hasn't finished after that many
+    seconds is sent a second time if the rate limits have room for it, and
+    whichever answer arrives first wins, which cuts tail latency. Streams are
+    retried only until their first chunk; they are never hedged.
+
+    `generate` and `stream` block, so the pipeline's threads can use the client
+    like the plain clients; coroutines can await `agenerate`/`astream`.
+
+    Args:
+        backend: An async backend (GeminiBackend, StubServerBackend).
+        requests_per_minute (float): Request quota; 0 for no limit.
+        tokens_per_minute (float): Prompt token quota; 0 for no limit.
+        timeout (float): Seconds per attempt, or between two streamed chunks.
+        max_attempts (int): Attempts per request, including the first.
+        backoff (float): Seconds before the first retry; doubled each time, at most `max_backoff`.
+        max_backoff (float): Longest delay between two attempts.
+        hedge_after (float): Seconds before a slow completion is hedged; 0 disables hedging.
+    """
+
+    def __init__(self, backend, requests_per_minute=0, tokens_per_minute=0, timeout=DEFAULT_TIMEOUT,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 hedge_after=0):
+        self.backend = backend
+        self.model_name = backend.model_name
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        self._requests = TokenBucket(requests_per_minute / 60)
+        self._tokens = TokenBucket(tokens_per_minute / 60)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='llm-client', daemon=True)
+        self._thread.start()
+
+    # --- Blocking API, for threads ---
+
+    def generate(self, prompt):
+        """Returns the full completion for `prompt`."""
+        return asyncio.run_coroutine_threadsafe(self.agenerate(prompt), self._loop).result()
+
+    def stream(self, prompt):
+        """Yields the completion for `prompt` as text chunks, as they arrive."""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for chunk in self.astream(prompt):
+                    chunks.put((chunk, None))
+                chunks.put((done, None))
+            except Exception as e:
+                chunks.put((done, e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                chunk, error = chunks.get()
+                if chunk is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield chunk
+        finally:
+            # The consumer stopped early: stop reading from the server as well
+            future.cancel()
+
+    def close(self):
+        """Closes the backend's connections and stops the event loop."""
+        asyncio.run_coroutine_threadsafe(self.backend.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    # --- Coroutines, run on the client's loop ---
+
+    async def agenerate(self, prompt):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await self._hedged_generate(prompt)
+            except LLMError as e:
+                await self._before_retry(e, attempt)
+
+    async def astream(self, prompt):
+        for attempt in range(1, self.max_attempts + 1):
+            started = False
+            try:
+                await self._admit(prompt)
+                chunks = self.backend.stream(prompt)
+                try:
+                    while True:
+                        try:
+                            chunk = await self._timed(chunks.__anext__())
+                        except StopAsyncIteration:
+                            break
+                        started = True
+                        yield chunk
+                finally:
+                    await chunks.aclose()
+                REGISTRY.inc('docucast_llm_requests_total', outcome='ok')
+                return
+            except LLMError as e:
+                REGISTRY.inc('docucast_llm_requests_total', outcome=e.outcome)
+                if started:
+                    # Part of the completion is already with the caller; it can't be replayed
+                    raise
+                await self._before_retry(e, attempt)
+
+    async def _admit(self, prompt):
+        start = time.perf_counter()
+        await self._requests.acquire()
+        await self._tokens.acquire(estimate_tokens(prompt))
+        REGISTRY.observe('docucast_llm_quota_wait_seconds', time.perf_counter() - start)
+
+    async def _timed(self, awaitable):
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"No answer from the LLM within {self.timeout:g}s.") from None
+
+    async def _attempt(self, prompt):
+        try:
+            text = await self._timed(self.backend.generate(prompt))
+        except LLMError as e:
+            REGISTRY.inc('docucast_llm_requests_total', outcome=e.outcome)
+            raise
+        except asyncio.CancelledError:
+            REGISTRY.inc('docucast_llm_requests_total', outcome='cancelled')
+            raise
+        REGISTRY.inc('docucast_llm_requests_total', outcome='ok')
+        return text
+
+    async def _hedged_generate(self, prompt):
+        await self._admit(prompt)
+        first = asyncio.ensure_future(self._attempt(prompt))
+        if not self.hedge_after:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        tokens = estimate_tokens(prompt)
+        # Hedge only with spare quota: a hedge must never delay someone else's first attempt
+        if done or not (self._requests.ready() and self._tokens.ready(tokens)):
+            return await first
+        self._requests.try_acquire()
+        self._tokens.try_acquire(tokens)
+        hedge = asyncio.ensure_future(self._attempt(prompt))
+        pending = {first, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        REGISTRY.inc('docucast_llm_hedges_total', winner='hedge' if task is hedge else 'original')
+                        return task.result()
+                    error = error or task.exception()
+            REGISTRY.inc('docucast_llm_hedges_total', winner='none')
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _before_retry(self, error, attempt):
+        """Re-raises `error` if it is final, otherwise waits out the backoff before the next attempt."""
+        if not error.retryable or attempt >= self.max_attempts:
+            raise error
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        if isinstance(error, LLMRateLimitError) and error.retry_after:
+            delay = max(delay, error.retry_after)
+            self._requests.pause(error.retry_after)
+        print(f"--- LLM request failed ({error}); attempt {attempt + 1}/{self.max_attempts} in {delay:.1f}s ---")
+        await asyncio.sleep(delay)
+
+
+class FakeStreamingLLM:
+    """
+    A local stand-in for the LLM that streams a canned script.
+
+    `first_chunk_delay` simulates time-to-first-token, `prompt_delay_per_char`
+    adds latency proportional to the prompt size, and `chunk_delay` is the gap
+    between streamed chunks, so pipeline timing can be exercised offline.
+    """
+
+    model_name = 'fake-llm'
+
+    def __init__(self, script=CANNED_SCRIPT, chunk_size=40, chunk_delay=0.0, first_chunk_delay=0.0,
+                 prompt_delay_per_char=0.0):
+        self.script = script
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.first_chunk_delay = first_chunk_delay
+        self.prompt_delay_per_char = prompt_delay_per_char
+        self.calls = 0
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt):
+        self.calls += 1
+        time.sleep(self.first_chunk_delay + len(prompt) * self.prompt_delay_per_char)
+        for start in range(0, len(self.script), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay)
+            yield self.script[start:start + self.chunk_size]
+
+
+def llm_model_name(backend=None):
+    """Returns the model name a backend generates with, without creating a client."""
+    backend = (backend or os.environ.get('LLM_BACKEND') or 'gemini').lower()
+    return {'fake': FakeStreamingLLM.model_name, 'stub': STUB_MODEL_NAME}.get(backend, GEMINI_MODEL_NAME)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(backend=None, stub_url=None, **options):
+    """
+    Returns the LLM client selected by `backend` (or the LLM_BACKEND environment
+    variable): 'gemini' (default), 'stub' for the local stub server at
+    `stub_url` (or LLM_STUB_URL), or 'fake' for offline development.
+
+    Gemini and stub clients are created once per process, with `options` (see
+    LLMClient), and shared from then on, so all podcasts use the same
+    connections and rate limits. Fake clients are cheap and made per call.
+    """
+    backend = (backend or os.environ.get('LLM_BACKEND') or 'gemini').lower()
+    if backend == 'fake':
+        return FakeStreamingLLM()
+    if backend not in ('gemini', 'stub'):
+        raise ValueError(f"Unknown LLM backend '{backend}'.")
+
+    with _clients_lock:
+        client = _clients.get(backend)
+        if client is None:
+            if backend == 'gemini':
+                engine = GeminiBackend()
+            else:
+                engine = StubServerBackend(stub_url or os.environ.get('LLM_STUB_URL') or DEFAULT_STUB_URL)
+            client = _clients[backend] = LLMClient(engine, **options)
+        return client
@@ -0,0 +1,180 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.services.llm_client import CANNED_SCRIPT
+
+
+class StubLLMServer:
+    """
+    A local HTTP server that answers like an LLM API, for the 'stub' LLM
+    backend: tests, benchmarks and offline development against a real network
+    client.
+
+    `POST /v1/generate` with `{"prompt": ...}` returns `{"text": script}`;
+    `POST /v1/stream` streams the script as chunked plain text. Latency, tail
+    latency, failures and a quota can be injected to exercise the client.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free one (see `url`).
+        script (str): The completion returned for every prompt.
+        latency (float): Seconds before answering (before the first chunk when streaming).
+        chunk_size (int): Characters per streamed chunk.
+        chunk_delay (float): Seconds between streamed chunks.
+        slow_fraction (float): Share of requests that take `slow_latency` instead of `latency`.
+        slow_latency (float): Latency of the slow requests.
+        error_fraction (float): Share of requests answered with 503.
+        requests_per_second (float): Server-side quota; requests over it are answered with
+            429 and a Retry-After. 0 for no quota.
+        seed (int, optional): Seed for the slow and failing requests.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, script=CANNED_SCRIPT, latency=0.0, chunk_size=40, chunk_delay=0.0,
+                 slow_fraction=0.0, slow_latency=5.0, error_fraction=0.0, requests_per_second=0, seed=None):
+        self.host = host
+        self.port = port
+        self.script = script
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.slow_fraction = slow_fraction
+        self.slow_latency = slow_latency
+        self.error_fraction = error_fraction
+        self.requests_per_second = requests_per_second
+        self.stats = {'requests': 0, 'ok': 0, 'rate_limited': 0, 'errors': 0, 'connections': 0, 'max_concurrent': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._quota = max(1.0, requests_per_second)
+        self._quota_updated = time.monotonic()
+        self._active = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Starts serving on a background thread; returns the server."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='llm-stub-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread until interrupted."""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _admit(self):
+        """Decides how to answer the next request: returns (outcome, seconds to wait before answering)."""
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.requests_per_second > 0:
+                now = time.monotonic()
+                self._quota = min(max(1.0, self.requests_per_second),
+                                  self._quota + (now - self._quota_updated) * self.requests_per_second)
+                self._quota_updated = now
+                if self._quota < 1:
+                    self.stats['rate_limited'] += 1
+                    return 'rate_limited', (1 - self._quota) / self.requests_per_second
+                self._quota -= 1
+            delay = self.slow_latency if self._random.random() < self.slow_fraction else self.latency
+            if self._random.random() < self.error_fraction:
+                self.stats['errors'] += 1
+                return 'error', delay
+            self.stats['ok'] += 1
+            return 'ok', delay
+
+    def _enter(self):
+        with self._lock:
+            self._active += 1
+            self.stats['max_concurrent'] = max(self.stats['max_concurrent'], self._active)
+
+    def _leave(self):
+        with self._lock:
+            self._active -= 1
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests, like a real API
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.stub._lock:
+            self.server.stub.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path not in ('/v1/generate', '/v1/stream'):
+            return self._send_json(404, {'error': f'unknown endpoint {self.path}'})
+        try:
+            json.loads(body)['prompt']
+        except (ValueError, KeyError, TypeError):
+            return self._send_json(400, {'error': 'expected a JSON body with a "prompt"'})
+
+        outcome, delay = stub._admit()
+        if outcome == 'rate_limited':
+            return self._send_json(429, {'error': 'quota exceeded'}, {'Retry-After': f"{delay:.3f}"})
+        stub._enter()
+        try:
+            time.sleep(delay)
+            if outcome == 'error':
+                self._send_json(503, {'error': 'the model is overloaded'})
+            elif self.path == '/v1/generate':
+                self._send_json(200, {'text': stub.script})
+            else:
+                self._send_stream(stub)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or a hedge that lost)
+            self.close_connection = True
+        finally:
+            stub._leave()
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, stub):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for start in range(0, len(stub.script), stub.chunk_size):
+            if start:
+                time.sleep(stub.chunk_delay)
+            data = stub.script[start:start + stub.chunk_size].encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
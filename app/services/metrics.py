@@ -0,0 +1,293 @@
+import os
+import json
+import glob
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Wall-clock buckets (seconds) shared by every timing histogram
+TIME_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+# Gauges from snapshots older than this belong to processes that have stopped reporting
+GAUGE_MAX_AGE = 120
+
+# name -> (type, help, buckets)
+METRICS = {
+    'docucast_stage_seconds': ('histogram', 'Wall-clock time spent in each pipeline stage.', TIME_BUCKETS),
+    'docucast_stage_unit_seconds': ('histogram', 'Time per unit of work (page, sentence) within a stage.',
+                                    TIME_BUCKETS),
+    'docucast_stage_units_total': ('counter', 'Amount of work done by each stage, by unit '
+                                              '(bytes, pages, chars, sentences, audio_seconds).', None),
+    'docucast_real_time_factor': ('histogram', 'Processing seconds per second of audio produced, by stage.',
+                                  RTF_BUCKETS),
+    'docucast_synthesis_wait_seconds': ('histogram', 'Time sentences waited in the synthesis scheduler before '
+                                                     'being synthesized, by priority (short or normal).',
+                                        TIME_BUCKETS),
+    'docucast_synthesis_queue_depth': ('gauge', 'Sentences waiting in the synthesis schedulers.', None),
+    'docucast_synthesis_active_flows': ('gauge', 'Podcasts currently sharing a synthesis engine.', None),
+    'docucast_llm_requests_total': ('counter', 'LLM requests sent (every attempt and hedge), by outcome '
+                                               '(ok, timeout, rate_limited, unavailable, rejected, cancelled).', None),
+    'docucast_llm_quota_wait_seconds': ('histogram', 'Time LLM requests waited for the client-side rate limits.',
+                                        TIME_BUCKETS),
+    'docucast_llm_hedges_total': ('counter', 'Hedged LLM requests, by which copy answered first '
+                                             '(original, hedge or none).', None),
+    'docucast_tts_cache_lookups_total': ('counter', 'Sentences looked up in the synthesized clip cache, '
+                                                    'by result (hit or miss).', None),
+    'docucast_tts_cache_evictions_total': ('counter', 'Clips evicted from the synthesized clip cache.', None),
+}
+
+# Every process writes its own snapshot; this id keeps a restarted process
+# (possibly with a recycled pid) from overwriting the totals of its predecessor.
+_PROCESS_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """
+    A minimal, dependency-free store of Prometheus counters, gauges and histograms.
+
+    Values live in memory and are written to a per-process JSON snapshot with
+    `write_snapshot`, so the web process can serve totals for the worker
+    processes (which do the actual work) from `/metrics`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # name -> {label_key: value}
+        self.gauges = {}      # name -> {label_key: value}
+        self.histograms = {}  # name -> {label_key: {'buckets': [...], 'sum': float, 'count': int}}
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, value, count=1, **labels):
+        """Records `count` observations of `value` in histogram `name`."""
+        buckets = METRICS[name][2]
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            entry = series.setdefault(_label_key(labels), {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry['buckets'][i] += count
+            entry['sum'] += value * count
+            entry['count'] += count
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps({'counters': self.counters, 'gauges': self.gauges,
+                                          'histograms': self.histograms, 'written_at': time.time()}))
+
+    def write_snapshot(self, directory):
+        """Atomically saves this process's values to `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{_PROCESS_ID}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def read_snapshots(directory):
+    """
+    Merges every process snapshot in `directory` (plus this process's live values).
+
+    Counters and histograms are cumulative and always summed; gauges are summed
+    only over snapshots written in the last GAUGE_MAX_AGE seconds, so a stopped
+    worker's last queue depth doesn't linger.
+    """
+    merged = {'counters': {}, 'gauges': {}, 'histograms': {}}
+    snapshots = {_PROCESS_ID: REGISTRY.snapshot()}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        process_id = os.path.splitext(os.path.basename(path))[0]
+        if process_id == _PROCESS_ID:
+            continue
+        try:
+            with open(path) as f:
+                snapshots[process_id] = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+    now = time.time()
+    for snapshot in snapshots.values():
+        for name, series in snapshot.get('counters', {}).items():
+            target = merged['counters'].setdefault(name, {})
+            for key, value in series.items():
+                target[key] = target.get(key, 0) + value
+        if now - snapshot.get('written_at', 0) <= GAUGE_MAX_AGE:
+            for name, series in snapshot.get('gauges', {}).items():
+                target = merged['gauges'].setdefault(name, {})
+                for key, value in series.items():
+                    target[key] = target.get(key, 0) + value
+        for name, series in snapshot.get('histograms', {}).items():
+            target = merged['histograms'].setdefault(name, {})
+            for key, entry in series.items():
+                if key not in target:
+                    target[key] = {'buckets': list(entry['buckets']), 'sum': entry['sum'], 'count': entry['count']}
+                    continue
+                total = target[key]
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], entry['buckets'])]
+                total['sum'] += entry['sum']
+                total['count'] += entry['count']
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def render_prometheus(values, gauges=None):
+    """
+    Renders merged metric values in the Prometheus text exposition format.
+
+    Args:
+        values (dict): Output of `read_snapshots`.
+        gauges (dict, optional): Extra gauges computed at scrape time,
+            as {name: (help, [(labels_dict, value), ...])}.
+
+    Returns:
+        str: The response body for `/metrics`.
+    """
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind in ('counter', 'gauge'):
+            for key, value in sorted(values[kind + 's'].get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(json.loads(key))} {value:g}")
+            continue
+        for key, entry in sorted(values['histograms'].get(name, {}).items()):
+            labels = [tuple(pair) for pair in json.loads(key)]
+            for bound, count in zip(buckets, entry['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels + [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + [('le', '+Inf')])} {entry['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {entry['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+
+    for name, (help_text, samples) in (gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(sorted(labels.items()))} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class StageTimings:
+    """
+    Per-podcast timing breakdown: seconds and work sizes accumulated per stage.
+
+    Stages that run several times (e.g. synthesis of each streamed turn) are
+    summed. In streaming mode stages overlap, so their seconds can add up to
+    more than the wall-clock 'pipeline' stage.
+    """
+
+    def __init__(self, initial=None):
+        self.stages = {stage: dict(values) for stage, values in (initial or {}).items()}
+
+    def add(self, stage, seconds, sizes):
+        entry = self.stages.setdefault(stage, {'seconds': 0.0, 'count': 0})
+        entry['seconds'] = round(entry['seconds'] + seconds, 4)
+        entry['count'] += 1
+        for unit, amount in sizes.items():
+            entry[unit] = round(entry.get(unit, 0) + amount, 3)
+
+    def as_dict(self):
+        """Returns the breakdown with derived metrics (real-time factor) filled in."""
+        result = {}
+        for stage, values in self.stages.items():
+            values = dict(values)
+            if values.get('audio_seconds'):
+                values['real_time_factor'] = round(values['seconds'] / values['audio_seconds'], 4)
+            result[stage] = values
+        return result
+
+
+_current_timings = ContextVar('stage_timings', default=None)
+
+
+@contextmanager
+def record_timings(initial=None):
+    """Collects every stage recorded inside the block into a `StageTimings`."""
+    timings = StageTimings(initial)
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_stage(stage, seconds, per=None, **sizes):
+    """
+    Records one completed stage in the process-wide metrics and, if one is
+    being collected, the current podcast's `StageTimings`.
+
+    Args:
+        stage (str): Stage name, e.g. 'extract' or 'synthesis'.
+        seconds (float): Wall-clock duration.
+        per (str, optional): A size (e.g. 'pages') to also report time per unit of.
+        **sizes: Amounts of work done, e.g. chars=..., sentences=..., audio_seconds=...
+    """
+    REGISTRY.observe('docucast_stage_seconds', seconds, stage=stage)
+    for unit, amount in sizes.items():
+        REGISTRY.inc('docucast_stage_units_total', amount, stage=stage, unit=unit)
+    if per and sizes.get(per):
+        REGISTRY.observe('docucast_stage_unit_seconds', seconds / sizes[per], count=int(sizes[per]),
+                         stage=stage, unit=per.rstrip('s'))
+    if sizes.get('audio_seconds'):
+        REGISTRY.observe('docucast_real_time_factor', seconds / sizes['audio_seconds'], stage=stage)
+
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds, sizes)
+
+
+class Span:
+    """The handle yielded by `span`; sizes can be added until the block exits."""
+
+    def __init__(self, stage, per, sizes):
+        self.stage = stage
+        self.per = per
+        self.sizes = dict(sizes)
+        self.seconds = None
+
+    def record(self, **sizes):
+        self.sizes.update(sizes)
+
+
+@contextmanager
+def span(stage, per=None, **sizes):
+    """
+    Times the enclosed block as one run of `stage`.
+
+    Usage:
+        with span('extract', per='pages') as s:
+            text = ...
+            s.record(chars=len(text), pages=page_count)
+
+    Failed blocks are not recorded, so timings only describe work that finished.
+    """
+    current = Span(stage, per, sizes)
+    start = time.perf_counter()
+    yield current
+    current.seconds = time.perf_counter() - start
+    record_stage(stage, current.seconds, per=per, **current.sizes)
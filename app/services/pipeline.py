@@ -0,0 +1,296 @@
+import os
+import time
+import shutil
+from flask import current_app
+from app.extensions import db
+from app.models import Podcast
+from app.services.job_queue import extend_lease
+from app.services.text_extractor import extract_text_from_file
+from app.services.script_generator import generate_podcast_script, PROMPT_TEMPLATE_VERSION
+from app.services.script_cache import script_cache_key, get_cached_script, store_script
+from app.services.clip_cache import ClipCache
+from app.services.dedup import audio_path_for, finalize_followers
+from app.services.llm_client import get_llm_client, llm_model_name, LLMError
+from app.services.streaming_pipeline import generate_podcast_streaming
+from app.services.hls import HlsSegmentWriter, segments_dir_for
+from app.services.checkpoint import PodcastCheckpoint, checkpoint_dir_for
+from app.services.metrics import record_timings, record_stage, span
+from app.services.tts_backends import tts_model_key
+from app.services.script_ir import PodcastScript
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails and the job should be retried or failed."""
+
+
+class PodcastDeletedError(PipelineError):
+    """Raised when the podcast (and with it the job) was deleted while the job was running."""
+
+
+def podcast_exists(podcast_id):
+    """Checks the database, not the session, for the podcast's row."""
+    return db.session.query(Podcast.id).filter_by(id=podcast_id).first() is not None
+
+
+def tts_pool_from_config(config):
+    """Returns the shared TTS process pool if TTS_POOL_SIZE asks for one, else None."""
+    if config['TTS_POOL_SIZE'] <= 1:
+        return None
+    from app.services.tts_pool import get_tts_pool
+    from app.services.audio_generator import TTS_MODEL_NAME
+    from app.services.tts_backends import tts_backend_options_from_config
+    return get_tts_pool(config['TTS_POOL_SIZE'],
+                        threads_per_worker=config['TTS_THREADS_PER_WORKER'],
+                        model_name=TTS_MODEL_NAME,
+                        batch_size=config['TTS_BATCH_SIZE'],
+                        backend_options=tts_backend_options_from_config(config,
+                                                                        config['TTS_THREADS_PER_WORKER']))
+
+
+def llm_client_from_config(config):
+    """
+    Returns the process's shared LLM client for LLM_BACKEND. The LLM quota is
+    split evenly between the WORKER_PROCESSES worker processes.
+    """
+    processes = max(1, config['WORKER_PROCESSES'])
+    return get_llm_client(config['LLM_BACKEND'], stub_url=config['LLM_STUB_URL'],
+                          requests_per_minute=config['LLM_REQUESTS_PER_MINUTE'] / processes,
+                          tokens_per_minute=config['LLM_TOKENS_PER_MINUTE'] / processes,
+                          timeout=config['LLM_TIMEOUT'], max_attempts=config['LLM_MAX_ATTEMPTS'],
+                          backoff=config['LLM_RETRY_BACKOFF'], hedge_after=config['LLM_HEDGE_AFTER'])
+
+
+def synthesis_scheduler_from_config(config):
+    """
+    Returns this process's synthesis scheduler, which shares the TTS engine (the
+    process pool if TTS_POOL_SIZE asks for one, else the in-process model)
+    fairly between the jobs the worker is running at the same time.
+    """
+    from app.services.scheduler import get_synthesis_scheduler
+    pool = tts_pool_from_config(config)
+    if pool is not None:
+        engine, workers = pool.synthesize_shard, pool.processes
+    else:
+        from app.services.audio_generator import get_tts_model
+        from app.services.synthesis import synthesize_sentences
+        from app.services.tts_backends import tts_backend_options_from_config
+        batch_size = config['TTS_BATCH_SIZE']
+        backend_options = tts_backend_options_from_config(config)
+        engine = lambda keys: synthesize_sentences(get_tts_model(**backend_options), keys, batch_size=batch_size)
+        # A single in-process model is not safe to call from several threads at once.
+        workers = 1
+    return get_synthesis_scheduler(engine, workers=workers, batch_size=config['TTS_BATCH_SIZE'],
+                                   short_job_chars=config['TTS_SHORT_JOB_CHARS'],
+                                   short_job_boost=config['TTS_SHORT_JOB_BOOST'])
+
+
+def audio_encoder_from_config(config, audio_profile):
+    """Returns the encoder for a podcast's output profile, encoding long episodes in parallel chunks."""
+    from app.services.encoder import AudioEncoder
+    return AudioEncoder(audio_profile, workers=config['ENCODE_WORKERS'], chunk_seconds=config['ENCODE_CHUNK_SECONDS'])
+
+
+def preload_worker(config):
+    """
+    Loads the TTS stack before a worker claims its first job, so the first
+    podcast doesn't pay for importing KittenTTS, loading the model and the
+    first (slow) inference. Uses the process pool if one is configured.
+    """
+    pool = tts_pool_from_config(config)
+    if pool is None:
+        from app.services.audio_generator import preload_tts
+        from app.services.tts_backends import tts_backend_options_from_config
+        return preload_tts(warm_up=config['TTS_WARM_UP'], backend_options=tts_backend_options_from_config(config))
+
+    start = time.perf_counter()
+    pool.warm_up()
+    elapsed = time.perf_counter() - start
+    record_stage('model_load', elapsed)
+    print(f"--- TTS pool of {pool.processes} processes ready after {elapsed:.2f}s ---")
+    return {'load_seconds': round(elapsed, 4), 'warm_up_seconds': 0.0}
+
+
+def run_podcast_pipeline(job, heartbeat=None):
+    """
+    Runs the upload-to-podcast pipeline (extract -> script -> audio) for a claimed job.
+
+    The worker's lease is extended before every stage so that long-running stages
+    are not mistaken for a crashed worker; a worker passes its `JobHeartbeat`,
+    which writes the stages of all its jobs in one batch and keeps renewing the
+    lease during long stages. Any failure is raised as a PipelineError
+    so the caller can decide whether to retry the job. On success, the time
+    spent in each stage is saved on the podcast (`Podcast.timings`).
+
+    Progress is checkpointed per podcast (see app/services/checkpoint.py): a
+    retry of the same job reuses the script and every sentence synthesized by
+    the failed attempt. If the podcast is deleted while the job runs, the job
+    notices at its next stage (or before completing), deletes what it wrote
+    and raises PodcastDeletedError.
+
+    Once the podcast is completed its script is saved on it as a
+    `PodcastScript`; the audio of its sentences stays in the clip cache (and,
+    with KEEP_SENTENCE_AUDIO, in the checkpoint too). A job carrying an edited
+    script (`Job.script`) skips extraction and the LLM, synthesizes only the
+    sentences without kept audio, and replaces the podcast's script once the
+    episode has been assembled again.
+
+    Synthesis goes through the worker's shared scheduler, weighted by the
+    owner's `scheduling_weight`, so concurrent jobs interleave sentence by sentence.
+
+    Args:
+        job (Job): A job currently leased by this worker.
+        heartbeat (JobHeartbeat, optional): The worker's batched lease and stage writer.
+    """
+    # Imported here so the web process never has to load the TTS stack.
+    from app.services.audio_generator import generate_audio_from_script, TTS_MODEL_NAME
+
+    podcast = job.podcast
+    # Kept apart from the instance, which can't be refreshed once its row is deleted
+    podcast_id = podcast.id
+    visibility_timeout = current_app.config['JOB_VISIBILITY_TIMEOUT']
+    scheduler = synthesis_scheduler_from_config(current_app.config)
+    written = []  # paths this job creates, deleted again if the podcast is deleted under it
+
+    def ensure_podcast_exists():
+        if podcast_exists(podcast_id):
+            return
+        for path in written:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        raise PodcastDeletedError(f'Podcast {podcast_id} was deleted while its job was running.')
+
+    def enter_stage(stage):
+        ensure_podcast_exists()
+        if heartbeat is None:
+            extend_lease(job, visibility_timeout, stage=stage)
+            return
+        heartbeat.report(job.id, stage)
+        # Ends the session's transaction so nothing is held open during the stage
+        db.session.commit()
+
+    # Every stage records its timing into the podcast's breakdown (see app/services/metrics.py);
+    # a script edit starts a new one
+    with record_timings(initial=None if job.script else podcast.timings) as timings, span('pipeline'), \
+            scheduler.open_flow(f"podcast-{podcast.id}", weight=podcast.author.scheduling_weight) as synthesis_flow:
+        # A script edit is synthesized from the job's revision of the podcast's script
+        script_ir = PodcastScript.from_dict(job.script) if job.script else None
+        if script_ir is not None and podcast.script:
+            with span('script_edit') as edit_span:
+                edit_span.record(revision=script_ir.revision,
+                                 **PodcastScript.from_dict(podcast.script).diff(script_ir).as_dict())
+
+        # 1. Extract Text
+        if script_ir is None:
+            enter_stage('extracting')
+            with span('extract', per='pages') as extract_span:
+                text = extract_text_from_file(job.source_path, workers=current_app.config['EXTRACT_WORKERS'])
+                extract_span.record(pages=text.count('\f') + 1 if text else 0, chars=len(text))
+            if not text:
+                raise PipelineError('Could not extract text from the file.')
+
+        config = current_app.config
+        generated_folder = config['GENERATED_FOLDER']
+        os.makedirs(generated_folder, exist_ok=True)
+        audio_filepath = audio_path_for(podcast, generated_folder)
+        # Encoded next to the final path and moved over it when done, so the previous
+        # audio (possibly a hard link shared with an identical upload) is never overwritten
+        partial_filepath = f"{audio_filepath}.partial"
+        encoder = audio_encoder_from_config(config, podcast.audio_profile)
+
+        # Live-stream segments are rebuilt from scratch on every attempt
+        segments_dir = segments_dir_for(podcast.id, generated_folder)
+        shutil.rmtree(segments_dir, ignore_errors=True)
+        segment_writer = HlsSegmentWriter(segments_dir)
+        written.extend([segments_dir, partial_filepath])
+
+        # Clips of the int8 model are kept apart from fp32 ones
+        tts_model = tts_model_key(TTS_MODEL_NAME, config['TTS_BACKEND'])
+        clip_cache = ClipCache(config['TTS_CACHE_DIR'], tts_model, max_bytes=config['TTS_CACHE_MAX_BYTES'])
+        # What an earlier, failed attempt of this job got done is picked up from here (an edit's
+        # job also takes over what the podcast's earlier jobs kept)
+        checkpoint_dir = checkpoint_dir_for(podcast.id, generated_folder)
+        earlier_jobs = [earlier.id for earlier in podcast.jobs if earlier.id != job.id] if job.script else []
+        checkpoint = PodcastCheckpoint(checkpoint_dir, tts_model, fallback=clip_cache, job_id=job.id,
+                                       content_sha256=podcast.content_sha256, adopt_job_ids=earlier_jobs)
+        written.append(checkpoint_dir)
+        script_options = {'max_chunk_tokens': config['SCRIPT_CHUNK_TOKENS'],
+                          'max_in_flight': config['SCRIPT_MAX_IN_FLIGHT']}
+
+        streamed = False
+        if script_ir is not None:
+            print(f"--- Synthesizing revision {script_ir.revision} of the script of podcast {podcast.id} ---")
+        else:
+            # 2. Reuse the script of an earlier attempt, or of this exact document if it was scripted before
+            cache_key = script_cache_key(text, llm_model_name(config['LLM_BACKEND']), PROMPT_TEMPLATE_VERSION)
+            script = checkpoint.script
+            if script is not None:
+                print(f"--- Resuming podcast {podcast.id} with the script saved by its previous attempt ---")
+            else:
+                script = get_cached_script(cache_key, config['SCRIPT_CACHE_TTL'])
+                podcast.script_from_cache = script is not None
+                if script is not None:
+                    print(f"--- Script cache hit for podcast {podcast.id}, skipping the LLM ---")
+
+            def remember(generated_script):
+                store_script(cache_key, generated_script, llm_model_name(config['LLM_BACKEND']),
+                             PROMPT_TEMPLATE_VERSION, ttl_seconds=config['SCRIPT_CACHE_TTL'],
+                             max_entries=config['SCRIPT_CACHE_MAX_ENTRIES'])
+
+            if script is None and config['PIPELINE_STREAMING']:
+                # 2+3. Generate Script and Audio together, synthesizing turns as they stream in
+                enter_stage('streaming')
+                try:
+                    script = generate_podcast_streaming(text, partial_filepath, client=llm_client_from_config(config),
+                                                        batch_size=config['TTS_BATCH_SIZE'], cache=clip_cache,
+                                                        script_options=script_options, segment_writer=segment_writer,
+                                                        synthesis_flow=synthesis_flow, checkpoint=checkpoint,
+                                                        encoder=encoder)
+                except Exception as e:
+                    raise PipelineError(f'Streaming generation failed: {e}') from e
+                remember(script)
+                streamed = True
+            elif script is None:
+                # 2. Generate Script
+                enter_stage('scripting')
+                try:
+                    with span('llm', chars=len(text)) as llm_span:
+                        script = generate_podcast_script(text, client=llm_client_from_config(config), **script_options)
+                        llm_span.record(script_chars=len(script))
+                except LLMError as e:
+                    raise PipelineError(f'AI script generation failed: {e}') from e
+                remember(script)
+                checkpoint.save_script(script)
+            script_ir = PodcastScript.from_text(script)
+
+        if not streamed:
+            # 3. Generate Audio (for an edited script, only its new sentences are synthesized)
+            enter_stage('synthesizing')
+            if not generate_audio_from_script(script_ir, partial_filepath, batch_size=config['TTS_BATCH_SIZE'],
+                                              cache=clip_cache, segment_writer=segment_writer,
+                                              synthesis_flow=synthesis_flow, checkpoint=checkpoint,
+                                              encoder=encoder):
+                raise PipelineError('Audio generation failed.')
+        ensure_podcast_exists()
+        os.replace(partial_filepath, audio_filepath)
+
+    # 4. Update Database Record (after the heartbeat lets go, so it can't overwrite the stage)
+    if heartbeat is not None:
+        heartbeat.forget(job.id)
+    job.stage = 'done'
+    podcast.status = 'completed'
+    podcast.generated_audio_path = audio_filepath
+    podcast.timings = timings.as_dict()
+    if job.script:
+        # The audio no longer matches the uploaded document, so identical uploads must not reuse it
+        podcast.pipeline_key = None
+    podcast.script = script_ir.to_dict()
+    db.session.commit()
+    if config['KEEP_SENTENCE_AUDIO']:
+        checkpoint.retain()
+    else:
+        checkpoint.clear()
+
+    # 5. Complete identical uploads that were waiting on this one
+    finalize_followers(podcast, generated_folder)
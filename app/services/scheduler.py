@@ -0,0 +1,234 @@
+import time
+import heapq
+import atexit
+import itertools
+import threading
+from concurrent.futures import Future, as_completed
+from app.services.synthesis import plan_synthesis, store_result
+from app.services.metrics import REGISTRY
+
+DEFAULT_SHORT_JOB_CHARS = 2000
+DEFAULT_SHORT_JOB_BOOST = 4.0
+
+
+class _WorkUnit:
+    """One sentence waiting for the TTS engine."""
+    __slots__ = ('flow', 'key', 'future', 'enqueued_at', 'priority')
+
+    def __init__(self, flow, key, priority):
+        self.flow = flow
+        self.key = key
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.priority = priority
+
+
+class SynthesisFlow:
+    """
+    One podcast's share of the synthesis engine.
+
+    `synthesize` has the same contract as `TtsProcessPool.synthesize`: cache
+    hits and duplicates are resolved here, only the remaining sentences are
+    queued, and the call blocks until all of them are back, in script order.
+    If any batch fails, the sentences that succeeded are still stored in the
+    cache before the error is raised.
+    """
+
+    def __init__(self, scheduler, name, weight):
+        self.scheduler = scheduler
+        self.name = name
+        self.weight = max(float(weight), 0.01)
+        self.last_finish = 0.0    # virtual finish time of the flow's most recent unit
+        self.submitted_chars = 0
+        self.closed = False
+
+    @property
+    def max_in_flight(self):
+        # Keeps the next streamed turn queued while the current one is synthesized,
+        # so the flow never drops out of the schedule between turns.
+        return self.scheduler.workers + 1
+
+    def synthesize(self, sentences, cache=None, on_clip=None):
+        results, pending = plan_synthesis(sentences, cache, on_clip)
+        keys = list(pending)
+        futures = dict(zip(self.scheduler.submit(self, keys), keys))
+        # Store every sentence that made it, even if another batch failed, so a
+        # checkpoint (passed as the cache) keeps as much progress as possible.
+        error = None
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                error = error or future.exception()
+                continue
+            store_result(results, pending, futures[future], future.result(), cache, on_clip)
+        if error is not None:
+            raise error
+        return results
+
+    def close(self):
+        self.scheduler.close_flow(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SynthesisScheduler:
+    """
+    Shares one TTS engine between the podcasts a worker generates concurrently.
+
+    Podcasts submit their sentences through a `SynthesisFlow`, and the engine
+    is fed with weighted fair queuing (self-clocked, as in SCFQ): every
+    sentence costs its length in characters and is stamped with a virtual
+    finish time `max(V, flow's last finish) + cost / weight`, where V is the
+    finish time of the last sentence dispatched. Dispatcher threads always
+    take the smallest stamps, so each flow gets engine time in proportion to
+    its weight no matter how much it has queued: a 500-page document
+    interleaves with a one-page one instead of holding it up.
+
+    Short jobs go first: until a flow has submitted `short_job_chars`, its
+    weight is multiplied by `short_job_boost`. Small podcasts are therefore
+    served almost immediately, while a long one only pays the boost once.
+
+    Args:
+        engine (callable): Synthesizes a list of (voice, text) keys, returning one audio array per key.
+        workers (int): Dispatcher threads, i.e. batches synthesized at the same time.
+        batch_size (int): Maximum sentences per dispatched batch.
+        short_job_chars (int): Work per flow that is boosted.
+        short_job_boost (float): Weight multiplier for that work.
+    """
+
+    def __init__(self, engine, workers=1, batch_size=16, short_job_chars=DEFAULT_SHORT_JOB_CHARS,
+                 short_job_boost=DEFAULT_SHORT_JOB_BOOST):
+        self.engine = engine
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.short_job_chars = short_job_chars
+        self.short_job_boost = short_job_boost
+
+        self._cond = threading.Condition()
+        self._heap = []  # (virtual finish, sequence, unit)
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._flows = set()
+        self._threads = []
+        self._stopped = False
+
+    def open_flow(self, name, weight=1.0):
+        """Registers a podcast with the scheduler; close the returned flow when it is done."""
+        flow = SynthesisFlow(self, name, weight)
+        with self._cond:
+            self._start()
+            flow.last_finish = self._virtual_time
+            self._flows.add(flow)
+            self._update_gauges()
+        return flow
+
+    def close_flow(self, flow):
+        """Unregisters a flow, cancelling any of its sentences that are still queued."""
+        with self._cond:
+            flow.closed = True
+            self._flows.discard(flow)
+            live = []
+            for entry in self._heap:
+                if entry[2].flow is flow:
+                    entry[2].future.cancel()
+                else:
+                    live.append(entry)
+            if len(live) != len(self._heap):
+                heapq.heapify(live)
+                self._heap = live
+            self._update_gauges()
+
+    def submit(self, flow, keys):
+        """Queues (voice, text) keys for `flow` and returns one future per key."""
+        units = []
+        with self._cond:
+            if flow.closed:
+                raise RuntimeError(f"Synthesis flow {flow.name} is closed.")
+            for key in keys:
+                short = flow.submitted_chars < self.short_job_chars
+                weight = flow.weight * (self.short_job_boost if short else 1.0)
+                cost = max(len(key[1]), 1)
+                flow.submitted_chars += cost
+                flow.last_finish = max(self._virtual_time, flow.last_finish) + cost / weight
+                unit = _WorkUnit(flow, key, 'short' if short else 'normal')
+                heapq.heappush(self._heap, (flow.last_finish, next(self._sequence), unit))
+                units.append(unit)
+            self._update_gauges()
+            self._cond.notify_all()
+        return [unit.future for unit in units]
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _update_gauges(self):
+        REGISTRY.set('docucast_synthesis_queue_depth', len(self._heap))
+        REGISTRY.set('docucast_synthesis_active_flows', len(self._flows))
+
+    def _start(self):
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._dispatch_loop, name=f"tts-scheduler-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._heap and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return None
+            batch = []
+            while self._heap and len(batch) < self.batch_size:
+                finish, _, unit = heapq.heappop(self._heap)
+                if unit.future.set_running_or_notify_cancel():
+                    batch.append(unit)
+                    self._virtual_time = finish
+            self._update_gauges()
+            return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+
+            now = time.perf_counter()
+            for unit in batch:
+                REGISTRY.observe('docucast_synthesis_wait_seconds', now - unit.enqueued_at, priority=unit.priority)
+            try:
+                audios = self.engine([unit.key for unit in batch])
+            except Exception as e:
+                for unit in batch:
+                    unit.future.set_exception(e)
+                continue
+            for unit, audio in zip(batch, audios):
+                unit.future.set_result(audio)
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            for _, _, unit in self._heap:
+                unit.future.cancel()
+            self._heap = []
+            self._cond.notify_all()
+
+
+# --- Process-wide scheduler (Singleton Pattern) ---
+_scheduler = None
+
+
+def get_synthesis_scheduler(engine, workers=1, batch_size=16, short_job_chars=DEFAULT_SHORT_JOB_CHARS,
+                            short_job_boost=DEFAULT_SHORT_JOB_BOOST):
+    """Returns the process-wide synthesis scheduler, creating it around `engine` on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = SynthesisScheduler(engine, workers, batch_size, short_job_chars, short_job_boost)
+        atexit.register(_scheduler.shutdown)
+    return _scheduler
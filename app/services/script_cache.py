@@ -0,0 +1,65 @@
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import ScriptCacheEntry
+
+
+def script_cache_key(text_content, model_name, prompt_version):
+    """Hashes everything that determines the generated script into a cache key."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model_name, text_content):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def get_cached_script(cache_key, ttl_seconds):
+    """
+    Returns the cached script for `cache_key`, or None if there is no entry or
+    it is older than `ttl_seconds`. Expired entries are removed on lookup.
+    """
+    entry = ScriptCacheEntry.query.filter_by(cache_key=cache_key).first()
+    if entry is None:
+        return None
+
+    now = datetime.utcnow()
+    if entry.created_at < now - timedelta(seconds=ttl_seconds):
+        db.session.delete(entry)
+        db.session.commit()
+        return None
+
+    entry.hits += 1
+    entry.last_used_at = now
+    db.session.commit()
+    return entry.script
+
+
+def store_script(cache_key, script, model_name, prompt_version, ttl_seconds, max_entries):
+    """
+    Saves a freshly generated script and enforces the cache limits: expired
+    entries are dropped, then the least recently used ones beyond `max_entries`.
+    """
+    db.session.add(ScriptCacheEntry(cache_key=cache_key, script=script,
+                                    model_name=model_name, prompt_version=prompt_version))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker cached the same document first; theirs is just as good.
+        db.session.rollback()
+
+    evict_scripts(ttl_seconds, max_entries)
+
+
+def evict_scripts(ttl_seconds, max_entries):
+    """Removes expired entries and trims the cache to its `max_entries` most recently used."""
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    removed = ScriptCacheEntry.query.filter(ScriptCacheEntry.created_at < cutoff).delete(synchronize_session=False)
+
+    keep_ids = db.session.query(ScriptCacheEntry.id)\
+                         .order_by(ScriptCacheEntry.last_used_at.desc())\
+                         .limit(max_entries)
+    removed += ScriptCacheEntry.query.filter(ScriptCacheEntry.id.not_in(keep_ids.scalar_subquery()))\
+                                     .delete(synchronize_session=False)
+    db.session.commit()
+    return removed
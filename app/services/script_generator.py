@@ -1,25 +1,23 @@
-import os
-import google.generativeai as genai
+import re
+from concurrent.futures import ThreadPoolExecutor
+from app.services.llm_client import get_llm_client, estimate_tokens, CHARS_PER_TOKEN, LLMError
 
-def generate_podcast_script(text_content):
-    """
-    Uses the Gemini API to convert a block of text into a conversational script.
+# Bump whenever the prompts below change, so cached scripts are not reused
+PROMPT_TEMPLATE_VERSION = '2'
 
-    Args:
-        text_content (str): The source text extracted from the uploaded file.
+SPEAKER_LINE = re.compile(r'^\s*(host|expert)\s*:', re.IGNORECASE)
+
+# --- Chunked (map-reduce) generation for large documents ---
+DEFAULT_CHUNK_TOKENS = 30000
+DEFAULT_MAX_IN_FLIGHT = 4
+PAGE_BREAK = '\f'  # the text extractor separates PDF pages with form feeds
+SECTION_BREAK = re.compile(r'\n\s*\n')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
 
-    Returns:
-        str: A formatted script with speaker tags, or an error message.
-    """
-    try:
-        api_key = os.environ.get('GOOGLE_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables.")
-        
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
 
-        prompt = f"""
+def build_script_prompt(text_content):
+    """Builds the Gemini prompt that turns source text into a Host/Expert script."""
+    return f"""
         Based on the following text, generate an engaging and informative podcast script for two speakers, a Host and an Expert.
         The script should cover all the necessary information from the content, including minute details.
         Format the script clearly with speaker labels (e.g., "Host:", "Expert:").
@@ -31,9 +29,185 @@ def generate_podcast_script(text_content):
         --- END OF TEXT ---
         """
 
-        response = model.generate_content(prompt)
-        return response.text
 
-    except Exception as e:
-        print(f"Error generating script with Gemini: {e}")
-        return f"Error: Could not generate script. Details: {str(e)}"
\ No newline at end of file
+def build_segment_prompt(text_content, index, total):
+    """Builds the prompt for one chunk of a document that is scripted in parts."""
+    if index == 0:
+        position = "This is the first part: open the show and introduce the topic, but do not wrap up."
+    elif index == total - 1:
+        position = "This is the final part: pick up mid-conversation and close the show."
+    else:
+        position = "This is a middle part: pick up mid-conversation, with no greeting and no wrap-up."
+    return f"""
+        You are writing part {index + 1} of {total} of a podcast script for two speakers, a Host and an Expert.
+        {position}
+        Cover all the necessary information from this part of the content, including minute details.
+        Format the script clearly with speaker labels (e.g., "Host:", "Expert:").
+        Make the conversation sound natural, with emotions and feelings where appropriate.
+        The entire output should be only the script itself.
+
+        --- TEXT CONTENT (PART {index + 1} OF {total}) ---
+        {text_content}
+        --- END OF TEXT ---
+        """
+
+
+def build_transition_prompt(previous_lines, next_lines):
+    """Builds the short reduce-step prompt that bridges two independently written segments."""
+    previous = "\n".join(previous_lines)
+    upcoming = "\n".join(next_lines)
+    return f"""
+        Two parts of a Host/Expert podcast script were written separately. Write one or two short
+        lines (starting with "Host:" or "Expert:") that make a smooth transition between them.
+        Output only those lines.
+
+        --- END OF PREVIOUS PART ---
+        {previous}
+        --- START OF NEXT PART ---
+        {upcoming}
+        """
+
+
+def _split_oversized(text, max_chars, separator):
+    """Yields pieces of `text` no longer than `max_chars`, cutting at `separator` where possible."""
+    for part in separator.split(text):
+        if len(part) <= max_chars:
+            yield part
+        elif separator is SECTION_BREAK:
+            yield from _split_oversized(part, max_chars, SENTENCE_END)
+        else:
+            for start in range(0, len(part), max_chars):
+                yield part[start:start + max_chars]
+
+
+def split_text_by_token_budget(text, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """
+    Splits a document into chunks of at most `max_tokens` (estimated), preferring
+    to cut at page boundaries, then section (blank line) boundaries, then
+    sentence boundaries. Neighbouring small pages are packed into one chunk.
+
+    Returns:
+        list[str]: The chunks, in document order.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    units = []
+    for page in text.split(PAGE_BREAK):
+        if len(page) <= max_chars:
+            units.append(page)
+        else:
+            units.extend(_split_oversized(page, max_chars, SECTION_BREAK))
+
+    chunks, current, size = [], [], 0
+    for unit in units:
+        if not unit.strip():
+            continue
+        if current and size + len(unit) > max_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _speaker_lines(script):
+    return [line.strip() for line in script.split('\n') if SPEAKER_LINE.match(line)]
+
+
+def iter_chunked_script_turns(text_content, client, max_chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                              max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Map-reduce script generation for documents too large for a single prompt.
+
+    Map: every chunk is scripted concurrently, with at most `max_in_flight`
+    requests outstanding. Reduce: a short prompt writes a transition between
+    each pair of neighbouring segments. Turns are yielded in order as soon as
+    the segments they belong to are finished.
+
+    Yields:
+        str: One speaker-tagged script line at a time, in order.
+    """
+    chunks = split_text_by_token_budget(text_content, max_chunk_tokens)
+    print(f"--- Scripting {len(chunks)} chunks with up to {max_in_flight} requests in flight ---")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix='llm') as executor:
+        segments = [executor.submit(client.generate, build_segment_prompt(chunk, index, len(chunks)))
+                    for index, chunk in enumerate(chunks)]
+        previous = None
+        try:
+            for future in segments:
+                lines = _speaker_lines(future.result())
+                if not lines:
+                    continue
+                if previous:
+                    try:
+                        yield from _speaker_lines(client.generate(build_transition_prompt(previous[-3:], lines[:3])))
+                    except LLMError as e:
+                        # A missing transition is cosmetic; keep the segments.
+                        print(f"Could not generate a segment transition: {e}")
+                yield from lines
+                previous = lines
+        finally:
+            # A segment failed (or the caller stopped): don't send the requests still waiting for a thread
+            for future in segments:
+                future.cancel()
+
+
+def generate_podcast_script(text_content, client=None, max_chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                            max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Uses the Gemini API to convert a block of text into a conversational script.
+    Documents larger than `max_chunk_tokens` are scripted in chunks (see
+    `iter_chunked_script_turns`).
+
+    Args:
+        text_content (str): The source text extracted from the uploaded file.
+        client (optional): An LLM client (see app.services.llm_client); defaults
+            to the backend selected by LLM_BACKEND.
+        max_chunk_tokens (int): Token budget of a single prompt.
+        max_in_flight (int): Maximum concurrent LLM requests in chunked mode.
+
+    Returns:
+        str: A formatted script with speaker tags.
+
+    Raises:
+        LLMError: The script could not be generated, after the client's retries
+            (see app.services.llm_client for the specific errors).
+    """
+    client = client or get_llm_client()
+    if estimate_tokens(text_content) > max_chunk_tokens:
+        return "\n".join(iter_chunked_script_turns(text_content, client, max_chunk_tokens, max_in_flight))
+    return client.generate(build_script_prompt(text_content))
+
+
+def stream_script_turns(text_content, client=None, max_chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                        max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Streams the script from the LLM and yields complete "Host:"/"Expert:" turns
+    as soon as each line has fully arrived, so audio can start before the
+    whole script is written. Large documents are scripted chunk by chunk.
+
+    Args:
+        text_content (str): The source text extracted from the uploaded file.
+        client (optional): An LLM client with a `stream(prompt)` method.
+        max_chunk_tokens (int): Token budget of a single prompt.
+        max_in_flight (int): Maximum concurrent LLM requests in chunked mode.
+
+    Yields:
+        str: One speaker-tagged script line at a time, in order.
+    """
+    client = client or get_llm_client()
+    if estimate_tokens(text_content) > max_chunk_tokens:
+        yield from iter_chunked_script_turns(text_content, client, max_chunk_tokens, max_in_flight)
+        return
+
+    buffer = ""
+    for chunk in client.stream(build_script_prompt(text_content)):
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if SPEAKER_LINE.match(line):
+                yield line.strip()
+    if SPEAKER_LINE.match(buffer):
+        yield buffer.strip()
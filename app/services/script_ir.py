@@ -0,0 +1,296 @@
+import re
+from difflib import SequenceMatcher
+from app.services.clip_cache import normalize_sentence
+from app.services.segmentation import SPEAKER_TURN, segment_text, DEFAULT_MIN_CHARS, DEFAULT_MAX_CHARS
+
+# Bump when the stored layout (`PodcastScript.to_dict`) changes
+SCRIPT_IR_VERSION = 1
+SPEAKERS = ('host', 'expert')
+# A "Host:"/"Expert:" label inside edited sentence text would start a new turn when the script is read back
+SPEAKER_LABEL = re.compile(r'\b(?:host|expert)[ \t]*:', re.IGNORECASE)
+
+
+class ScriptEditError(ValueError):
+    """Raised when an edit can't be applied to a script (unknown sentence, nothing left to say)."""
+
+
+class ScriptSentence:
+    """One TTS-sized sentence: the unit that is synthesized, cached and spliced."""
+    __slots__ = ('id', 'text')
+
+    def __init__(self, id, text):
+        self.id = id
+        self.text = text
+
+
+class ScriptTurn:
+    """What one speaker says before the other takes over."""
+    __slots__ = ('id', 'speaker', 'sentences')
+
+    def __init__(self, id, speaker, sentences):
+        self.id = id
+        self.speaker = speaker
+        self.sentences = sentences
+
+    @property
+    def text(self):
+        return " ".join(sentence.text for sentence in self.sentences)
+
+
+class ScriptDiff:
+    """
+    What changed between two revisions of a script, by sentence id.
+
+    `changed` sentences kept their id but have new text; `added` ones are new
+    ids. Both need to be synthesized; `unchanged` ones reuse their audio.
+    """
+
+    def __init__(self, unchanged=(), changed=(), added=(), removed=()):
+        self.unchanged = list(unchanged)
+        self.changed = list(changed)
+        self.added = list(added)
+        self.removed = list(removed)
+
+    @property
+    def to_synthesize(self):
+        return self.changed + self.added
+
+    def __bool__(self):
+        return bool(self.changed or self.added or self.removed)
+
+    def as_dict(self):
+        return {'unchanged': len(self.unchanged), 'changed': len(self.changed), 'added': len(self.added),
+                'removed': len(self.removed)}
+
+
+class PodcastScript:
+    """
+    The structured form of a podcast script: turns, their speaker, and the
+    sentences each turn is synthesized as, every one with an id that stays the
+    same across edits.
+
+    A script is parsed from the LLM's "Host:"/"Expert:" text once
+    (`from_text`) and then travels through the pipeline, is saved on the
+    podcast (`to_dict`) and is edited (`revise`, `edit_sentences`), so the
+    sentences synthesized are always exactly the ones stored. Ids are never
+    reused: `next_id` only grows.
+
+    Args:
+        turns (list[ScriptTurn]): The turns, in order.
+        revision (int): 1 for the generated script, incremented by every edit.
+        next_id (int): Number used for the next new turn or sentence id.
+    """
+
+    def __init__(self, turns, revision=1, next_id=None):
+        self.turns = turns
+        self.revision = revision
+        if next_id is None:
+            ids = [turn.id for turn in turns] + [sentence.id for _, sentence in self.iter_sentences()]
+            next_id = max((int(i[1:]) for i in ids), default=0) + 1
+        self.next_id = next_id
+
+    # --- Building ---
+
+    def _new_id(self, prefix):
+        new_id = f"{prefix}{self.next_id}"
+        self.next_id += 1
+        return new_id
+
+    @staticmethod
+    def parse_turns(script_text, min_chars=DEFAULT_MIN_CHARS, max_chars=DEFAULT_MAX_CHARS):
+        """Returns (speaker, [sentence, ...]) for every non-empty "Host:"/"Expert:" line, in order."""
+        turns = []
+        for match in SPEAKER_TURN.finditer(script_text):
+            sentences = segment_text(match.group(2), min_chars, max_chars) if match.group(2) else ()
+            if sentences:
+                turns.append((match.group(1).lower(), list(sentences)))
+        return turns
+
+    @classmethod
+    def from_text(cls, script_text, min_chars=DEFAULT_MIN_CHARS, max_chars=DEFAULT_MAX_CHARS):
+        """
+        Parses a "Host:"/"Expert:" script. Lines without a speaker label are
+        ignored, and every turn is split into sentences exactly as synthesis
+        has always split it (app/services/segmentation.py).
+        """
+        script = cls([], next_id=1)
+        for speaker, sentences in cls.parse_turns(script_text, min_chars, max_chars):
+            turn_id = script._new_id('t')
+            script.turns.append(ScriptTurn(turn_id, speaker,
+                                           [ScriptSentence(script._new_id('s'), text) for text in sentences]))
+        return script
+
+    @classmethod
+    def from_dict(cls, data):
+        """Loads a script saved with `to_dict`."""
+        if data.get('version') != SCRIPT_IR_VERSION:
+            raise ValueError(f"Unsupported script format version {data.get('version')!r}.")
+        turns = [ScriptTurn(turn['id'], turn['speaker'],
+                            [ScriptSentence(sentence['id'], sentence['text']) for sentence in turn['sentences']])
+                 for turn in data['turns']]
+        return cls(turns, revision=data['revision'], next_id=data['next_id'])
+
+    def to_dict(self):
+        """Returns the script as plain JSON-serializable data."""
+        return {
+            'version': SCRIPT_IR_VERSION,
+            'revision': self.revision,
+            'next_id': self.next_id,
+            'turns': [{'id': turn.id, 'speaker': turn.speaker,
+                       'sentences': [{'id': s.id, 'text': s.text} for s in turn.sentences]}
+                      for turn in self.turns],
+        }
+
+    # --- Reading ---
+
+    def iter_sentences(self):
+        """Yields (turn, sentence) pairs in script order."""
+        for turn in self.turns:
+            for sentence in turn.sentences:
+                yield turn, sentence
+
+    def voiced_sentences(self, voices):
+        """
+        Returns the (voice, sentence) pairs to synthesize, in script order.
+
+        Args:
+            voices (dict): Maps 'host' and 'expert' to TTS voice names.
+        """
+        return [(voices[turn.speaker], sentence.text) for turn, sentence in self.iter_sentences()]
+
+    def to_text(self):
+        """Renders the script as "Host:"/"Expert:" lines, one per turn (the format users edit)."""
+        return "\n".join(f"{turn.speaker.capitalize()}: {turn.text}" for turn in self.turns)
+
+    def __len__(self):
+        return sum(len(turn.sentences) for turn in self.turns)
+
+    def diff(self, revised):
+        """Returns what changed from this script to a later revision of it, by sentence id."""
+        previous = {sentence.id: sentence.text for _, sentence in self.iter_sentences()}
+        diff = ScriptDiff()
+        for _, sentence in revised.iter_sentences():
+            if sentence.id not in previous:
+                diff.added.append(sentence.id)
+            elif normalize_sentence(previous.pop(sentence.id)) == normalize_sentence(sentence.text):
+                diff.unchanged.append(sentence.id)
+            else:
+                diff.changed.append(sentence.id)
+        diff.removed.extend(previous)
+        return diff
+
+    # --- Editing ---
+
+    def revise(self, script_text):
+        """
+        Builds the next revision of the script from edited "Host:"/"Expert:" text.
+
+        The new sentences are matched against the current ones (speaker and
+        normalized text, in order): matches keep their id, a sentence edited in
+        place keeps its id as 'changed', and everything else gets a new id.
+        Each turn keeps the id of the old turn most of its sentences came from.
+
+        Returns:
+            tuple[PodcastScript, ScriptDiff]: The new revision and what changed.
+
+        Raises:
+            ScriptEditError: The text has no "Host:"/"Expert:" lines left.
+        """
+        new_turns = self.parse_turns(script_text)
+        if not new_turns:
+            raise ScriptEditError('The script needs at least one "Host:" or "Expert:" line.')
+
+        old = list(self.iter_sentences())
+        new = [(turn_index, speaker, text) for turn_index, (speaker, sentences) in enumerate(new_turns)
+               for text in sentences]
+        matcher = SequenceMatcher(None, [(turn.speaker, normalize_sentence(s.text)) for turn, s in old],
+                                  [(speaker, normalize_sentence(text)) for _, speaker, text in new],
+                                  autojunk=False)
+
+        revised = PodcastScript([], revision=self.revision + 1, next_id=self.next_id)
+        diff = ScriptDiff()
+        sentence_ids = [None] * len(new)
+        old_turn_of = [None] * len(new)  # the old turn each new sentence was matched with
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    sentence_ids[j], old_turn_of[j] = old[i][1].id, old[i][0].id
+                    diff.unchanged.append(old[i][1].id)
+                continue
+            # A replaced block is paired up in order: those sentences were edited in place
+            paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+            for k in range(paired):
+                sentence_ids[j1 + k], old_turn_of[j1 + k] = old[i1 + k][1].id, old[i1 + k][0].id
+                diff.changed.append(old[i1 + k][1].id)
+            for j in range(j1 + paired, j2):
+                sentence_ids[j] = revised._new_id('s')
+                diff.added.append(sentence_ids[j])
+            diff.removed.extend(sentence.id for _, sentence in old[i1 + paired:i2])
+
+        used_turn_ids = set()
+        for turn_index, (speaker, _) in enumerate(new_turns):
+            members = [j for j, (index, _, _) in enumerate(new) if index == turn_index]
+            origins = [old_turn_of[j] for j in members if old_turn_of[j] is not None]
+            turn_id = max(set(origins), key=origins.count) if origins else None
+            if turn_id is None or turn_id in used_turn_ids:
+                turn_id = revised._new_id('t')
+            used_turn_ids.add(turn_id)
+            revised.turns.append(ScriptTurn(turn_id, speaker,
+                                            [ScriptSentence(sentence_ids[j], new[j][2]) for j in members]))
+        return revised, diff
+
+    def edit_sentences(self, edits):
+        """
+        Builds the next revision with the text of some sentences replaced.
+
+        New text is split into TTS-sized sentences like the rest of the script:
+        the first keeps the edited sentence's id, any others are added after it
+        with new ids.
+
+        Args:
+            edits (dict): Sentence id -> new text; None or an empty string deletes
+                the sentence (and its turn, if nothing is left of it).
+
+        Returns:
+            tuple[PodcastScript, ScriptDiff]: The new revision and what changed.
+
+        Raises:
+            ScriptEditError: An id doesn't exist, new text has a speaker label,
+                or nothing would be left.
+        """
+        known = {sentence.id for _, sentence in self.iter_sentences()}
+        unknown = sorted(set(edits) - known)
+        if unknown:
+            raise ScriptEditError(f"Unknown sentence id(s): {', '.join(unknown)}.")
+        labelled = sorted(sentence_id for sentence_id, text in edits.items() if text and SPEAKER_LABEL.search(text))
+        if labelled:
+            raise ScriptEditError(f"Sentence text can't contain a \"Host:\" or \"Expert:\" label "
+                                  f"({', '.join(labelled)}); edit the whole script to change speakers.")
+
+        revised = PodcastScript([], revision=self.revision + 1, next_id=self.next_id)
+        diff = ScriptDiff()
+        for turn in self.turns:
+            sentences = []
+            for sentence in turn.sentences:
+                if sentence.id not in edits:
+                    diff.unchanged.append(sentence.id)
+                    sentences.append(sentence)
+                    continue
+                pieces = segment_text(" ".join(edits[sentence.id].split())) if edits[sentence.id] else ()
+                if not pieces:
+                    diff.removed.append(sentence.id)
+                    continue
+                if len(pieces) == 1 and normalize_sentence(pieces[0]) == normalize_sentence(sentence.text):
+                    diff.unchanged.append(sentence.id)
+                else:
+                    diff.changed.append(sentence.id)
+                sentences.append(ScriptSentence(sentence.id, pieces[0]))
+                for piece in pieces[1:]:
+                    added = ScriptSentence(revised._new_id('s'), piece)
+                    diff.added.append(added.id)
+                    sentences.append(added)
+            if sentences:
+                revised.turns.append(ScriptTurn(turn.id, turn.speaker, sentences))
+        if not revised.turns:
+            raise ScriptEditError("The edit would leave the script empty.")
+        return revised, diff
@@ -0,0 +1,162 @@
+import re
+from functools import lru_cache
+
+# Sentences shorter than this are merged into a neighbour from the same turn;
+# longer than this are split at clause boundaries. KittenTTS sounds best on
+# clips of roughly one to three spoken sentences.
+DEFAULT_MIN_CHARS = 20
+DEFAULT_MAX_CHARS = 250
+
+SPEAKER_TURN = re.compile(r'^[ \t]*(host|expert)[ \t]*:[ \t]*(.*?)[ \t]*$', re.IGNORECASE | re.MULTILINE)
+
+# Words that end with a period without ending the sentence (compared lower-cased, without the dot)
+ABBREVIATIONS = frozenset("""
+    mr mrs ms dr prof sr jr st mt vs etc e.g i.e cf al approx fig figs eq eqs no nos vol vols pp
+    p ch sec dept univ inc ltd co corp est min max avg misc ref refs ed eds rev gen gov
+    jan feb mar apr jun jul aug sep sept oct nov dec mon tue wed thu fri sat sun
+    u.s u.k u.n e.u a.m p.m ph.d b.sc m.sc
+""".split())
+
+# A candidate boundary: terminal punctuation (plus closing quotes/brackets) followed by whitespace
+BOUNDARY = re.compile(r'[.!?…]+["\'”’)\]]*(?=\s)')
+PREVIOUS_WORD = re.compile(r'(\S+)$')
+NEXT_START = re.compile(r'\s+(\S)')
+CLAUSE_BREAKS = (re.compile(r'(?<=[;:])\s+'), re.compile(r'(?<=[,—])\s+|\s+(?=—)'), re.compile(r'\s+'))
+
+
+def _is_boundary(text, match):
+    """Decides whether the punctuation in `match` really ends a sentence."""
+    punctuation = match.group(0)
+    if '!' in punctuation or '?' in punctuation or '…' in punctuation:
+        return True
+
+    word = PREVIOUS_WORD.search(text, 0, match.start())
+    token = (word.group(1) if word else '').lstrip('"\'(“‘[').lower()
+    if token in ABBREVIATIONS:
+        return False
+    if len(token) == 1 and token.isalpha():
+        return False  # an initial, as in "J. Smith"
+
+    following = NEXT_START.match(text, match.end())
+    # "e.g. the results" or "3 p.m. tomorrow": a lower-case continuation is the same sentence
+    return following is None or not following.group(1).islower()
+
+
+def split_sentences_regex(text):
+    """Splits prose into sentences with an abbreviation-aware regular expression."""
+    sentences = []
+    start = 0
+    for match in BOUNDARY.finditer(text):
+        if _is_boundary(text, match):
+            sentence = text[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+@lru_cache(maxsize=1)
+def _punkt_tokenizer():
+    """Loads NLTK's punkt model once per process, downloading it the first time if needed."""
+    import nltk
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        print("--- First time setup: Downloading NLTK sentence tokenizer data ('punkt') ---")
+        nltk.download('punkt', quiet=True)
+    return nltk.data.load('tokenizers/punkt/english.pickle')
+
+
+def split_sentences_punkt(text):
+    """
+    Splits prose into sentences with NLTK's punkt model, falling back to the
+    regex splitter if the model can't be loaded (e.g. offline without the data).
+    """
+    try:
+        tokenizer = _punkt_tokenizer()
+    except Exception as e:
+        print(f"!!! punkt tokenizer unavailable ({e}), using the regex splitter !!!")
+        return split_sentences_regex(text)
+    return tokenizer.tokenize(text)
+
+
+SPLITTERS = {'regex': split_sentences_regex, 'punkt': split_sentences_punkt}
+
+
+def _split_long(sentence, max_chars):
+    """Splits an overlong sentence at the strongest clause boundaries that bring it under `max_chars`."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    for pattern in CLAUSE_BREAKS:
+        pieces = [piece for piece in pattern.split(sentence) if piece]
+        if len(pieces) < 2:
+            continue
+        parts, current = [], ''
+        for piece in pieces:
+            candidate = f"{current} {piece}" if current else piece
+            if current and len(candidate) > max_chars:
+                parts.append(current)
+                current = piece
+            else:
+                current = candidate
+        parts.append(current)
+        # Pieces that are still too long are split again at weaker boundaries
+        return [part for chunk in parts for part in _split_long(chunk, max_chars)]
+    # A single unbroken "word" longer than the limit: cut it
+    return [sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars)]
+
+
+def _merge_short(sentences, min_chars, max_chars):
+    """Joins sentences shorter than `min_chars` onto a neighbour, without exceeding `max_chars`."""
+    merged = []
+    for sentence in sentences:
+        if merged and (len(merged[-1]) < min_chars or len(sentence) < min_chars) \
+                and len(merged[-1]) + 1 + len(sentence) <= max_chars:
+            merged[-1] = f"{merged[-1]} {sentence}"
+        else:
+            merged.append(sentence)
+    return merged
+
+
+@lru_cache(maxsize=4096)
+def segment_text(text, min_chars=DEFAULT_MIN_CHARS, max_chars=DEFAULT_MAX_CHARS, backend='regex'):
+    """
+    Splits one speaker turn into TTS-sized sentences.
+
+    Sentences are found with `backend` ('regex' or 'punkt'), overlong ones are
+    split at clause boundaries, and very short ones ("Great question.") are
+    merged into a neighbour so every clip is worth a synthesis call. Results
+    are cached, since the same turns come back on retries and cached scripts.
+
+    Returns:
+        tuple[str, ...]: The segments, in order.
+    """
+    sentences = [part for sentence in SPLITTERS[backend](text) for part in _split_long(sentence, max_chars)]
+    return tuple(_merge_short(sentences, min_chars, max_chars))
+
+
+def segment_script(script_text, voices, min_chars=DEFAULT_MIN_CHARS, max_chars=DEFAULT_MAX_CHARS, backend='regex'):
+    """
+    Segments a whole "Host:"/"Expert:" script in one pass.
+
+    Args:
+        script_text (str): The script; lines without a speaker label are ignored.
+        voices (dict): Maps 'host' and 'expert' to TTS voice names.
+        min_chars (int): Shorter sentences are merged with a neighbour in the same turn.
+        max_chars (int): Longer sentences are split at clause boundaries.
+        backend (str): 'regex' (default, no data files) or 'punkt'.
+
+    Returns:
+        list[tuple[str, str]]: (voice, segment) pairs in script order.
+    """
+    segments = []
+    for match in SPEAKER_TURN.finditer(script_text):
+        text = match.group(2)
+        if not text:
+            continue
+        voice = voices[match.group(1).lower()]
+        segments.extend((voice, segment) for segment in segment_text(text, min_chars, max_chars, backend))
+    return segments
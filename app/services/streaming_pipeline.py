@@ -0,0 +1,108 @@
+import time
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from app.services.script_generator import stream_script_turns
+from app.services.synthesis import synthesize_sentences
+from app.services.metrics import span, record_stage
+
+
+class StreamingPipelineError(Exception):
+    """Raised when the streamed script produced no usable speaker lines."""
+
+
+def generate_podcast_streaming(text_content, output_path, client=None, model=None, pool=None,
+                               batch_size=16, cache=None, script_options=None, segment_writer=None,
+                               synthesis_flow=None, checkpoint=None, encoder=None):
+    """
+    Generates a podcast while the script is still streaming from the LLM.
+
+    Each "Host:"/"Expert:" turn is split into sentences and handed to the TTS
+    engine the moment it arrives, so synthesis overlaps with generation and the
+    total time approaches max(LLM time, TTS time) instead of their sum. Turns
+    are synthesized in the background and appended to the episode in script
+    order as soon as they finish, so live-stream segments (if a
+    `segment_writer` is given) are published while the script is still coming in.
+
+    Args:
+        text_content (str): The source text extracted from the uploaded file.
+        output_path (str): Where to write the finished audio.
+        client (optional): LLM client with a `stream(prompt)` method.
+        model (optional): TTS model to use in-process (defaults to the shared model).
+        pool (TtsProcessPool, optional): Synthesize across a process pool instead.
+        batch_size (int): Batch size for in-process synthesis.
+        cache (ClipCache, optional): Persistent clip cache.
+        script_options (dict, optional): Extra keyword arguments for `stream_script_turns`
+            (e.g. `max_chunk_tokens`, `max_in_flight`).
+        segment_writer (HlsSegmentWriter, optional): Receives the audio as it is assembled.
+        synthesis_flow (SynthesisFlow, optional): Queue sentences on the worker's shared
+            synthesis scheduler (takes precedence over `model` and `pool`).
+        checkpoint (PodcastCheckpoint, optional): Records turns as they arrive and
+            the finished script, and keeps every synthesized sentence (in front of `cache`).
+        encoder (AudioEncoder, optional): Output profile and parallel encoding of the
+            finished episode (a single-pass MP3 by default).
+
+    Returns:
+        str: The full script that was generated.
+    """
+    from app.services.audio_generator import (split_script_into_sentences, get_tts_model, synthesize_timed,
+                                              clips_duration, create_podcast_assembler, export_podcast)
+
+    if checkpoint is not None:
+        checkpoint.start_script()
+        cache = checkpoint
+
+    if synthesis_flow is not None:
+        synthesize = lambda sentences: synthesis_flow.synthesize(sentences, cache=cache)
+        tts_workers = synthesis_flow.max_in_flight
+    elif pool is not None:
+        synthesize = lambda sentences: pool.synthesize(sentences, cache=cache)
+        tts_workers = pool.processes
+    else:
+        model = model or get_tts_model()
+        synthesize = lambda sentences: synthesize_sentences(model, sentences, batch_size=batch_size, cache=cache)
+        # A single in-process model is not safe to call from several threads at once.
+        tts_workers = 1
+
+    start = time.perf_counter()
+    assembler = create_podcast_assembler(segment_writer)
+    script_lines = []
+    pending = deque()
+
+    def drain(wait):
+        # Append finished turns in script order; stop at the first one still running.
+        while pending and (wait or pending[0].done()):
+            audio_clips = pending.popleft().result()
+            with span('stitch', audio_seconds=clips_duration(audio_clips)):
+                for clip in audio_clips:
+                    assembler.append_clip(clip)
+
+    with ThreadPoolExecutor(max_workers=tts_workers, thread_name_prefix='tts') as executor:
+        for turn in stream_script_turns(text_content, client, **(script_options or {})):
+            if not script_lines:
+                print(f"--- First script turn after {time.perf_counter() - start:.2f}s, starting TTS ---")
+                record_stage('llm_first_turn', time.perf_counter() - start)
+            script_lines.append(turn)
+            sentences = split_script_into_sentences(turn)
+            if checkpoint is not None:
+                checkpoint.append_turn(turn, sentences)
+            if sentences:
+                # Run in a copy of our context so synthesis timings land on this podcast
+                pending.append(executor.submit(contextvars.copy_context().run, synthesize_timed, synthesize, sentences))
+            drain(wait=False)
+
+        print(f"--- Script finished streaming after {time.perf_counter() - start:.2f}s "
+              f"({len(script_lines)} turns) ---")
+        record_stage('llm', time.perf_counter() - start, chars=len(text_content),
+                     script_chars=sum(len(line) for line in script_lines))
+        if checkpoint is not None and script_lines:
+            # A retry can skip the LLM from here on, even if synthesis fails
+            checkpoint.save_script("\n".join(script_lines))
+        drain(wait=True)
+
+    if not script_lines:
+        raise StreamingPipelineError("The LLM response did not contain any Host/Expert lines.")
+
+    export_podcast(assembler, output_path, segment_writer, encoder)
+    print(f"--- Streaming pipeline finished after {time.perf_counter() - start:.2f}s ---")
+    return "\n".join(script_lines)
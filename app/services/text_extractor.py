@@ -1,26 +1,202 @@
+import re
+import os
+import mmap
+import multiprocessing
+from collections import Counter, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
 
-def extract_text_from_file(filepath):
+# Below this many pages, starting worker processes costs more than it saves
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_TASK = 16
+
+
+@contextmanager
+def mapped_file(filepath):
+    """
+    Maps a file read-only and yields a memoryview of its bytes.
+
+    Extraction reads the document straight from the page cache (where the
+    upload was just written) instead of copying it into a buffer first, and
+    extraction processes working on the same file share those pages.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+@contextmanager
+def open_pdf(filepath):
+    """Opens a PDF from a memory map of the file."""
+    with mapped_file(filepath) as buffer:
+        doc = fitz.open(stream=buffer, filetype='pdf')
+        try:
+            yield doc
+        finally:
+            # MuPDF reads from the mapping, so the document must be closed before it
+            doc.close()
+
+
+def _extract_page_range(filepath, start, stop):
+    """Worker task: opens its own copy of the document and returns the text of pages [start, stop)."""
+    with open_pdf(filepath) as doc:
+        return [doc[index].get_text() for index in range(start, stop)]
+
+
+class BoilerplateStripper:
+    """
+    Removes running headers and footers from a stream of pages.
+
+    The first and last `edge_lines` non-empty lines of every page are counted
+    (with digits masked, so "Page 12" and "Page 13" match). An edge line that
+    has been seen on at least half of the pages so far, and at least
+    `min_repeats` times, is treated as boilerplate. Pages are held back in a
+    window of `window` pages so early pages benefit from what later ones reveal,
+    which keeps memory bounded no matter how long the document is.
+    """
+
+    def __init__(self, edge_lines=2, min_repeats=3, window=8):
+        self.edge_lines = edge_lines
+        self.min_repeats = min_repeats
+        self.window = window
+        self.counts = Counter()
+        self.pages_seen = 0
+        self._pending = deque()
+
+    @staticmethod
+    def _normalize(line):
+        return re.sub(r'\d+', '#', line.strip().lower())
+
+    def _edge_indices(self, lines):
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        return set(content[:self.edge_lines] + content[-self.edge_lines:])
+
+    def _is_boilerplate(self, line):
+        count = self.counts[self._normalize(line)]
+        return count >= self.min_repeats and count * 2 >= self.pages_seen
+
+    def _clean(self, lines):
+        edges = self._edge_indices(lines)
+        return "\n".join(line for i, line in enumerate(lines) if i not in edges or not self._is_boilerplate(line))
+
+    def feed(self, page_text):
+        """Adds a page and yields any pages that have left the look-ahead window, cleaned."""
+        lines = page_text.split('\n')
+        self.counts.update({self._normalize(lines[i]) for i in self._edge_indices(lines)})
+        self.pages_seen += 1
+        self._pending.append(lines)
+        while len(self._pending) > self.window:
+            yield self._clean(self._pending.popleft())
+
+    def flush(self):
+        """Yields the pages still held in the window."""
+        while self._pending:
+            yield self._clean(self._pending.popleft())
+
+
+def _extraction_context():
+    """
+    The start method of the extraction processes. Jobs extract from worker
+    processes that also run job-slot, scheduler, heartbeat and LLM client
+    threads, and forking a multithreaded process can leave the child stuck on
+    a lock another thread held. The fork server is a separate single-threaded
+    process that children are forked from, with this module already imported,
+    so they start quickly without inheriting any of those threads; spawn is
+    the fallback where there is no fork server.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload([__name__])
+    return ctx
+
+
+def _iter_raw_pdf_pages(filepath, workers):
+    with open_pdf(filepath) as doc:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            for page in doc:
+                yield page.get_text()
+            return
+
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+    # Only a couple of ranges per worker are in flight at once, so a slow
+    # consumer never causes the whole document to pile up in memory.
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_extraction_context()) as executor:
+        in_flight = deque()
+        next_range = iter(ranges)
+        for start, stop in next_range:
+            in_flight.append(executor.submit(_extract_page_range, filepath, start, stop))
+            if len(in_flight) >= max_in_flight:
+                break
+        while in_flight:
+            pages = in_flight.popleft().result()
+            following = next(next_range, None)
+            if following is not None:
+                in_flight.append(executor.submit(_extract_page_range, filepath, *following))
+            yield from pages
+
+
+def iter_pdf_pages(filepath, workers=None, strip_boilerplate=True):
+    """
+    Yields the text of a PDF page by page, in order.
+
+    Large documents are split into page ranges that are extracted in parallel
+    by a process pool (each worker opens its own copy of the file). Running
+    headers and footers are removed on the way unless `strip_boilerplate` is False.
+
+    Args:
+        filepath (str): Path of the PDF.
+        workers (int, optional): Extraction processes; defaults to the CPU count.
+        strip_boilerplate (bool): Remove repeated headers/footers.
+
+    Yields:
+        str: The text of each page.
+    """
+    workers = workers or os.cpu_count() or 1
+    pages = _iter_raw_pdf_pages(filepath, workers)
+    if not strip_boilerplate:
+        yield from pages
+        return
+
+    stripper = BoilerplateStripper()
+    for page_text in pages:
+        yield from stripper.feed(page_text)
+    yield from stripper.flush()
+
+
+def extract_text_from_file(filepath, workers=None):
     """
     Extracts raw text from a given file (PDF or TXT).
 
     Args:
         filepath (str): The full path to the file.
+        workers (int, optional): Processes used to extract large PDFs in parallel.
 
     Returns:
         str: The extracted text content, or an empty string if extraction fails.
     """
     try:
         if filepath.lower().endswith('.pdf'):
-            with fitz.open(filepath) as doc:
-                text = "".join(page.get_text() for page in doc)
-            return text
+            # Pages are separated by form feeds so later stages can split on them
+            return "\f".join(iter_pdf_pages(filepath, workers=workers))
         elif filepath.lower().endswith('.txt'):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                text = f.read()
-            return text
+            with mapped_file(filepath) as buffer:
+                text = str(buffer, 'utf-8-sig')
+            # What reading in text mode did: universal newlines
+            return text.replace('\r\n', '\n').replace('\r', '\n')
         else:
             return ""
     except Exception as e:
         print(f"Error extracting text from {filepath}: {e}")
-        return ""
\ No newline at end of file
+        return ""
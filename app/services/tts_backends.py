@@ -0,0 +1,300 @@
+import os
+import fcntl
+import hashlib
+import numpy as np
+
+DEFAULT_TTS_BACKEND = 'default'
+
+# Short and long, statements and questions, numbers and names, in both voices
+QUALITY_CHECK_SENTENCES = [
+    ("expr-voice-2-f", "Welcome back to the show."),
+    ("expr-voice-2-m", "Thanks for having me, it's great to be here."),
+    ("expr-voice-2-f", "So what did the study actually find?"),
+    ("expr-voice-2-m", "Across three growing seasons, yields rose by about 12 percent in the treated fields, "
+                       "while the control plots stayed flat."),
+    ("expr-voice-2-f", "That's remarkable."),
+    ("expr-voice-2-m", "Professor Okafor's team in Nairobi repeated it in 2023 and got nearly the same numbers."),
+]
+
+
+class TtsBackend:
+    """
+    A way of running the KittenTTS ONNX model.
+
+    Args:
+        name (str): Value of TTS_BACKEND.
+        label (str): One-line description.
+        quantize (bool): Run an int8 copy of the model (weights quantized
+            ahead of time, activations on the fly).
+        optimize_offline (bool): Save the fully optimized graph (operator
+            fusion, constant folding, layout changes) the first time and load
+            that afterwards with optimization switched off, so processes
+            start faster.
+        flush_denormals (bool): Treat denormal floats as zero. The vocoder's
+            quiet passages produce many of them, and they are very slow on x86.
+    """
+
+    def __init__(self, name, label, quantize=False, optimize_offline=False, flush_denormals=False):
+        self.name = name
+        self.label = label
+        self.quantize = quantize
+        self.optimize_offline = optimize_offline
+        self.flush_denormals = flush_denormals
+
+    @property
+    def model_suffix(self):
+        # Graph optimizations only reorder float math; int8 weights change the audio itself
+        return '+int8' if self.quantize else ''
+
+
+TTS_BACKENDS = {
+    'default': TtsBackend('default', 'KittenTTS as shipped (fp32, onnxruntime defaults)'),
+    'optimized': TtsBackend('optimized', 'fp32, pre-optimized graph, denormals flushed to zero',
+                            optimize_offline=True, flush_denormals=True),
+    'int8': TtsBackend('int8', 'int8 weights, pre-optimized graph, denormals flushed to zero',
+                       quantize=True, optimize_offline=True, flush_denormals=True),
+}
+
+
+def get_tts_backend(name):
+    """Returns the named backend; raises ValueError for unknown names."""
+    try:
+        return TTS_BACKENDS[name or DEFAULT_TTS_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown TTS backend {name!r} (choose from {', '.join(TTS_BACKENDS)})") from None
+
+
+def tts_model_key(model_name, backend_name=DEFAULT_TTS_BACKEND):
+    """
+    Returns the model identity that clip caches, checkpoints and the dedup key
+    are keyed by, so clips of a quantized model are never mixed with fp32 ones.
+    """
+    return model_name + get_tts_backend(backend_name).model_suffix
+
+
+def _derived_model_path(model_path, model_dir, kind, chunk_size=1024 * 1024):
+    # Named after the source model's contents, so a new model version is converted again
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(model_dir, f"{stem}-{digest.hexdigest()[:16]}.{kind}.onnx")
+
+
+def quantized_model_path(model_path, model_dir):
+    """
+    Returns an int8 copy of an ONNX model, quantizing it on first use.
+
+    Pool processes starting together take turns on a lock file: the first
+    one quantizes (which writes scratch files next to the source model) and
+    the others then find the finished copy. The copy is written under a
+    temporary name and moved into place, so it is never seen half-written.
+    """
+    target = _derived_model_path(model_path, model_dir, 'int8')
+    if os.path.exists(target):
+        return target
+
+    # Needs the `onnx` package, which only quantizing does
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(model_dir, exist_ok=True)
+    with open(f"{target}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(target):
+            return target
+        print(f"--- Quantizing {os.path.basename(model_path)} to int8 (once, cached in {model_dir}) ---")
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return target
+
+
+def session_options(backend, intra_op_threads=0, inter_op_threads=0, mem_arena=True):
+    """
+    Builds the onnxruntime session options of a backend.
+
+    Args:
+        backend (TtsBackend): Sets denormal handling.
+        intra_op_threads (int): Threads inside one operator (0 = one per core).
+        inter_op_threads (int): Threads running independent operators at once
+            (0 = onnxruntime's default); above 1 switches to parallel execution.
+        mem_arena (bool): Keep onnxruntime's CPU memory arena and its
+            pre-planned buffers. Faster, but the arena only grows, so turning
+            it off trades some speed for a lower, flatter RSS.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = max(0, int(intra_op_threads))
+    options.inter_op_num_threads = max(0, int(inter_op_threads))
+    if inter_op_threads > 1:
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    options.enable_cpu_mem_arena = mem_arena
+    options.enable_mem_pattern = mem_arena
+    if backend.flush_denormals:
+        options.add_session_config_entry('session.set_denormal_as_zero', '1')
+    return options
+
+
+def create_session(model_path, backend, options, model_dir):
+    """
+    Opens an onnxruntime session on `model_path` with `options`, using (and
+    on first use saving) the pre-optimized graph if the backend asks for one.
+    """
+    import onnxruntime as ort
+
+    providers = ['CPUExecutionProvider']
+    if not backend.optimize_offline:
+        return ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+    # Optimized graphs may use layouts specific to this CPU and onnxruntime version
+    target = _derived_model_path(model_path, model_dir, f"ort{ort.__version__}.optimized")
+    if os.path.exists(target):
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return ort.InferenceSession(target, sess_options=options, providers=providers)
+
+    os.makedirs(model_dir, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    options.optimized_model_filepath = tmp_path
+    try:
+        session = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return session
+
+
+def apply_tts_backend(model, backend, intra_op_threads=0, inter_op_threads=0, mem_arena=True, model_dir=None):
+    """
+    Rebuilds the ONNX session of a loaded KittenTTS model for `backend`.
+
+    The stock session is kept when the default backend is asked for with no
+    thread or arena settings. Models that don't expose their session and
+    model path (e.g. test doubles) are returned unchanged. Quantized and
+    pre-optimized models are cached in `model_dir` (next to the model by default).
+
+    Returns:
+        The same model object, now running on the backend's session.
+    """
+    inner = getattr(model, 'model', None)
+    model_path = getattr(inner, 'model_path', None)
+    if inner is None or not hasattr(inner, 'session') or not model_path:
+        return model
+    stock = not (backend.quantize or backend.optimize_offline or backend.flush_denormals)
+    if stock and not intra_op_threads and not inter_op_threads and mem_arena:
+        return model
+
+    model_dir = model_dir or os.path.dirname(model_path)
+    if backend.quantize:
+        model_path = quantized_model_path(model_path, model_dir)
+    options = session_options(backend, intra_op_threads, inter_op_threads, mem_arena)
+    inner.session = create_session(model_path, backend, options, model_dir)
+    return model
+
+
+def load_tts_model(model_name, backend_name=DEFAULT_TTS_BACKEND, intra_op_threads=0, inter_op_threads=0,
+                   mem_arena=True, model_dir=None):
+    """Loads KittenTTS and switches it to the named backend (see `apply_tts_backend`)."""
+    from kittentts import KittenTTS
+
+    backend = get_tts_backend(backend_name)
+    return apply_tts_backend(KittenTTS(model_name), backend, intra_op_threads=intra_op_threads,
+                             inter_op_threads=inter_op_threads, mem_arena=mem_arena, model_dir=model_dir)
+
+
+def tts_backend_options_from_config(config, intra_op_threads=None):
+    """Returns the keyword arguments of `load_tts_model` set by the TTS_* config."""
+    return {
+        'backend_name': config['TTS_BACKEND'],
+        'intra_op_threads': config['TTS_INTRA_OP_THREADS'] if intra_op_threads is None else intra_op_threads,
+        'inter_op_threads': config['TTS_INTER_OP_THREADS'],
+        'mem_arena': config['TTS_MEM_ARENA'],
+        'model_dir': config['TTS_MODEL_DIR'],
+    }
+
+
+# --- Quality check ---
+
+def _log_spectrogram(audio, window=512, hop=256):
+    frames = 1 + (len(audio) - window) // hop
+    if frames <= 0:
+        return np.zeros((0, window // 2 + 1))
+    index = np.arange(window)[None, :] + hop * np.arange(frames)[:, None]
+    power = np.abs(np.fft.rfft(audio[index] * np.hanning(window), axis=1)) ** 2
+    return 10 * np.log10(power + 1e-10)
+
+
+def waveform_similarity(reference, candidate, max_lag=240):
+    """
+    Compares a clip synthesized by another backend with the default backend's clip.
+
+    Returns:
+        dict:
+        - 'correlation': peak normalized cross-correlation within `max_lag`
+          samples (1.0 is identical; phase-sensitive, so it drops first);
+        - 'snr_db': reference energy over the energy of the difference at that lag;
+        - 'lsd_db': log-spectral distance of the loudest 60 dB of the
+          spectrogram (what the ear compares);
+        - 'length_ratio': candidate length over reference length.
+    """
+    reference = np.asarray(reference, dtype=np.float64).ravel()
+    candidate = np.asarray(candidate, dtype=np.float64).ravel()
+    n = min(len(reference), len(candidate))
+    if n == 0:
+        return {'correlation': 0.0, 'snr_db': float('-inf'), 'lsd_db': float('inf'),
+                'length_ratio': len(candidate) / max(1, len(reference))}
+
+    best_lag, best = 0, -1.0
+    for lag in range(-min(max_lag, n - 1), min(max_lag, n - 1) + 1):
+        a = reference[max(0, -lag):n - max(0, lag)]
+        b = candidate[max(0, lag):n - max(0, -lag)]
+        denominator = np.linalg.norm(a) * np.linalg.norm(b)
+        score = float(np.dot(a, b) / denominator) if denominator else 0.0
+        if score > best:
+            best_lag, best = lag, score
+    a = reference[max(0, -best_lag):n - max(0, best_lag)]
+    b = candidate[max(0, best_lag):n - max(0, -best_lag)]
+    noise = np.sum((a - b) ** 2)
+    snr_db = float(10 * np.log10(np.sum(a ** 2) / noise)) if noise else float('inf')
+
+    ref_spec, cand_spec = _log_spectrogram(reference[:n]), _log_spectrogram(candidate[:n])
+    if len(ref_spec):
+        floor = ref_spec.max() - 60
+        diff = np.maximum(ref_spec, floor) - np.maximum(cand_spec, floor)
+        lsd_db = float(np.mean(np.sqrt(np.mean(diff ** 2, axis=1))))
+    else:
+        lsd_db = 0.0
+    return {'correlation': best, 'snr_db': snr_db, 'lsd_db': lsd_db,
+            'length_ratio': len(candidate) / len(reference)}
+
+
+def similarity_acceptable(similarity, max_lsd_db, max_length_change=0.05):
+    """Whether a backend's clip sounds close enough to the default's (see `waveform_similarity`)."""
+    return similarity['lsd_db'] <= max_lsd_db and abs(similarity['length_ratio'] - 1) <= max_length_change
+
+
+def compare_tts_backends(reference_model, candidate_model, sentences, max_lsd_db):
+    """
+    Synthesizes `sentences` on both models, one at a time, and compares every clip.
+
+    Returns:
+        list[dict]: Per sentence, its voice and text, the `waveform_similarity`
+        metrics and whether it is 'acceptable'.
+    """
+    from app.services.synthesis import synthesize_sentences
+
+    report = []
+    for voice, text in sentences:
+        reference, = synthesize_sentences(reference_model, [(voice, text)])
+        candidate, = synthesize_sentences(candidate_model, [(voice, text)])
+        similarity = waveform_similarity(reference, candidate)
+        similarity.update(voice=voice, text=text, acceptable=similarity_acceptable(similarity, max_lsd_db))
+        report.append(similarity)
+    return report
@@ -0,0 +1,116 @@
+import os
+import math
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.services.synthesis import plan_synthesis, store_result, synthesize_sentences
+from app.services.tts_backends import load_tts_model
+
+# --- Per-process state (only populated inside pool workers) ---
+_worker_model = None
+_worker_batch_size = 16
+
+
+def _init_worker(model_name, threads, batch_size, backend_options):
+    """
+    Pool initializer: pins thread counts, loads the model once per process on
+    the configured backend (see app/services/tts_backends.py) and warms it up.
+
+    KittenTTS builds its onnxruntime session with default options, which
+    spawns one thread per core; with several workers per box that badly
+    oversubscribes the CPU, so the session is always rebuilt with `threads`
+    intra-op threads.
+    """
+    global _worker_model, _worker_batch_size
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    backend_options = dict(backend_options or {}, intra_op_threads=threads)
+    # Workers already run side by side; one operator at a time within each
+    backend_options['inter_op_threads'] = backend_options.get('inter_op_threads') or 1
+    print(f"--- TTS worker {os.getpid()} loading {model_name} on the "
+          f"{backend_options.get('backend_name', 'default')} backend with {threads} thread(s) ---")
+    _worker_model = load_tts_model(model_name, **backend_options)
+    _worker_batch_size = batch_size
+    # One throwaway sentence per voice, so no real shard pays for ONNX session start-up
+    synthesize_sentences(_worker_model, [("expr-voice-2-f", "Hello."), ("expr-voice-2-m", "Hello.")])
+
+
+def _synthesize_shard(shard):
+    return synthesize_sentences(_worker_model, shard, batch_size=_worker_batch_size)
+
+
+class TtsProcessPool:
+    """
+    A pool of synthesis processes, each holding its own KittenTTS instance.
+
+    Sentences are de-duplicated and checked against the clip cache in the
+    calling process, the remaining work is split into contiguous shards, and
+    the shards are synthesized in parallel and reassembled in script order.
+    `backend_options` are passed to `load_tts_model` in every process.
+    """
+
+    def __init__(self, processes, threads_per_worker=1, model_name="KittenML/kitten-tts-nano-0.2", batch_size=16,
+                 backend_options=None):
+        self.processes = max(1, int(processes))
+        self.threads_per_worker = max(1, int(threads_per_worker))
+        self.model_name = model_name
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_name, self.threads_per_worker, batch_size, backend_options),
+        )
+
+    def _shards(self, items):
+        # A few shards per worker keeps every process busy even when some
+        # shards hold longer sentences than others.
+        shard_size = max(1, math.ceil(len(items) / (self.processes * 4)))
+        return [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+    def synthesize(self, sentences, cache=None, on_clip=None):
+        """
+        Synthesizes (voice, sentence) pairs across the pool. `on_clip(index, audio)`
+        is called as each sentence's audio becomes available.
+
+        Returns:
+            list[numpy.ndarray]: One float audio array per input sentence, in order.
+        """
+        results, pending = plan_synthesis(sentences, cache, on_clip)
+        keys = list(pending)
+        shards = self._shards(keys)
+        print(f"--- Synthesizing {len(keys)} sentences in {len(shards)} shards on {self.processes} workers ---")
+
+        shard_results = self._executor.map(_synthesize_shard, shards)
+        for shard, audios in zip(shards, shard_results):
+            for key, audio in zip(shard, audios):
+                store_result(results, pending, key, audio, cache, on_clip)
+        return results
+
+    def synthesize_shard(self, keys):
+        """Synthesizes one list of (voice, text) keys on a single pool process, bypassing sharding and the cache."""
+        return self._executor.submit(_synthesize_shard, keys).result()
+
+    def warm_up(self):
+        """Starts the worker processes and blocks until they have loaded and warmed up their models."""
+        list(self._executor.map(_synthesize_shard, [[("expr-voice-2-f", "Hello.")]] * self.processes))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# --- Process-wide pool (Singleton Pattern) ---
+_pool = None
+
+
+def get_tts_pool(processes, threads_per_worker=1, model_name="KittenML/kitten-tts-nano-0.2", batch_size=16,
+                 backend_options=None):
+    """Returns the process-wide synthesis pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = TtsProcessPool(processes, threads_per_worker, model_name, batch_size, backend_options)
+        atexit.register(_pool.shutdown)
+    return _pool
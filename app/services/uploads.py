@@ -0,0 +1,122 @@
+import os
+import codecs
+import hashlib
+import tempfile
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# Enough of the file to recognize it; a PDF header may follow up to 1 KiB of junk
+SNIFF_BYTES = 8 * 1024
+
+
+class UploadError(Exception):
+    """Raised when an upload is not a supported document or is too large."""
+
+
+class UploadTooLargeError(UploadError):
+    """Raised when an upload goes over its byte limit."""
+
+
+class StoredUpload:
+    """
+    A document saved under its content address.
+
+    Args:
+        path (str): Where the bytes live; identical uploads share one path.
+        sha256 (str): Hex SHA-256 of the bytes.
+        size (int): Length in bytes.
+        kind (str): Sniffed document type, 'pdf' or 'txt'.
+    """
+
+    def __init__(self, path, sha256, size, kind):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.kind = kind
+
+
+def sniff_document_type(head):
+    """
+    Returns the document type of a file from its first bytes, whatever its name says.
+
+    Args:
+        head (bytes): The start of the file (up to SNIFF_BYTES).
+
+    Returns:
+        str: 'pdf' or 'txt', or None for empty files and anything else.
+    """
+    if not head:
+        return None
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    if b'\0' in head:
+        return None
+    try:
+        # Incremental, so a multi-byte character cut off at the end of `head` is fine
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+    return 'txt'
+
+
+def upload_path_for(upload_folder, sha256, kind):
+    """Returns the content address of a document: uploads/ab/abcdef....pdf"""
+    return os.path.join(upload_folder, sha256[:2], f"{sha256}.{kind}")
+
+
+def store_upload(stream, upload_folder, max_bytes=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Streams an uploaded document to its content-addressed path.
+
+    The bytes are copied in `chunk_size` pieces to a private temporary file in
+    the upload folder, hashed and sniffed on the way, and then moved to
+    `upload_path_for(...)`. Memory use is one chunk whatever the file size, the
+    file is never read back, and concurrent uploads can't overwrite each other:
+    two different files never share a path, and two identical ones share it
+    safely (the second one's copy is dropped).
+
+    Args:
+        stream: A binary file object (an upload's stream, a ZIP member, an open file).
+        upload_folder (str): Root of the upload storage.
+        max_bytes (int, optional): Raise UploadTooLargeError beyond this many bytes.
+        chunk_size (int): Bytes read and written at a time.
+
+    Returns:
+        StoredUpload: The saved document.
+
+    Raises:
+        UploadTooLargeError: The stream is longer than `max_bytes`.
+        UploadError: It is empty, or neither a PDF nor UTF-8 text.
+    """
+    incoming = os.path.join(upload_folder, 'incoming')
+    os.makedirs(incoming, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=incoming, suffix='.part')
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(f"The file is larger than {max_bytes // (1024 * 1024)} MB.")
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                digest.update(chunk)
+                out.write(chunk)
+
+        kind = sniff_document_type(head)
+        if kind is None:
+            raise UploadError("The file is empty." if not size else "The file is not a PDF or UTF-8 text document.")
+
+        sha256 = digest.hexdigest()
+        path = upload_path_for(upload_folder, sha256, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredUpload(path, sha256, size, kind)
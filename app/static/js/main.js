@@ -32,4 +32,88 @@ document.addEventListener("DOMContentLoaded", function() {
         });
     }
 
+    // Attach a live HLS stream to an <audio> element (natively on Safari, via hls.js elsewhere)
+    const playLive = function(player, streamUrl) {
+        if (player.canPlayType('application/vnd.apple.mpegurl')) {
+            player.src = streamUrl;
+        } else if (window.Hls && window.Hls.isSupported()) {
+            const hls = new window.Hls();
+            hls.loadSource(streamUrl);
+            hls.attachMedia(player);
+        } else {
+            return;
+        }
+        player.hidden = false;
+        player.play().catch(() => {});
+    };
+
+    // Poll the status of podcasts that are still being generated in the background
+    const processingRows = document.querySelectorAll('tr[data-podcast-status="processing"]');
+
+    if (processingRows.length > 0) {
+        const isListeningLive = () =>
+            Array.from(document.querySelectorAll('.live-player')).some(player => !player.hidden);
+
+        const updateRow = function(row, data) {
+            const listenButton = row.querySelector('.live-listen');
+            if (data.stream_url && listenButton && listenButton.hidden) {
+                listenButton.hidden = false;
+                row.querySelector('.live-placeholder').hidden = true;
+                listenButton.addEventListener('click', function(event) {
+                    event.preventDefault();
+                    listenButton.hidden = true;
+                    playLive(row.querySelector('.live-player'), data.stream_url);
+                });
+            }
+            return data.status !== 'processing';
+        };
+
+        const pollStatus = function() {
+            const requests = Array.from(processingRows).map(row =>
+                fetch(row.dataset.statusUrl, { headers: { 'Accept': 'application/json' } })
+                    .then(response => response.ok ? response.json() : null)
+                    .then(data => data ? updateRow(row, data) : false)
+                    .catch(() => false)
+            );
+            Promise.all(requests).then(finished => {
+                // Don't cut off someone who is listening to a live stream; its playlist ends on its own.
+                if (finished.some(Boolean) && !isListeningLive()) {
+                    window.location.reload();
+                } else {
+                    setTimeout(pollStatus, 3000);
+                }
+            });
+        };
+        setTimeout(pollStatus, 3000);
+    }
+
+    // Poll the aggregated progress of a batch and reload once every podcast in it has finished
+    const batchProgress = document.getElementById('batch-progress');
+
+    if (batchProgress && batchProgress.dataset.batchDone === 'false') {
+        const pollBatch = function() {
+            fetch(batchProgress.dataset.statusUrl, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.ok ? response.json() : null)
+                .then(data => {
+                    if (!data) {
+                        setTimeout(pollBatch, 5000);
+                        return;
+                    }
+                    const bar = batchProgress.querySelector('progress');
+                    bar.value = data.completed + data.failed;
+                    bar.max = data.total;
+                    ['completed', 'processing', 'failed'].forEach(field => {
+                        batchProgress.querySelector(`[data-field="${field}"]`).textContent = data[field];
+                    });
+                    if (data.done) {
+                        window.location.reload();
+                    } else {
+                        setTimeout(pollBatch, 5000);
+                    }
+                })
+                .catch(() => setTimeout(pollBatch, 5000));
+        };
+        setTimeout(pollBatch, 5000);
+    }
+
 });
\ No newline at end of file
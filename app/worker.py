@@ -0,0 +1,151 @@
+# app/worker.py
+
+import os
+import time
+import socket
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _worker_id(index):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def _run_job(app, worker_id, job_id, heartbeat):
+    """Runs one claimed job on a job-slot thread, with its own app context and database session."""
+    from app.extensions import db
+    from app.models import Job
+    from app.services.job_queue import complete_job, fail_job
+    from app.services.pipeline import run_podcast_pipeline, PodcastDeletedError
+
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        print(f"--- Worker {worker_id} picked up job {job.id} (attempt {job.attempts}/{job.max_attempts}) ---")
+        try:
+            try:
+                run_podcast_pipeline(job, heartbeat=heartbeat)
+            finally:
+                # No lease renewal may land after the job's final status
+                heartbeat.forget(job.id)
+            complete_job(job)
+            print(f"--- Job {job.id} completed ---")
+        except PodcastDeletedError as e:
+            # The job's row went with the podcast, so there is nothing left to fail or retry
+            db.session.rollback()
+            print(f"--- Job {job_id} abandoned: {e} ---")
+        except Exception as e:
+            db.session.rollback()
+            will_retry = fail_job(job, e, retry_backoff=app.config['JOB_RETRY_BACKOFF'])
+            print(f"!!! Job {job.id} failed: {e} ({'will retry' if will_retry else 'giving up'}) !!!")
+        finally:
+            db.session.remove()
+
+
+def run_worker(index):
+    """
+    Entry point of a single worker process.
+
+    Each process builds its own app (and therefore its own database engine),
+    preloads the TTS model (see WORKER_PRELOAD), then loops forever: recover
+    expired leases and, while one of its WORKER_JOB_SLOTS is free, claim a job
+    and run the pipeline for it on a slot thread. Jobs running side by side
+    share the process's TTS engine through the synthesis scheduler, and their
+    stage changes and lease renewals are written together by the loop's heartbeat.
+    """
+    from app import create_app
+    from app.extensions import db
+    from app.services.job_queue import requeue_expired_jobs, claim_next_job, JobHeartbeat
+    from app.services.pipeline import preload_worker
+    from app.services.metrics import REGISTRY
+
+    app = create_app()
+    worker_id = _worker_id(index)
+
+    with app.app_context():
+        poll_interval = app.config['JOB_POLL_INTERVAL']
+        visibility_timeout = app.config['JOB_VISIBILITY_TIMEOUT']
+        user_max_running = app.config['USER_MAX_RUNNING_JOBS']
+        slots = max(1, app.config['WORKER_JOB_SLOTS'])
+        snapshot_interval = app.config['METRICS_SNAPSHOT_INTERVAL']
+        heartbeat = JobHeartbeat(worker_id, visibility_timeout, interval=app.config['JOB_HEARTBEAT_INTERVAL'])
+        print(f"--- Worker {worker_id} started with {slots} job slot(s) ---")
+
+        if app.config['WORKER_PRELOAD']:
+            try:
+                preload_worker(app.config)
+            except Exception as e:
+                # Not fatal: the first job will try to load the model again and retry if it fails.
+                print(f"!!! Worker {worker_id} could not preload the TTS model: {e} !!!")
+            REGISTRY.write_snapshot(app.config['METRICS_DIR'])
+
+        running = set()
+        last_snapshot = 0.0
+        with ThreadPoolExecutor(max_workers=slots, thread_name_prefix='job') as executor:
+            while True:
+                running = {future for future in running if not future.done()}
+                job = None
+                if len(running) < slots:
+                    requeue_expired_jobs()
+                    job = claim_next_job(worker_id, visibility_timeout, user_max_running=user_max_running)
+                if job is not None:
+                    heartbeat.track(job.id)
+                    running.add(executor.submit(_run_job, app, worker_id, job.id, heartbeat))
+                db.session.remove()
+
+                if job is None:
+                    if running:
+                        finished, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                        if finished:
+                            last_snapshot = 0.0  # publish the finished job's metrics right away
+                    else:
+                        time.sleep(poll_interval)
+
+                # One short transaction for the stages and leases of every running job
+                if heartbeat.due():
+                    try:
+                        heartbeat.flush()
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"!!! Worker {worker_id} could not write its heartbeat: {e} !!!")
+                    finally:
+                        db.session.remove()
+
+                # Publish this worker's metrics for the web process's /metrics endpoint
+                if time.monotonic() - last_snapshot >= snapshot_interval:
+                    REGISTRY.write_snapshot(app.config['METRICS_DIR'])
+                    last_snapshot = time.monotonic()
+
+
+def run_worker_pool(processes):
+    """
+    Starts `processes` worker processes and restarts any that die, so a crash in
+    the TTS stack only costs the leases of the jobs that were running at the time.
+    """
+    # 'spawn' gives every worker a clean interpreter; forking a process that has
+    # already touched torch or an open SQLite connection is not safe.
+    ctx = multiprocessing.get_context('spawn')
+    workers = {}
+    # Workers split the LLM quota by WORKER_PROCESSES, so it must match --processes
+    os.environ['WORKER_PROCESSES'] = str(processes)
+
+    def start(index):
+        proc = ctx.Process(target=run_worker, args=(index,), name=f"docucast-worker-{index}", daemon=True)
+        proc.start()
+        workers[index] = proc
+
+    for index in range(processes):
+        start(index)
+
+    try:
+        while True:
+            time.sleep(5)
+            for index, proc in list(workers.items()):
+                if not proc.is_alive():
+                    print(f"!!! Worker {index} exited with code {proc.exitcode}, restarting !!!")
+                    start(index)
+    except KeyboardInterrupt:
+        print("--- Shutting down workers ---")
+        for proc in workers.values():
+            proc.terminate()
+        for proc in workers.values():
+            proc.join()
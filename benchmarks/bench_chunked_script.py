@@ -0,0 +1,51 @@
+"""
+Measures script-generation wall-clock time against document size, comparing a
+single whole-document prompt with chunked map-reduce generation.
+
+The stub LLM's latency grows with the prompt size (prompt_delay_per_char),
+which is what makes one huge prompt slow in practice.
+
+Usage (from the project root):
+    python -m benchmarks.bench_chunked_script --chunk-tokens 2000 --max-in-flight 4
+"""
+import argparse
+import time
+
+from app.services.llm_client import FakeStreamingLLM
+from app.services.script_generator import generate_podcast_script
+
+PARAGRAPH = ("Remote sensing allows researchers to monitor crops across large regions. "
+             "Each observation is calibrated against ground measurements collected in the field. ") * 4
+
+
+def make_document(pages):
+    return "\f".join(f"Section {i}\n\n{PARAGRAPH}\n\n{PARAGRAPH}" for i in range(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunk-tokens', type=int, default=2000)
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    parser.add_argument('--delay-per-char', type=float, default=0.00002)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6}{'tokens':>9}{'single (s)':>12}{'chunked (s)':>13}{'llm calls':>11}")
+    for pages in (5, 20, 80, 320):
+        document = make_document(pages)
+
+        single_client = FakeStreamingLLM(prompt_delay_per_char=args.delay_per_char)
+        start = time.perf_counter()
+        generate_podcast_script(document, client=single_client, max_chunk_tokens=10 ** 9)
+        single = time.perf_counter() - start
+
+        chunked_client = FakeStreamingLLM(prompt_delay_per_char=args.delay_per_char)
+        start = time.perf_counter()
+        generate_podcast_script(document, client=chunked_client, max_chunk_tokens=args.chunk_tokens,
+                                max_in_flight=args.max_in_flight)
+        chunked = time.perf_counter() - start
+
+        print(f"{pages:>6}{len(document) // 4:>9}{single:>12.2f}{chunked:>13.2f}{chunked_client.calls:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Measures how the dashboard's history query scales with the size of a user's
+history: the original OFFSET pagination (`paginate`, which also runs a
+COUNT(*) per view) against keyset pagination over the (user_id, created_at)
+index, on the first, middle and last page.
+
+A throwaway SQLite database is filled with podcasts for one heavy user (plus
+other users' podcasts as noise). Pass --no-index to drop the composite index
+and see the cost without it.
+
+Usage (from the project root):
+    python -m benchmarks.bench_dashboard_history --podcasts 1000 10000 50000 --repeats 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from config import Config  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Podcast, User  # noqa: E402
+from app.services.history import podcast_history  # noqa: E402
+
+PER_PAGE = 5
+
+
+def fill(user_id, count, other_user_id):
+    """Bulk-inserts `count` podcasts for the user and as many for someone else, interleaved."""
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        for owner in (user_id, other_user_id):
+            rows.append({'original_filename': f'doc_{i}.pdf', 'status': 'completed', 'script_from_cache': False,
+                         'created_at': start + timedelta(seconds=i), 'user_id': owner})
+    db.session.execute(Podcast.__table__.insert(), rows)
+    db.session.commit()
+
+
+def time_ms(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def offset_page(user_id, page):
+    pagination = Podcast.query.filter_by(user_id=user_id)\
+                              .order_by(Podcast.created_at.desc())\
+                              .paginate(page=page, per_page=PER_PAGE, error_out=False)
+    return pagination.items
+
+
+def keyset_cursor_for(user_id, page):
+    """Walks to the cursor of `page` once (outside the timing), as a user clicking "Older" would."""
+    cursor = None
+    for _ in range(page - 1):
+        cursor = podcast_history(user_id, before=cursor, limit=PER_PAGE).older_cursor
+    return cursor
+
+
+def run(count, repeats, with_index):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            if not with_index:
+                db.session.execute(db.text('DROP INDEX ix_podcasts_user_id_created_at'))
+            users = [User(username=name, email=f'{name}@example.com', password_hash='x') for name in ('heavy', 'other')]
+            db.session.add_all(users)
+            db.session.commit()
+            fill(users[0].id, count, users[1].id)
+
+            last_page = (count + PER_PAGE - 1) // PER_PAGE
+            rows = []
+            for label, page in (('first', 1), ('middle', max(1, last_page // 2)), ('last', last_page)):
+                cursor = keyset_cursor_for(users[0].id, page)
+                offset_ms = time_ms(lambda: offset_page(users[0].id, page), repeats)
+                keyset_ms = time_ms(lambda: podcast_history(users[0].id, before=cursor, limit=PER_PAGE), repeats)
+                rows.append((label, page, offset_ms, keyset_ms))
+            db.session.remove()
+            db.engine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--podcasts', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--no-index', action='store_true', help='drop the (user_id, created_at) index first')
+    args = parser.parse_args()
+
+    print(f"{'podcasts':>9} {'page':>7} {'#':>6} {'offset+count ms':>16} {'keyset ms':>10}")
+    for count in args.podcasts:
+        for label, page, offset_ms, keyset_ms in run(count, args.repeats, not args.no_index):
+            print(f"{count:>9} {label:>7} {page:>6} {offset_ms:>16.3f} {keyset_ms:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
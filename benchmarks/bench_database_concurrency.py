@@ -0,0 +1,239 @@
+"""
+Load test for the shared SQLite database: many concurrent writers (worker
+processes with several job slots each, plus the uploads that feed them)
+against many concurrent readers (dashboard and status polling).
+
+Every writer process runs a small worker loop on the real queue functions:
+an upload thread enqueues podcasts, and each job-slot thread claims a job,
+walks it through its stages and completes it. Reader threads in the parent
+process page through users' history and poll job status. The report counts
+operations, latencies and "database is locked" errors on each side.
+
+--baseline runs the settings the app had before: rollback journal, FULL
+synchronous, the driver's default 5 s busy timeout and one commit per stage
+per job instead of the batched heartbeat.
+
+Usage (from the project root):
+    python -m benchmarks.bench_database_concurrency --writers 4 --slots 4 --readers 8 --seconds 15
+    python -m benchmarks.bench_database_concurrency --baseline
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+STAGES = ('extracting', 'scripting', 'synthesizing')
+BASELINE_SETTINGS = {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT': 5}
+
+
+def make_app(database_path, settings):
+    from config import Config
+    from app import create_app
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+    for name, value in settings.items():
+        setattr(BenchConfig, name, value)
+    return create_app(BenchConfig)
+
+
+class Recorder:
+    """Thread-safe latency samples and error counts per operation; `on_error` runs after a failure."""
+
+    def __init__(self, on_error=None):
+        self.on_error = on_error
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def timed(self, name, fn):
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            with self.lock:
+                key = 'database is locked' if 'locked' in str(e) else type(e).__name__
+                self.errors.setdefault(name, {}).setdefault(key, 0)
+                self.errors[name][key] += 1
+            if self.on_error is not None:
+                self.on_error()
+            return None
+        with self.lock:
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    def merge(self, other):
+        for name, samples in other['samples'].items():
+            self.samples.setdefault(name, []).extend(samples)
+        for name, errors in other['errors'].items():
+            for key, count in errors.items():
+                self.errors.setdefault(name, {}).setdefault(key, 0)
+                self.errors[name][key] += count
+
+    def as_dict(self):
+        return {'samples': self.samples, 'errors': self.errors}
+
+
+def writer_process(index, database_path, settings, baseline, slots, seconds, user_ids, results):
+    """One worker process: an upload thread plus `slots` job-slot threads, for `seconds`."""
+    from app.extensions import db
+    from app.models import Podcast, User
+    from app.services.job_queue import (enqueue_podcast_job, claim_next_job, extend_lease, complete_job,
+                                        JobHeartbeat)
+
+    app = make_app(database_path, settings)
+    recorder = Recorder(on_error=db.session.rollback)
+    worker_id = f"bench:{index}"
+    heartbeat = JobHeartbeat(worker_id, visibility_timeout=900, interval=1)
+    deadline = time.monotonic() + seconds
+    rng = random.Random(index)
+
+    def upload_loop():
+        with app.app_context():
+            while time.monotonic() < deadline:
+                def upload():
+                    podcast = Podcast(original_filename='doc.pdf', status='processing',
+                                      author=db.session.get(User, rng.choice(user_ids)))
+                    db.session.add(podcast)
+                    db.session.commit()
+                    enqueue_podcast_job(podcast, '/dev/null')
+                recorder.timed('upload', upload)
+                db.session.remove()
+                time.sleep(0.01)
+
+    def slot_loop():
+        with app.app_context():
+            while time.monotonic() < deadline:
+                job = recorder.timed('claim', lambda: claim_next_job(worker_id, 900))
+                if job is None:
+                    db.session.remove()
+                    time.sleep(0.02)
+                    continue
+                job_id = job.id
+                heartbeat.track(job_id)
+                for stage in STAGES:
+                    if baseline:
+                        recorder.timed('stage', lambda: extend_lease(job, 900, stage=stage))
+                    else:
+                        heartbeat.report(job_id, stage)
+                        recorder.timed('stage', db.session.commit)
+                    time.sleep(0.005)  # the stage's work
+                heartbeat.forget(job_id)
+
+                def complete():
+                    job.stage = 'done'
+                    job.podcast.status = 'completed'
+                    db.session.commit()
+                    complete_job(job)
+                recorder.timed('complete', complete)
+                db.session.remove()
+
+    threads = [threading.Thread(target=upload_loop)] + [threading.Thread(target=slot_loop) for _ in range(slots)]
+    for thread in threads:
+        thread.start()
+    with app.app_context():
+        while any(thread.is_alive() for thread in threads):
+            if not baseline and heartbeat.due():
+                recorder.timed('heartbeat', heartbeat.flush)
+                db.session.remove()
+            time.sleep(0.05)
+    results.put(recorder.as_dict())
+
+
+def reader_loop(app, recorder, user_ids, seconds, seed):
+    from sqlalchemy import func
+    from app.extensions import db
+    from app.models import Job
+    from app.services.history import podcast_history
+    from app.services.job_queue import latest_job_for
+
+    rng = random.Random(seed)
+    deadline = time.monotonic() + seconds
+    with app.app_context():
+        while time.monotonic() < deadline:
+            user_id = rng.choice(user_ids)
+            page = recorder.timed('dashboard', lambda: podcast_history(user_id, limit=5))
+            if page is not None and page.items:
+                podcast = page.items[0]
+                recorder.timed('status poll', lambda: latest_job_for(podcast))
+            recorder.timed('queue depth', lambda: db.session.query(func.count(Job.id))
+                                                             .filter(Job.status == 'queued').scalar())
+            db.session.remove()
+            time.sleep(0.002)
+
+
+def summarize(recorder, seconds):
+    print(f"{'operation':>12} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  errors")
+    names = sorted(set(recorder.samples) | set(recorder.errors))
+    for name in names:
+        samples = np.asarray(recorder.samples.get(name, [0.0])) * 1000
+        errors = recorder.errors.get(name, {})
+        print(f"{name:>12} {len(recorder.samples.get(name, [])) / seconds:>8.1f} {np.percentile(samples, 50):>8.2f} "
+              f"{np.percentile(samples, 99):>8.2f} {samples.max():>8.2f}  {errors or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4, help='worker processes')
+    parser.add_argument('--slots', type=int, default=4, help='job slots per worker process')
+    parser.add_argument('--readers', type=int, default=8, help='reader threads (web requests)')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--baseline', action='store_true', help='use the pre-WAL settings and per-stage commits')
+    args = parser.parse_args()
+
+    settings = dict(BASELINE_SETTINGS) if args.baseline else {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, 'bench.db')
+        app = make_app(database_path, settings)
+        from app.extensions import db
+        from app.models import User
+        with app.app_context():
+            db.create_all()
+            users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x')
+                     for i in range(args.users)]
+            db.session.add_all(users)
+            db.session.commit()
+            user_ids = [user.id for user in users]
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+            db.session.remove()
+        print(f"--- {args.writers} writer processes x {args.slots} slots, {args.readers} readers, "
+              f"{args.seconds:.0f}s, journal_mode={journal_mode} ---")
+
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+        writers = [ctx.Process(target=writer_process, args=(i, database_path, settings, args.baseline, args.slots,
+                                                            args.seconds, user_ids, results))
+                   for i in range(args.writers)]
+        for proc in writers:
+            proc.start()
+
+        recorder = Recorder(on_error=db.session.rollback)
+        readers = [threading.Thread(target=reader_loop, args=(app, recorder, user_ids, args.seconds, i))
+                   for i in range(args.readers)]
+        for thread in readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+        for _ in writers:
+            recorder.merge(results.get())
+        for proc in writers:
+            proc.join()
+
+        with app.app_context():
+            from app.models import Job
+            done = Job.query.filter_by(status='succeeded').count()
+            db.engine.dispose()
+        summarize(recorder, args.seconds)
+        print(f"--- {done} jobs completed ({done / args.seconds:.1f}/s) ---")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Compares the single-pass encode of a finished episode with the parallel,
+chunked encode, for every output profile, and verifies the chunked file
+against the single-pass one.
+
+A speech-like test signal (a gliding voiced tone with syllable and pause
+envelopes, plus a little noise) of --minutes is encoded both ways. Both
+files are decoded again with ffmpeg and compared with the source:
+
+- decode errors (there must be none),
+- length (the chunked file may only differ by the codec's delay and padding),
+- log-spectral distance to the source, over the whole episode and in the
+  half second around every chunk junction (waveform SNR is meaningless for
+  Opus, which does not preserve phase at speech bitrates).
+
+The script exits with code 1 if a chunked encode is measurably worse than
+the single pass.
+
+Usage (from the project root):
+    python -m benchmarks.bench_encoding --minutes 10 --workers 4 --chunk-seconds 60
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.audio_profiles import AUDIO_PROFILES
+from app.services.encoder import AudioEncoder, ffmpeg_binary
+
+SAMPLE_RATE = 24000
+# How much worse (in dB of log-spectral distance) the chunked file may be
+TOLERANCE_DB = 0.5
+
+
+def speech_like_pcm(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = (np.sin(2 * np.pi * 3 * t) > -0.3) * (np.sin(2 * np.pi * 0.2 * t) > -0.7)
+    signal = 0.25 * voiced * envelope + 0.01 * rng.standard_normal(len(t))
+    return np.rint(np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+def decode(path):
+    result = subprocess.run([ffmpeg_binary(), '-v', 'error', '-i', path, '-f', 's16le', '-ac', '1',
+                             '-ar', str(SAMPLE_RATE), 'pipe:1'], capture_output=True)
+    return np.frombuffer(result.stdout, np.int16).astype(np.float64), result.stderr.decode().strip()
+
+
+def align(reference, decoded, max_delay=4000):
+    """Returns the decoded signal shifted by the codec delay that best matches the reference."""
+    n = min(len(reference), 2 * SAMPLE_RATE)
+    delay = max(range(max_delay), key=lambda d: np.dot(reference[:n], decoded[d:d + n]))
+    return decoded[delay:], delay
+
+
+def log_spectral_distance(reference, decoded, window=512):
+    n = min(len(reference), len(decoded)) // window * window
+    if n == 0:
+        return float('nan')
+    hann = np.hanning(window)
+    power = lambda x: np.abs(np.fft.rfft(x[:n].reshape(-1, window) * hann, axis=1)) ** 2
+    diff = 10 * np.log10(power(reference) + 1e-3) - 10 * np.log10(power(decoded) + 1e-3)
+    return float(np.mean(np.sqrt(np.mean(diff ** 2, axis=1))))
+
+
+def measure(encoder, pcm, path):
+    start = time.perf_counter()
+    pieces = encoder.encode(pcm, path, sample_rate=SAMPLE_RATE)
+    seconds = time.perf_counter() - start
+    decoded, errors = decode(path)
+    reference = pcm.astype(np.float64)
+    decoded, delay = align(reference, decoded)
+    half = SAMPLE_RATE // 4
+    junctions = [log_spectral_distance(reference[start - half:start + half], decoded[start - half:start + half])
+                 for start, _ in encoder.chunk_bounds(len(pcm), SAMPLE_RATE)[1:]]
+    return {'seconds': seconds, 'pieces': pieces, 'bytes': os.path.getsize(path), 'errors': errors,
+            'delay': delay, 'length_diff': len(decoded) - len(pcm),
+            'lsd': log_spectral_distance(reference, decoded), 'junction_lsd': max(junctions, default=float('nan'))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--chunk-seconds', type=float, default=60)
+    parser.add_argument('--profiles', nargs='+', default=list(AUDIO_PROFILES), choices=list(AUDIO_PROFILES))
+    args = parser.parse_args()
+
+    pcm = speech_like_pcm(args.minutes * 60)
+    print(f"--- {args.minutes:g} min episode, {args.workers} workers, {args.chunk_seconds:g}s chunks, "
+          f"{os.cpu_count()} CPUs ---")
+    print(f"{'profile':>11} {'mode':>8} {'pieces':>6} {'seconds':>8} {'MiB':>7} {'delay':>6} {'len diff':>8} "
+          f"{'LSD dB':>7} {'worst junction':>14}  errors")
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.profiles:
+            profile = AUDIO_PROFILES[name]
+            results = {}
+            for mode, workers in (('single', 1), ('chunked', max(2, args.workers))):
+                encoder = AudioEncoder(name, workers=workers, chunk_seconds=args.chunk_seconds)
+                results[mode] = r = measure(encoder, pcm, os.path.join(tmp, f"{name}_{mode}.{profile.extension}"))
+                print(f"{name:>11} {mode:>8} {r['pieces']:>6} {r['seconds']:>8.2f} {r['bytes'] / 2 ** 20:>7.2f} "
+                      f"{r['delay']:>6} {r['length_diff']:>8} {r['lsd']:>7.2f} {r['junction_lsd']:>14.2f}  "
+                      f"{r['errors'] or '-'}")
+
+            single, chunked = results['single'], results['chunked']
+            problems = []
+            if chunked['errors']:
+                problems.append('decode errors')
+            if abs(chunked['length_diff']) > 2 * profile.frame_samples:
+                problems.append(f"length differs by {chunked['length_diff']} samples")
+            if chunked['lsd'] > single['lsd'] + TOLERANCE_DB:
+                problems.append('worse than the single pass')
+            if chunked['junction_lsd'] > single['lsd'] + TOLERANCE_DB:
+                problems.append('audible junctions')
+            print(f"{'':>11} {'check':>8} {'FAILED: ' + ', '.join(problems) if problems else 'ok'} "
+                  f"({single['seconds'] / chunked['seconds']:.2f}x faster, "
+                  f"{profile.label})")
+            failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+End-to-end benchmark suite: extraction -> script -> audio on fixture corpora.
+
+Generated PDF and TXT documents of increasing size are driven through
+`extract_text_from_file`, `generate_podcast_script` and
+`generate_audio_from_script`, using a deterministic fake LLM and a fake TTS
+model that produces sine-wave PCM at 24 kHz (or the real KittenTTS model with
+--real-tts, if it is already in the local Hugging Face cache).
+
+Every case runs in its own process so its peak RSS is its own. The report is
+JSON: latency percentiles per stage, throughput, real-time factor, the stage
+breakdown recorded by app.services.metrics and peak RSS. Pass --baseline with
+an earlier report to fail (exit code 1) when a stage got slower.
+
+Usage (from the project root):
+    python -m benchmarks.bench_end_to_end --pages 1 8 32 --repeats 5 --output bench.json
+    python -m benchmarks.bench_end_to_end --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_pdf_extraction import make_pdf, BODY
+from benchmarks.fakes import FakeScriptLLM, FakeTTSModel
+
+STAGES = ('extract', 'script', 'audio', 'total')
+
+
+def make_txt(path, pages):
+    """Writes a TXT fixture with roughly the same amount of text as a `pages`-page PDF."""
+    words = (BODY * 12).split()
+    with open(path, 'w', encoding='utf-8') as f:
+        for number in range(1, pages + 1):
+            shift = number % len(words)
+            f.write(f"Section {number}\n\n{' '.join(words[shift:] + words[:shift])}\n\n")
+
+
+def percentiles(samples):
+    values = np.asarray(samples, dtype=float)
+    return {
+        'p50': round(float(np.percentile(values, 50)), 6),
+        'p90': round(float(np.percentile(values, 90)), 6),
+        'p99': round(float(np.percentile(values, 99)), 6),
+        'mean': round(float(values.mean()), 6),
+        'min': round(float(values.min()), 6),
+        'max': round(float(values.max()), 6),
+    }
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(own / 1024, 1), round(children / 1024, 1)  # ru_maxrss is in KiB on Linux
+
+
+def load_tts_model(real_tts, tts_delay):
+    if not real_tts:
+        return FakeTTSModel(synth_delay_per_char=tts_delay)
+    # Only use a model that is already downloaded; benchmarks must not hit the network.
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    from app.services.audio_generator import get_tts_model
+    try:
+        return get_tts_model()
+    except Exception as e:
+        raise SystemExit(f"--real-tts needs KittenTTS in the local Hugging Face cache: {e}")
+
+
+def run_case(fmt, pages, options):
+    """Runs one corpus case `options['repeats']` times and returns its report."""
+    import app.services.audio_generator as audio_generator
+    from app.services.audio_assembler import PcmAssembler
+    from app.services.text_extractor import extract_text_from_file
+    from app.services.script_generator import generate_podcast_script
+    from app.services.metrics import record_timings
+
+    audio_generator.tts_model = load_tts_model(options['real_tts'], options['tts_delay'])
+    if not options['mp3_export']:
+        # Without ffmpeg, still build the final PCM buffer so stitching is measured.
+        def build_pcm_only(self, output_path, encoder=None):
+            self.to_pcm()
+            return 1
+        PcmAssembler.export = build_pcm_only
+
+    samples = {stage: [] for stage in STAGES}
+    breakdowns = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"fixture_{pages}.{fmt}")
+        (make_pdf if fmt == 'pdf' else make_txt)(path, pages)
+        input_bytes = os.path.getsize(path)
+
+        for repeat in range(options['repeats'] + options['warmup']):
+            client = FakeScriptLLM(latency=options['llm_latency'])
+            with record_timings() as timings:
+                start = time.perf_counter()
+                text = extract_text_from_file(path, workers=options['extract_workers'])
+                extracted = time.perf_counter()
+                script = generate_podcast_script(text, client=client, max_chunk_tokens=options['chunk_tokens'])
+                scripted = time.perf_counter()
+                ok = audio_generator.generate_audio_from_script(script, os.path.join(tmp, 'out.mp3'),
+                                                                batch_size=options['batch_size'])
+                finished = time.perf_counter()
+            if not ok:
+                raise RuntimeError(f"Pipeline failed for {fmt} with {pages} pages")
+            if repeat < options['warmup']:
+                continue
+
+            samples['extract'].append(extracted - start)
+            samples['script'].append(scripted - extracted)
+            samples['audio'].append(finished - scripted)
+            samples['total'].append(finished - start)
+            breakdowns.append(timings.as_dict())
+
+    last = breakdowns[-1]
+    sentences = last.get('synthesis', {}).get('sentences', 0)
+    audio_seconds = last.get('synthesis', {}).get('audio_seconds', 0)
+    turns = sum(1 for line in script.split('\n') if line.strip())
+    median = {stage: float(np.median(values)) for stage, values in samples.items()}
+    own_rss, children_rss = peak_rss_mb()
+
+    return {
+        'name': f"{fmt}-{pages}p",
+        'format': fmt,
+        'pages': pages,
+        'input_bytes': input_bytes,
+        'chars': len(text),
+        'script_turns': turns,
+        'sentences': sentences,
+        'audio_seconds': audio_seconds,
+        'llm_calls_per_run': client.calls,
+        'latency_seconds': {stage: percentiles(values) for stage, values in samples.items()},
+        'throughput': {
+            'extract_chars_per_s': round(len(text) / median['extract'], 1),
+            'extract_pages_per_s': round(pages / median['extract'], 2),
+            'script_turns_per_s': round(turns / median['script'], 2),
+            'synthesis_sentences_per_s': round(sentences / median['audio'], 2),
+            'audio_seconds_per_s': round(audio_seconds / median['audio'], 2),
+        },
+        'real_time_factor': round(median['audio'] / audio_seconds, 4) if audio_seconds else None,
+        'stage_breakdown': last,
+        'peak_rss_mb': own_rss,
+        'peak_rss_children_mb': children_rss,
+    }
+
+
+def run_isolated(fmt, pages, options):
+    # A fresh interpreter per case keeps peak RSS from one case out of the next.
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (fmt, pages, options))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Returns a description of every stage whose p50 is more than `tolerance` slower than the baseline."""
+    previous = {case['name']: case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in report['cases']:
+        before = previous.get(case['name'])
+        if before is None:
+            continue
+        for stage in STAGES:
+            old = before['latency_seconds'][stage]['p50']
+            new = case['latency_seconds'][stage]['p50']
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(f"{case['name']} {stage}: p50 {old:.4f}s -> {new:.4f}s ({new / old:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--formats', nargs='+', choices=['pdf', 'txt'], default=['pdf', 'txt'])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs before the measured ones')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--chunk-tokens', type=int, default=30000)
+    parser.add_argument('--extract-workers', type=int, default=1)
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='simulated seconds per LLM call')
+    parser.add_argument('--tts-delay', type=float, default=0.0, help='simulated fake-TTS seconds per character')
+    parser.add_argument('--real-tts', action='store_true', help='use the locally cached KittenTTS model')
+    parser.add_argument('--no-isolate', action='store_true', help='run every case in this process')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p50 slowdown against the baseline')
+    args = parser.parse_args()
+
+    options = {
+        'repeats': args.repeats,
+        'warmup': args.warmup,
+        'batch_size': args.batch_size,
+        'chunk_tokens': args.chunk_tokens,
+        'extract_workers': args.extract_workers,
+        'llm_latency': args.llm_latency,
+        'tts_delay': args.tts_delay,
+        'real_tts': args.real_tts,
+        'mp3_export': shutil.which('ffmpeg') is not None,
+    }
+    runner = run_case if args.no_isolate else run_isolated
+
+    cases = []
+    for fmt in args.formats:
+        for pages in args.pages:
+            print(f"--- Running {fmt} with {pages} pages ---", file=sys.stderr)
+            cases.append(runner(fmt, pages, options))
+
+    report = {
+        'suite': 'end_to_end',
+        'environment': {
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'tts': 'kittentts' if args.real_tts else 'fake',
+        },
+        'options': options,
+        'cases': cases,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Compares ways of sharing one LLM API quota between podcasts that are scripted
+at the same time, against the local stub server (app/services/llm_stub_server.py).
+
+The server enforces a quota of --server-rps requests per second (429 above
+it) and answers --slow-fraction of requests after --slow-latency seconds
+instead of --latency, like a real API's latency tail. --podcasts documents
+of --chunks chunks each are then scripted concurrently, map-reduce style
+(`generate_podcast_script`), with one of these clients:
+
+- per podcast: a new client for every podcast, one attempt per request and
+  no rate limit (what `generate_podcast_script` used to do),
+- retries: one shared client that retries 429s and timeouts with backoff,
+- rate limited: the shared client also keeps under the quota itself,
+- hedged: rate limited, plus hedging requests slower than --hedge-after.
+
+The table shows the wall time, how many podcasts failed, the slowest podcast,
+the requests the server saw (and how many it refused), and the TCP
+connections opened.
+
+Usage (from the project root):
+    python -m benchmarks.bench_llm_client --podcasts 8 --chunks 6 --server-rps 10
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.llm_client import LLMClient, StubServerBackend, LLMError
+from app.services.llm_stub_server import StubLLMServer
+from app.services.script_generator import generate_podcast_script
+
+CHUNK_TOKENS = 500
+
+
+def make_document(chunks):
+    page = "The survey compared three instruments across two field seasons. " * 30
+    return "\f".join(page for _ in range(chunks))
+
+
+def run(strategy, args):
+    server = StubLLMServer(latency=args.latency, slow_fraction=args.slow_fraction, slow_latency=args.slow_latency,
+                           requests_per_second=args.server_rps, seed=1).start()
+    options = {'timeout': args.slow_latency * 2, 'backoff': 0.2, 'max_backoff': 5}
+    if strategy != 'per podcast':
+        options['max_attempts'] = 8
+    if strategy in ('rate limited', 'hedged'):
+        options['requests_per_minute'] = args.server_rps * 60
+    if strategy == 'hedged':
+        options['hedge_after'] = args.hedge_after
+    shared = LLMClient(StubServerBackend(server.url), **options) if strategy != 'per podcast' else None
+    document = make_document(args.chunks)
+
+    def script_one(_):
+        client = shared or LLMClient(StubServerBackend(server.url), max_attempts=1)
+        start = time.perf_counter()
+        try:
+            generate_podcast_script(document, client=client, max_chunk_tokens=CHUNK_TOKENS,
+                                    max_in_flight=args.max_in_flight)
+            return time.perf_counter() - start
+        except LLMError:
+            return None
+        finally:
+            if shared is None:
+                client.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.podcasts) as executor:
+        durations = list(executor.map(script_one, range(args.podcasts)))
+    wall = time.perf_counter() - start
+    if shared is not None:
+        shared.close()
+    server.stop()
+    finished = [d for d in durations if d is not None]
+    return {'wall': wall, 'failed': len(durations) - len(finished), 'slowest': max(finished, default=float('nan')),
+            **server.stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--podcasts', type=int, default=8)
+    parser.add_argument('--chunks', type=int, default=6, help='chunks per document (plus a transition per pair)')
+    parser.add_argument('--max-in-flight', type=int, default=4, help='SCRIPT_MAX_IN_FLIGHT')
+    parser.add_argument('--server-rps', type=float, default=10, help='quota of the stub server')
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--slow-fraction', type=float, default=0.05)
+    parser.add_argument('--slow-latency', type=float, default=3.0)
+    parser.add_argument('--hedge-after', type=float, default=0.6)
+    args = parser.parse_args()
+
+    requests = args.podcasts * (2 * args.chunks - 1)
+    print(f"--- {args.podcasts} podcasts x {args.chunks} chunks ({requests} completions), quota "
+          f"{args.server_rps:g} req/s, {args.slow_fraction:.0%} of answers take {args.slow_latency:g}s ---")
+    print(f"{'client':>12} {'wall s':>7} {'failed':>6} {'slowest s':>9} {'requests':>8} {'429s':>5} {'conns':>5}")
+    for strategy in ('per podcast', 'retries', 'rate limited', 'hedged'):
+        r = run(strategy, args)
+        print(f"{strategy:>12} {r['wall']:>7.2f} {r['failed']:>6} {r['slowest']:>9.2f} {r['requests']:>8} "
+              f"{r['rate_limited']:>5} {r['connections']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Compares generating a podcast from scratch with regenerating it after a small
+script edit.
+
+A document is scripted by a deterministic fake LLM (with --llm-latency
+seconds per call) and synthesized by a fake TTS model that sleeps
+--tts-delay seconds per character, into a `PodcastCheckpoint` that keeps the
+audio of every sentence afterwards, as the pipeline does with
+KEEP_SENTENCE_AUDIO. Then --edits sentences of the saved `PodcastScript` are
+rewritten (`revise`) and the episode is synthesized again: only the changed
+sentences go to the model, the rest come from the checkpoint.
+
+Without ffmpeg on the PATH the episode is assembled as PCM but not encoded.
+
+Usage (from the project root):
+    python -m benchmarks.bench_script_edit --pages 16 --edits 1 --tts-delay 0.002
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import app.services.audio_generator as audio_generator
+from app.services.audio_assembler import PcmAssembler
+from app.services.checkpoint import PodcastCheckpoint
+from app.services.script_generator import generate_podcast_script
+from app.services.script_ir import PodcastScript
+from benchmarks.fakes import FakeScriptLLM, FakeTTSModel
+from benchmarks.bench_end_to_end import make_txt
+
+MODEL_NAME = 'fake-tts'
+
+
+def edit_text(script, edits):
+    """Rewrites `edits` sentences spread evenly through the script; returns the edited text."""
+    sentences = [sentence for _, sentence in script.iter_sentences()]
+    step = max(1, len(sentences) // max(1, edits))
+    edited = {sentences[i].id for i in range(0, len(sentences), step)[:edits]}
+    lines = []
+    for turn in script.turns:
+        text = " ".join(f"{s.text[:-1]}, as the authors put it." if s.id in edited else s.text
+                        for s in turn.sentences)
+        lines.append(f"{turn.speaker.capitalize()}: {text}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=16, help='size of the generated document')
+    parser.add_argument('--edits', type=int, default=1, help='sentences to rewrite')
+    parser.add_argument('--llm-latency', type=float, default=2.0, help='simulated seconds per LLM call')
+    parser.add_argument('--tts-delay', type=float, default=0.002, help='simulated TTS seconds per character')
+    parser.add_argument('--chunk-tokens', type=int, default=30000)
+    args = parser.parse_args()
+
+    model = FakeTTSModel(synth_delay_per_char=args.tts_delay)
+    audio_generator.tts_model = model
+    if shutil.which('ffmpeg') is None:
+        PcmAssembler.export = lambda self, output_path, encoder=None: self.to_pcm() is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        document_path = os.path.join(tmp, 'document.txt')
+        make_txt(document_path, args.pages)
+        with open(document_path, encoding='utf-8') as f:
+            document = f.read()
+        checkpoint_dir = os.path.join(tmp, 'checkpoint')
+
+        start = time.perf_counter()
+        text = generate_podcast_script(document, client=FakeScriptLLM(latency=args.llm_latency),
+                                       max_chunk_tokens=args.chunk_tokens)
+        script = PodcastScript.from_text(text)
+        checkpoint = PodcastCheckpoint(checkpoint_dir, MODEL_NAME)
+        if not audio_generator.generate_audio_from_script(script, os.path.join(tmp, 'full.mp3'),
+                                                          checkpoint=checkpoint):
+            raise SystemExit("Full generation failed")
+        checkpoint.retain()
+        full = time.perf_counter() - start
+        full_calls = model.calls
+
+        model.calls = 0
+        start = time.perf_counter()
+        revised, diff = PodcastScript.from_dict(script.to_dict()).revise(edit_text(script, args.edits))
+        checkpoint = PodcastCheckpoint(checkpoint_dir, MODEL_NAME)
+        if not audio_generator.generate_audio_from_script(revised, os.path.join(tmp, 'edited.mp3'),
+                                                          checkpoint=checkpoint):
+            raise SystemExit("Regeneration failed")
+        checkpoint.retain()
+        edited = time.perf_counter() - start
+
+    print(f"--- {args.pages} pages: {len(script)} sentences in {len(script.turns)} turns, "
+          f"edit {diff.as_dict()} ---")
+    print(f"{'run':>12} {'wall s':>7} {'synthesized':>11}")
+    print(f"{'full':>12} {full:>7.2f} {full_calls:>11}")
+    print(f"{'after edit':>12} {edited:>7.2f} {model.calls:>11}  ({full / edited:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
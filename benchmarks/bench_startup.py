@@ -0,0 +1,95 @@
+"""
+Measures start-up cost in fresh interpreters: building the Flask app (what every
+web process, migration and CLI command pays), importing the audio generator,
+and a worker's TTS preload compared with the cold first synthesis it replaces.
+
+Every measurement runs in a new Python process and is repeated; the table shows
+medians and which heavy libraries each step ended up importing.
+
+Usage (from the project root):
+    python -m benchmarks.bench_startup --repeats 5
+    python -m benchmarks.bench_startup --fake-tts   # without the KittenTTS model
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ('torch', 'kittentts', 'onnxruntime', 'nltk', 'numpy', 'pydub', 'fitz')
+
+# Each snippet prints one JSON object: seconds for its steps plus the heavy modules it loaded.
+PRELUDE = """
+import json, os, sys, time
+os.environ.setdefault('SECRET_KEY', 'bench')
+start = time.perf_counter()
+"""
+
+FAKE_TTS = """
+import app.services.audio_generator as audio_generator
+from benchmarks.fakes import FakeTTSModel
+audio_generator.tts_model = FakeTTSModel()
+"""
+
+SNIPPETS = {
+    'create_app': PRELUDE + """
+from app import create_app
+create_app()
+result = {'create_app': time.perf_counter() - start}
+""",
+    'import_audio_generator': PRELUDE + """
+import app.services.audio_generator
+result = {'import_audio_generator': time.perf_counter() - start}
+""",
+    'cold_first_synthesis': PRELUDE + """{fake}
+from app.services.audio_generator import get_tts_model, WARM_UP_SENTENCES
+from app.services.synthesis import synthesize_sentences
+synthesize_sentences(get_tts_model(), [WARM_UP_SENTENCES[0]])
+result = {'first_sentence_without_preload': time.perf_counter() - start}
+""",
+    'preloaded_first_synthesis': PRELUDE + """{fake}
+from app.services.audio_generator import get_tts_model, preload_tts
+from app.services.synthesis import synthesize_sentences
+timings = preload_tts(warm_up=True)
+ready = time.perf_counter()
+synthesize_sentences(get_tts_model(), [('expr-voice-2-m', 'A sentence the warm-up has not seen.')])
+result = {'preload': ready - start, 'first_sentence_after_preload': time.perf_counter() - ready}
+""",
+}
+
+EPILOGUE = """
+result['heavy_modules'] = sorted(m for m in {modules!r} if m in sys.modules)
+print(json.dumps(result))
+"""
+
+
+def run_snippet(code):
+    completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                               cwd=os.getcwd(), check=False)
+    if completed.returncode != 0:
+        raise SystemExit(f"Benchmark step failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--fake-tts', action='store_true', help='use the sine-wave fake instead of KittenTTS')
+    args = parser.parse_args()
+
+    print(f"{'step':<34}{'median (s)':>12}{'min (s)':>10}  heavy modules loaded")
+    for name, snippet in SNIPPETS.items():
+        code = snippet.replace('{fake}', FAKE_TTS if args.fake_tts else '') + \
+            EPILOGUE.replace('{modules!r}', repr(HEAVY_MODULES))
+        runs = [run_snippet(code) for _ in range(args.repeats)]
+        for key in runs[0]:
+            if key == 'heavy_modules':
+                continue
+            values = [run[key] for run in runs]
+            modules = ", ".join(runs[0]['heavy_modules']) or "-"
+            print(f"{key:<34}{statistics.median(values):>12.3f}{min(values):>10.3f}  {modules}")
+
+
+if __name__ == '__main__':
+    main()
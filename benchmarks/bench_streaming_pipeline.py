@@ -0,0 +1,52 @@
+"""
+Compares the sequential pipeline (whole script, then audio) with the streaming
+pipeline that synthesizes turns while the script is still arriving.
+
+A fake LLM streams a canned script with configurable delays and a fake TTS
+model sleeps in proportion to the text, so the comparison runs offline.
+
+Usage (from the project root):
+    python -m benchmarks.bench_streaming_pipeline --chunk-delay 0.05 --tts-delay 0.002
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.services.llm_client import FakeStreamingLLM, CANNED_SCRIPT
+from app.services.script_generator import generate_podcast_script
+from app.services.audio_generator import generate_audio_from_script
+from app.services.streaming_pipeline import generate_podcast_streaming
+import app.services.audio_generator as audio_generator
+from benchmarks.fakes import FakeTTSModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat-script', type=int, default=5, help='how many times to repeat the canned script')
+    parser.add_argument('--first-chunk-delay', type=float, default=0.5)
+    parser.add_argument('--chunk-delay', type=float, default=0.05)
+    parser.add_argument('--tts-delay', type=float, default=0.002, help='simulated TTS seconds per character')
+    args = parser.parse_args()
+
+    script = "\n".join([CANNED_SCRIPT] * args.repeat_script)
+    make_llm = lambda: FakeStreamingLLM(script, chunk_delay=args.chunk_delay, first_chunk_delay=args.first_chunk_delay)
+    model = FakeTTSModel(synth_delay_per_char=args.tts_delay)
+    audio_generator.tts_model = model  # generate_audio_from_script uses the shared model
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        full_script = generate_podcast_script("document", client=make_llm())
+        generate_audio_from_script(full_script, os.path.join(tmp, 'sequential.mp3'))
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generate_podcast_streaming("document", os.path.join(tmp, 'streaming.mp3'), client=make_llm(), model=model)
+        streaming = time.perf_counter() - start
+
+    print(f"sequential: {sequential:.2f}s")
+    print(f"streaming:  {streaming:.2f}s  ({sequential / streaming:.2f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
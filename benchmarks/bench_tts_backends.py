@@ -0,0 +1,101 @@
+"""
+Compares the TTS inference backends (app/services/tts_backends.py) on this
+machine: real-time factor, load time and peak RSS, plus how close each
+backend's audio is to the default backend's.
+
+Every configuration (backend x intra-op threads x memory arena) runs in a
+fresh process, so load time and peak RSS are its own. The process loads the
+model, warms it up, synthesizes the corpus (unique sentences, so nothing is
+de-duplicated) and synthesizes the quality-check sentences. Real-time factor
+is synthesis seconds per second of audio produced (below 1 is faster than
+real time). The quality columns compare the quality-check clips with the
+default backend's: the worst log-spectral distance and the lowest waveform
+correlation, and whether every clip passes `flask tts-check`'s threshold.
+
+Usage (from the project root):
+    python -m benchmarks.bench_tts_backends --sentences 100 --threads 1 2 4
+    python -m benchmarks.bench_tts_backends --backends default int8 --no-arena
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from app.services.tts_backends import TTS_BACKENDS, QUALITY_CHECK_SENTENCES, waveform_similarity, \
+    similarity_acceptable
+from benchmarks.bench_batched_synthesis import build_corpus
+
+MODEL_NAME = "KittenML/kitten-tts-nano-0.2"
+SAMPLE_RATE = 24000
+
+
+def run_configuration(backend, threads, mem_arena, sentences, batch_size, model_dir, results):
+    """Child process: loads one configuration and measures it."""
+    from app.services.synthesis import synthesize_sentences
+    from app.services.tts_backends import load_tts_model
+
+    start = time.perf_counter()
+    model = load_tts_model(MODEL_NAME, backend_name=backend, intra_op_threads=threads, inter_op_threads=1,
+                           mem_arena=mem_arena, model_dir=model_dir)
+    load_seconds = time.perf_counter() - start
+    synthesize_sentences(model, [("expr-voice-2-f", "Hello."), ("expr-voice-2-m", "Hello.")])
+
+    corpus = [(voice, f"{text} Item {i}.") for i, (voice, text) in enumerate(build_corpus(sentences))]
+    start = time.perf_counter()
+    clips = synthesize_sentences(model, corpus, batch_size=batch_size)
+    synth_seconds = time.perf_counter() - start
+    audio_seconds = sum(len(clip) for clip in clips) / SAMPLE_RATE
+
+    quality_clips = [synthesize_sentences(model, [sentence])[0] for sentence in QUALITY_CHECK_SENTENCES]
+    results.put({'load_seconds': load_seconds, 'synth_seconds': synth_seconds, 'audio_seconds': audio_seconds,
+                 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                 'quality_clips': quality_clips})
+
+
+def measure(ctx, *args):
+    results = ctx.Queue()
+    proc = ctx.Process(target=run_configuration, args=(*args, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=list(TTS_BACKENDS), choices=list(TTS_BACKENDS))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help='intra-op thread counts to try')
+    parser.add_argument('--no-arena', action='store_true', help='also try each configuration without the memory arena')
+    parser.add_argument('--sentences', type=int, default=60)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--max-lsd', type=float, default=3.0, help='quality threshold in dB (TTS_CHECK_MAX_LSD_DB)')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    arenas = (True, False) if args.no_arena else (True,)
+    with tempfile.TemporaryDirectory() as model_dir:
+        # The reference clips always come from the stock default backend
+        reference = measure(ctx, 'default', 0, True, 0, args.batch_size, model_dir)['quality_clips']
+        print(f"--- {args.sentences} sentences, batch size {args.batch_size}, {os.cpu_count()} CPUs ---")
+        print(f"{'backend':>10} {'threads':>7} {'arena':>5} {'load s':>7} {'RTF':>6} {'x real':>7} "
+              f"{'RSS MB':>7} {'worst LSD':>9} {'min corr':>8}  quality")
+        for backend in args.backends:
+            for threads in sorted(set(args.threads)):
+                for mem_arena in arenas:
+                    # Quantized and optimized models are converted once, outside the measured run
+                    measure(ctx, backend, threads, mem_arena, 0, args.batch_size, model_dir)
+                    r = measure(ctx, backend, threads, mem_arena, args.sentences, args.batch_size, model_dir)
+                    similarity = [waveform_similarity(ref, clip) for ref, clip in zip(reference, r['quality_clips'])]
+                    rtf = r['synth_seconds'] / r['audio_seconds'] if r['audio_seconds'] else float('nan')
+                    ok = all(similarity_acceptable(s, args.max_lsd) for s in similarity)
+                    print(f"{backend:>10} {threads:>7} {'on' if mem_arena else 'off':>5} {r['load_seconds']:>7.2f} "
+                          f"{rtf:>6.3f} {1 / rtf:>7.1f} {r['peak_rss_mb']:>7.0f} "
+                          f"{max(s['lsd_db'] for s in similarity):>9.2f} "
+                          f"{min(s['correlation'] for s in similarity):>8.3f}  {'ok' if ok else 'TOO DIFFERENT'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Measures how synthesis throughput scales with the number of TTS pool workers.
+
+Usage (from the project root):
+    python -m benchmarks.bench_tts_pool_scaling --max-workers 8 --threads 1 --sentences 400
+"""
+import argparse
+import os
+import time
+
+from app.services.tts_pool import TtsProcessPool
+from benchmarks.bench_batched_synthesis import build_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threads', type=int, default=1, help='threads per worker')
+    parser.add_argument('--sentences', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    # Unique sentences, so de-duplication does not hide the synthesis cost.
+    corpus = [(voice, f"{text} Item {i}.") for i, (voice, text) in enumerate(build_corpus(args.sentences))]
+
+    print(f"{'workers':>8}{'seconds':>10}{'sentences/s':>14}{'speedup':>10}")
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        pool = TtsProcessPool(workers, threads_per_worker=args.threads, batch_size=args.batch_size)
+        pool.warm_up()
+
+        start = time.perf_counter()
+        pool.synthesize(corpus)
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{len(corpus) / elapsed:>14.2f}{baseline / elapsed:>9.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
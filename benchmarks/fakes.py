@@ -0,0 +1,71 @@
+"""Deterministic stand-ins for the AI backends, used by the benchmarks."""
+import re
+import time
+import numpy as np
+
+SAMPLE_RATE = 24000
+
+
+class FakeTTSModel:
+    """
+    Mimics `KittenTTS.generate`: returns a sine tone at 24 kHz whose length grows
+    with the text, optionally sleeping to simulate inference cost.
+    """
+
+    def __init__(self, seconds_per_char=0.06, synth_delay_per_char=0.0, frequency=220.0):
+        self.seconds_per_char = seconds_per_char
+        self.synth_delay_per_char = synth_delay_per_char
+        self.frequency = frequency
+        self.calls = 0
+
+    def generate(self, text, voice="expr-voice-2-f"):
+        self.calls += 1
+        if self.synth_delay_per_char:
+            time.sleep(len(text) * self.synth_delay_per_char)
+        num_samples = max(1, int(len(text) * self.seconds_per_char * SAMPLE_RATE))
+        pitch = self.frequency * (1.5 if voice.endswith('-m') else 1.0)
+        t = np.arange(num_samples, dtype=np.float32) / SAMPLE_RATE
+        return (0.3 * np.sin(2 * np.pi * pitch * t)).astype(np.float32)
+
+
+class FakeScriptLLM:
+    """
+    A deterministic LLM stand-in whose script is built from the words of the
+    prompt, so longer documents produce proportionally longer scripts (one turn
+    per `chars_per_turn` characters of prompt, up to `max_turns`). The same
+    prompt always yields the same script.
+    """
+
+    model_name = 'fake-script-llm'
+
+    def __init__(self, chars_per_turn=600, max_turns=400, words_per_sentence=14, latency=0.0, chunk_size=64):
+        self.chars_per_turn = chars_per_turn
+        self.max_turns = max_turns
+        self.words_per_sentence = words_per_sentence
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def _script(self, prompt):
+        words = re.findall(r"[A-Za-z][A-Za-z'-]*", prompt) or ["podcast"]
+        turns = min(self.max_turns, max(2, len(prompt) // self.chars_per_turn))
+        lines = []
+        for turn in range(turns):
+            sentences = []
+            for sentence in range(2):
+                start = (turn * 2 + sentence) * self.words_per_sentence
+                chosen = [words[(start + i) % len(words)] for i in range(self.words_per_sentence)]
+                sentences.append(" ".join(chosen).capitalize() + ".")
+            speaker = "Host" if turn % 2 == 0 else "Expert"
+            lines.append(f"{speaker}: {' '.join(sentences)}")
+        return "\n".join(lines)
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        script = self._script(prompt)
+        for start in range(0, len(script), self.chunk_size):
+            yield script[start:start + self.chunk_size]
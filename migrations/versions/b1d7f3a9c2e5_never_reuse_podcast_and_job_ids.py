@@ -0,0 +1,36 @@
+"""Never reuse podcast and job ids on SQLite
+
+Revision ID: b1d7f3a9c2e5
+Revises: a6c2e8f4b9d3
+Create Date: 2025-10-21 09:12:36.418205
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1d7f3a9c2e5'
+down_revision = 'a6c2e8f4b9d3'
+branch_labels = None
+depends_on = None
+
+TABLES = ('podcasts', 'jobs')
+
+
+def _recreate(autoincrement):
+    # Without AUTOINCREMENT SQLite hands the highest id out again once its row is
+    # deleted; the table has to be rebuilt to change that. Other databases
+    # never reuse sequence values, so there is nothing to do there.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+
+
+def upgrade():
+    _recreate(True)
+
+
+def downgrade():
+    _recreate(False)
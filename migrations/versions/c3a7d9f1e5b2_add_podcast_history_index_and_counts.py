@@ -0,0 +1,48 @@
+"""Add podcast history index and per-user status counts
+
+Revision ID: c3a7d9f1e5b2
+Revises: b8e1f4a2c6d9
+Create Date: 2025-10-16 14:37:10.551826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7d9f1e5b2'
+down_revision = 'b8e1f4a2c6d9'
+branch_labels = None
+depends_on = None
+
+
+STATUS_COLUMNS = {
+    'processing': 'podcasts_processing',
+    'completed': 'podcasts_completed',
+    'failed': 'podcasts_failed',
+}
+
+
+def upgrade():
+    with op.batch_alter_table('podcasts', schema=None) as batch_op:
+        batch_op.create_index('ix_podcasts_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        for column in STATUS_COLUMNS.values():
+            batch_op.add_column(sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    # Start the counters from the existing history; the app keeps them current from here on
+    for status, column in STATUS_COLUMNS.items():
+        op.execute(
+            f"UPDATE users SET {column} = "
+            f"(SELECT COUNT(*) FROM podcasts WHERE podcasts.user_id = users.id AND podcasts.status = '{status}')"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        for column in STATUS_COLUMNS.values():
+            batch_op.drop_column(column)
+
+    with op.batch_alter_table('podcasts', schema=None) as batch_op:
+        batch_op.drop_index('ix_podcasts_user_id_created_at')